@@ -15,10 +15,17 @@ from discord.ext import commands
 import json
 import os
 import asyncio
+import atexit
+import threading
 from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import datetime
 import math
 
+import bot_ipc
+import rank_sync
+import rank_table
+
 # Map and Gametype Configuration
 MAP_GAMETYPES = {
     "Midship": ["MLG CTF5", "MLG Team Slayer", "MLG Oddball", "MLG Bomb"],
@@ -36,6 +43,10 @@ ADMIN_ROLES = ["Overlord", "Staff", "Server Support"]
 
 # Channel ID for populate_stats.py refresh trigger
 REFRESH_TRIGGER_CHANNEL_ID = 1427929973125156924
+REFRESH_TRIGGER = "!refresh_ranks_trigger"
+# Written by populate_stats.py: players whose highest rank changed in its last run
+# (same path on both sides - override with BOT_RANK_CHANGES_FILE)
+RANK_CHANGES_FILE = os.environ.get("BOT_RANK_CHANGES_FILE", "/home/carnagereport/bot/rank_changes.json")
 
 # Playlist types for per-playlist ranking
 PLAYLIST_TYPES = ["mlg_4v4", "team_hardcore", "double_team", "head_to_head"]
@@ -53,6 +64,10 @@ GAMESTATS_FILE = "gamestats.json"
 RANKSTATS_FILE = "rankstats.json"
 XP_CONFIG_FILE = "xp_config.json"
 
+# rankstats.json changes made by the bot are written this many seconds after
+# the first unsaved change (batched, see RankStatsStore)
+RANKSTATS_FLUSH_INTERVAL = 2.0
+
 # Rank icon URLs (for DMs)
 RANK_ICON_BASE = "https://r2-cdn.insignia.live/h2-rank"
 
@@ -72,16 +87,11 @@ def save_json_file(filepath: str, data: dict, skip_github: bool = False):
     with open(filepath, 'w') as f:
         json.dump(data, f, indent=2)
     
-    # Push to GitHub unless skipped
-    if not skip_github:
+    # Push to GitHub unless skipped (in the background - this runs inside bot handlers)
+    if not skip_github and filepath in (RANKSTATS_FILE, GAMESTATS_FILE, XP_CONFIG_FILE):
         try:
             import github_webhook
-            if filepath == RANKSTATS_FILE:
-                github_webhook.update_rankstats_on_github()
-            elif filepath == GAMESTATS_FILE:
-                github_webhook.update_gamestats_on_github()
-            elif filepath == XP_CONFIG_FILE:
-                github_webhook.update_xp_config_on_github()
+            github_webhook.queue_github_push(filepath)
         except Exception as e:
             print(f"GitHub push failed for {filepath}: {e}")
 
@@ -149,158 +159,277 @@ def get_xp_config() -> dict:
         save_json_file(XP_CONFIG_FILE, config)
     return config
 
+def get_rank_table() -> rank_table.RankTable:
+    """Get the compiled rank table (xp_config.json is only re-read when it changes)"""
+    try:
+        table = rank_table.get_rank_table(XP_CONFIG_FILE)
+    except FileNotFoundError:
+        table = None
+    if table is None or not table.thresholds:
+        # Missing/empty config - get_xp_config() writes the defaults
+        table = rank_table.RankTable(get_xp_config())
+    return table
+
 def get_rank_thresholds() -> dict:
     """Get rank thresholds from config"""
-    config = get_xp_config()
-    thresholds = config.get("rank_thresholds", {})
-    # Convert string keys to integers and lists to tuples
-    return {int(k): tuple(v) for k, v in thresholds.items()}
+    # Integer levels -> (min_xp, max_xp)
+    return dict(get_rank_table().thresholds)
+
+class RankStatsStore:
+    """
+    Process-wide in-memory copy of rankstats.json.
+
+    The file is loaded once and reads are served from memory. Changes are
+    made to the in-memory copy and written back together (atomically, via a
+    temp file) RANKSTATS_FLUSH_INTERVAL seconds after the first unsaved
+    change, instead of a full load and rewrite per call. When the file
+    changes on disk from outside the store (a manual edit or restore, a git
+    pull of the bot's data, the legacy STATSRANKS.py module), the next read
+    reloads it and a pending write is dropped instead of overwriting it - the
+    file wins over any unsaved bot changes. populate_stats.py
+    only reads rankstats.json; its results go to ranks.json.
+
+    Dicts handed out are the live copies: callers that only read must not
+    modify them, callers that modify them must call mark_dirty().
+    """
+
+    def __init__(self, path: str, flush_interval: float = RANKSTATS_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.data = None
+        self.file_key = None  # (mtime_ns, size) of the file we loaded or last wrote
+        self.dirty = False
+        self.push_pending = False
+        self.timer = None
+        self.version = 0  # bumped on every change or reload
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        key = self._stat_key()
+        if self.data is not None and key == self.file_key:
+            return
+        if self.data is not None and self.dirty:
+            print(f"{self.path} was replaced on disk - discarding unsaved changes")
+        try:
+            self.data = load_json_file(self.path)
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            if self.data is None:
+                self.data = {}
+            return
+        self.file_key = key
+        self.dirty = False
+        self.push_pending = False
+        self.version += 1
+
+    def reload(self) -> dict:
+        """Load the file again now, even if it looks unchanged"""
+        with self.lock:
+            self.file_key = None
+            self._ensure_loaded()
+            return self.data
+
+    def all(self) -> dict:
+        """All players ({user_id: stats})"""
+        with self.lock:
+            self._ensure_loaded()
+            return self.data
+
+    def get(self, user_key: str) -> Optional[dict]:
+        """One player's stats, or None"""
+        with self.lock:
+            self._ensure_loaded()
+            return self.data.get(user_key)
+
+    def set(self, user_key: str, player_stats: dict, push: bool = True):
+        """Replace one player's stats"""
+        with self.lock:
+            self._ensure_loaded()
+            self.data[user_key] = player_stats
+            self.mark_dirty(push)
+
+    def replace_all(self, stats: dict, push: bool = False):
+        """Replace every player's stats"""
+        with self.lock:
+            self._ensure_loaded()
+            self.data = stats
+            self.mark_dirty(push)
+
+    def mark_dirty(self, push: bool = True):
+        """Schedule a write (and a GitHub push unless push=False) of the in-memory copy"""
+        with self.lock:
+            self.dirty = True
+            self.push_pending = self.push_pending or push
+            self.version += 1
+            if self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write unsaved changes now"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            key = self._stat_key()
+            if key is not None and key != self.file_key:
+                # Replaced on disk since we loaded it - the file wins (this drops
+                # the unsaved changes and loads it)
+                self._ensure_loaded()
+                return
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+                return
+            self.file_key = self._stat_key()
+            self.dirty = False
+            push, self.push_pending = self.push_pending, False
+
+        if push:
+            try:
+                import github_webhook
+                github_webhook.queue_github_push(self.path)
+            except Exception as e:
+                print(f"GitHub push failed for {self.path}: {e}")
+
+
+rankstats_store = RankStatsStore(RANKSTATS_FILE)
+atexit.register(rankstats_store.flush)
+
+def get_new_player_stats() -> dict:
+    """Stats for a player with no entry yet"""
+    return {
+        "xp": 0,
+        "wins": 0,
+        "losses": 0,
+        "series_wins": 0,
+        "series_losses": 0,
+        "total_games": 0,
+        "total_series": 0,
+        "mmr": 1500,  # Default MMR
+        "playlist_stats": get_default_playlist_stats(),
+        "highest_rank": 1
+    }
 
 def get_player_stats(user_id: int, skip_github: bool = False) -> dict:
-    """Get player stats from rankstats.json"""
-    stats = load_json_file(RANKSTATS_FILE)
-    user_key = str(user_id)
-
-    if user_key not in stats:
-        stats[user_key] = {
-            "xp": 0,
-            "wins": 0,
-            "losses": 0,
-            "series_wins": 0,
-            "series_losses": 0,
-            "total_games": 0,
-            "total_series": 0,
-            "mmr": 1500,  # Default MMR
-            "playlist_stats": get_default_playlist_stats(),
-            "highest_rank": 1
-        }
-        save_json_file(RANKSTATS_FILE, stats, skip_github=skip_github)
-    else:
-        # Ensure existing players have playlist_stats and highest_rank
-        if "playlist_stats" not in stats[user_key]:
-            stats[user_key]["playlist_stats"] = get_default_playlist_stats()
-            stats[user_key]["highest_rank"] = 1
-            save_json_file(RANKSTATS_FILE, stats, skip_github=skip_github)
+    """Get player stats from rankstats.json (defaults for unknown players - nothing is written)"""
+    player_stats = rankstats_store.get(str(user_id))
 
-    return stats[user_key]
+    if player_stats is None:
+        return get_new_player_stats()
+    if "playlist_stats" not in player_stats:
+        # Older entries without playlist_stats
+        return dict(player_stats, playlist_stats=get_default_playlist_stats(), highest_rank=1)
+    return player_stats
 
 def get_existing_player_stats(user_id: int) -> dict:
     """Get player stats ONLY if they already exist (don't create new entry)"""
-    stats = load_json_file(RANKSTATS_FILE)
-    user_key = str(user_id)
-    
-    if user_key in stats:
-        return stats[user_key]
-    return None
+    return rankstats_store.get(str(user_id))
+
+def get_player_mmr(user_id: int) -> int:
+    """Player MMR (1500 if unknown)"""
+    player_stats = rankstats_store.get(str(user_id))
+    if player_stats and 'mmr' in player_stats:
+        return player_stats['mmr']
+    return 1500
 
 def update_player_stats(user_id: int, stats_update: dict):
     """Update player stats - XP never goes below 0, recalculates highest_rank"""
-    stats = load_json_file(RANKSTATS_FILE)
-    user_key = str(user_id)
-
-    if user_key not in stats:
-        stats[user_key] = {
-            "xp": 0,
-            "wins": 0,
-            "losses": 0,
-            "series_wins": 0,
-            "series_losses": 0,
-            "total_games": 0,
-            "total_series": 0,
-            "mmr": 1500,
-            "playlist_stats": get_default_playlist_stats(),
-            "highest_rank": 1
-        }
-    elif "playlist_stats" not in stats[user_key]:
-        stats[user_key]["playlist_stats"] = get_default_playlist_stats()
-        stats[user_key]["highest_rank"] = 1
+    with rankstats_store.lock:
+        stats = rankstats_store.all()
+        user_key = str(user_id)
 
-    for key, value in stats_update.items():
-        if key in stats[user_key]:
-            stats[user_key][key] += value
-        else:
-            stats[user_key][key] = value
+        if user_key not in stats:
+            stats[user_key] = get_new_player_stats()
+        elif "playlist_stats" not in stats[user_key]:
+            stats[user_key]["playlist_stats"] = get_default_playlist_stats()
+            stats[user_key]["highest_rank"] = 1
 
-    # Ensure XP never goes below 0
-    stats[user_key]["xp"] = max(0, stats[user_key]["xp"])
+        for key, value in stats_update.items():
+            if key in stats[user_key]:
+                stats[user_key][key] += value
+            else:
+                stats[user_key][key] = value
 
-    # Recalculate highest rank after XP update
-    stats[user_key]["highest_rank"] = calculate_highest_rank(stats[user_key])
+        # Ensure XP never goes below 0
+        stats[user_key]["xp"] = max(0, stats[user_key]["xp"])
 
-    save_json_file(RANKSTATS_FILE, stats)
+        # Recalculate highest rank after XP update
+        stats[user_key]["highest_rank"] = calculate_highest_rank(stats[user_key])
+
+        rankstats_store.mark_dirty()
 
 
 def update_playlist_stats(user_id: int, playlist_type: str, stats_update: dict):
     """Update player stats for a specific playlist - XP never goes below 0"""
-    stats = load_json_file(RANKSTATS_FILE)
-    user_key = str(user_id)
-
-    # Initialize player if doesn't exist
-    if user_key not in stats:
-        stats[user_key] = {
-            "xp": 0,
-            "wins": 0,
-            "losses": 0,
-            "series_wins": 0,
-            "series_losses": 0,
-            "total_games": 0,
-            "total_series": 0,
-            "mmr": 1500,
-            "playlist_stats": get_default_playlist_stats(),
-            "highest_rank": 1
-        }
-    elif "playlist_stats" not in stats[user_key]:
-        stats[user_key]["playlist_stats"] = get_default_playlist_stats()
-        stats[user_key]["highest_rank"] = 1
-
-    # Ensure playlist exists in player's playlist_stats
-    if playlist_type not in stats[user_key]["playlist_stats"]:
-        stats[user_key]["playlist_stats"][playlist_type] = {
-            "xp": 0, "wins": 0, "losses": 0, "series_wins": 0, "series_losses": 0
-        }
+    with rankstats_store.lock:
+        stats = rankstats_store.all()
+        user_key = str(user_id)
 
-    playlist_stats = stats[user_key]["playlist_stats"][playlist_type]
+        # Initialize player if doesn't exist
+        if user_key not in stats:
+            stats[user_key] = get_new_player_stats()
+        elif "playlist_stats" not in stats[user_key]:
+            stats[user_key]["playlist_stats"] = get_default_playlist_stats()
+            stats[user_key]["highest_rank"] = 1
 
-    # Update playlist-specific stats
-    for key, value in stats_update.items():
-        if key in playlist_stats:
-            playlist_stats[key] += value
-        else:
-            playlist_stats[key] = value
+        # Ensure playlist exists in player's playlist_stats
+        if playlist_type not in stats[user_key]["playlist_stats"]:
+            stats[user_key]["playlist_stats"][playlist_type] = {
+                "xp": 0, "wins": 0, "losses": 0, "series_wins": 0, "series_losses": 0
+            }
 
-    # Ensure XP never goes below 0
-    playlist_stats["xp"] = max(0, playlist_stats["xp"])
+        playlist_stats = stats[user_key]["playlist_stats"][playlist_type]
 
-    # Also update global stats for backwards compatibility
-    for key in ["xp", "wins", "losses", "series_wins", "series_losses"]:
-        if key in stats_update:
-            if key in stats[user_key]:
-                stats[user_key][key] += stats_update[key]
+        # Update playlist-specific stats
+        for key, value in stats_update.items():
+            if key in playlist_stats:
+                playlist_stats[key] += value
             else:
-                stats[user_key][key] = stats_update[key]
-    stats[user_key]["xp"] = max(0, stats[user_key]["xp"])
-
-    # Increment global counters
-    if "wins" in stats_update or "losses" in stats_update:
-        stats[user_key]["total_games"] = stats[user_key].get("total_games", 0) + stats_update.get("wins", 0) + stats_update.get("losses", 0)
-    if "series_wins" in stats_update or "series_losses" in stats_update:
-        stats[user_key]["total_series"] = stats[user_key].get("total_series", 0) + stats_update.get("series_wins", 0) + stats_update.get("series_losses", 0)
+                playlist_stats[key] = value
+
+        # Ensure XP never goes below 0
+        playlist_stats["xp"] = max(0, playlist_stats["xp"])
+
+        # Also update global stats for backwards compatibility
+        for key in ["xp", "wins", "losses", "series_wins", "series_losses"]:
+            if key in stats_update:
+                if key in stats[user_key]:
+                    stats[user_key][key] += stats_update[key]
+                else:
+                    stats[user_key][key] = stats_update[key]
+        stats[user_key]["xp"] = max(0, stats[user_key]["xp"])
+
+        # Increment global counters
+        if "wins" in stats_update or "losses" in stats_update:
+            stats[user_key]["total_games"] = stats[user_key].get("total_games", 0) + stats_update.get("wins", 0) + stats_update.get("losses", 0)
+        if "series_wins" in stats_update or "series_losses" in stats_update:
+            stats[user_key]["total_series"] = stats[user_key].get("total_series", 0) + stats_update.get("series_wins", 0) + stats_update.get("series_losses", 0)
 
-    # Recalculate highest rank
-    stats[user_key]["highest_rank"] = calculate_highest_rank(stats[user_key])
+        # Recalculate highest rank
+        stats[user_key]["highest_rank"] = calculate_highest_rank(stats[user_key])
 
-    save_json_file(RANKSTATS_FILE, stats)
-    return stats[user_key]
+        rankstats_store.mark_dirty()
+        return stats[user_key]
 
 
 def calculate_playlist_rank(xp: int) -> int:
     """Calculate rank level (1-50) based on XP from config"""
-    thresholds = get_rank_thresholds()
-    for level in range(50, 0, -1):
-        min_xp, max_xp = thresholds[level]
-        if xp >= min_xp:
-            return level
-    return 1
+    return get_rank_table().rank(xp)
 
 
 def calculate_highest_rank(player_stats: dict) -> int:
@@ -308,6 +437,7 @@ def calculate_highest_rank(player_stats: dict) -> int:
     Returns the rank from whichever playlist they have the highest rank in.
     Falls back to calculating from global wins/losses if no playlist XP exists."""
     highest = 1
+    table = get_rank_table()
 
     # Check each playlist and find the highest rank
     playlist_stats = player_stats.get("playlist_stats", {})
@@ -316,7 +446,7 @@ def calculate_highest_rank(player_stats: dict) -> int:
         playlist_xp = pstats.get("xp", 0)
         if playlist_xp > 0:
             has_playlist_xp = True
-            rank = calculate_playlist_rank(playlist_xp)
+            rank = table.rank(playlist_xp)
             if rank > highest:
                 highest = rank
 
@@ -324,17 +454,14 @@ def calculate_highest_rank(player_stats: dict) -> int:
     if not has_playlist_xp:
         global_xp = player_stats.get("xp", 0)
         if global_xp > 0:
-            highest = calculate_playlist_rank(global_xp)
+            highest = table.rank(global_xp)
         else:
             # Calculate XP from wins/losses if XP is 0
-            config = get_xp_config()
-            win_xp = config.get("game_win", 50)
-            loss_xp = config.get("game_loss", 10)
             wins = player_stats.get("wins", 0)
             losses = player_stats.get("losses", 0)
-            estimated_xp = (wins * win_xp) + (losses * loss_xp)
+            estimated_xp = (wins * table.game_win) + (losses * table.game_loss)
             if estimated_xp > 0:
-                highest = calculate_playlist_rank(estimated_xp)
+                highest = table.rank(estimated_xp)
 
     return highest
 
@@ -368,27 +495,11 @@ def get_all_playlist_ranks(user_id: int) -> dict:
 
 def calculate_rank(xp: int) -> int:
     """Calculate rank level based on XP from config"""
-    thresholds = get_rank_thresholds()
-    for level in range(50, 0, -1):
-        min_xp, max_xp = thresholds[level]
-        if xp >= min_xp:
-            return level
-    return 1
+    return get_rank_table().rank(xp)
 
 def get_rank_progress(xp: int) -> Tuple[int, int, int]:
-    """Get current rank, XP in rank, and XP needed for next rank"""
-    rank = calculate_rank(xp)
-    if rank == 50:
-        return rank, xp, 0  # Max rank
-    
-    thresholds = get_rank_thresholds()
-    current_min, current_max = thresholds[rank]
-    next_min, next_max = thresholds[rank + 1]
-    
-    xp_in_rank = xp - current_min
-    xp_for_next = next_min - xp
-    
-    return rank, xp_in_rank, xp_for_next
+    """Get current rank, XP in rank, and XP needed for next rank (0 at max rank)"""
+    return get_rank_table().progress(xp)
 
 # Rank icon URLs (for DMs)
 RANK_ICON_BASE = "https://r2-cdn.insignia.live/h2-rank"
@@ -403,67 +514,91 @@ def get_rank_role_name(level: int) -> str:
 
 async def update_player_rank_role(guild: discord.Guild, user_id: int, new_level: int, send_dm: bool = True):
     """Update player's rank role with DM notification on rank change"""
+    # Current levels and Level roles come from the gateway-maintained cache
+    cache = rank_sync.get_role_cache(guild)
+
+    # Skip if player already has the correct rank - no changes needed
+    if cache.has_level(user_id, new_level):
+        return
+
     member = guild.get_member(user_id)
     if not member:
         return
 
-    # Check current level before making changes
-    old_level = None
-    for role in member.roles:
-        if role.name.startswith("Level "):
-            try:
-                old_level = int(role.name.replace("Level ", ""))
-                break
-            except ValueError:
-                pass
+    levels = cache.levels(member)
+    if levels == (new_level,):
+        return
+    old_level = levels[0] if levels else None
 
-    # Skip if player already has the correct rank - no changes needed
-    if old_level == new_level:
+    new_role = cache.roles.get(new_level)
+    if not new_role:
+        print(f"⚠️ Role '{get_rank_role_name(new_level)}' not found in guild")
         return
 
-    # Remove all level roles (1-50)
-    roles_to_remove = []
-    for role in member.roles:
-        if role.name.startswith("Level "):
-            roles_to_remove.append(role)
+    # Swap only the Level role - other roles the member holds are left alone
+    await rank_sync.apply_rank_change(rank_sync.RankChange(member, old_level, new_level, new_role),
+                                      reason=f"Reached {new_role.name}")
+
+    # Send DM notification if rank changed and send_dm is enabled
+    if send_dm and old_level is not None and old_level != new_level:
+        await send_rank_change_dm(member, old_level, new_level)
+
+async def send_rank_change_dm(member: discord.Member, old_level: int, new_level: int):
+    """DM a member about a rank up / derank"""
+    try:
+        embed = discord.Embed(color=discord.Color.blue())
+
+        # Add header image
+        embed.set_image(url="https://raw.githubusercontent.com/I2aMpAnT/H2CarnageReport.com/main/MessagefromCarnageReportHEADER.png")
+
+        if new_level > old_level:
+            # Level up
+            embed.set_thumbnail(url=get_rank_icon_url(new_level))
+            embed.description = f"Congratulations, you have ranked up to **Level {new_level}**!"
+            embed.color = discord.Color.green()
+        elif new_level < old_level:
+            # Derank
+            embed.set_thumbnail(url=get_rank_icon_url(new_level))
+            embed.description = f"Sorry, you have deranked to **Level {new_level}**."
+            embed.color = discord.Color.red()
+
+        await member.send(embed=embed)
+        print(f"Sent rank change DM to {member.name}: {old_level} -> {new_level}")
+    except discord.Forbidden:
+        print(f"Could not DM {member.name} - DMs disabled")
+    except Exception as e:
+        print(f"Error sending DM to {member.name}: {e}")
+
+async def notify_rank_change(change: rank_sync.RankChange):
+    """rank_sync on_change callback: DM members whose level changed (not ones getting their first Level role)"""
+    if change.old_level is not None and change.old_level != change.new_level:
+        await send_rank_change_dm(change.member, change.old_level, change.new_level)
+
+async def sync_highest_ranks(guild: discord.Guild, stats: dict, player_ids: List[int], send_dm: bool = True):
+    """
+    Recalculate highest_rank for the given players and sync their Level roles
+    in bulk (see rank_sync). Returns True if any stored highest_rank changed.
+    """
+    updated = False
+    targets = {}
+    for user_id in player_ids:
+        user_key = str(user_id)
+        player_stats = stats.get(user_key)
 
-    if roles_to_remove:
-        await member.remove_roles(*roles_to_remove, reason="Rank update")
+        if not player_stats:
+            continue  # Skip if no stats
 
-    # Add new level role
-    new_role_name = get_rank_role_name(new_level)
-    new_role = discord.utils.get(guild.roles, name=new_role_name)
-    
-    if new_role:
-        await member.add_roles(new_role, reason=f"Reached {new_role_name}")
+        # Always recalculate highest rank to ensure accuracy
+        highest = calculate_highest_rank(player_stats)
 
-        # Send DM notification if rank changed and send_dm is enabled
-        if send_dm and old_level is not None and old_level != new_level:
-            try:
-                embed = discord.Embed(color=discord.Color.blue())
-
-                # Add header image
-                embed.set_image(url="https://raw.githubusercontent.com/I2aMpAnT/H2CarnageReport.com/main/MessagefromCarnageReportHEADER.png")
-
-                if new_level > old_level:
-                    # Level up
-                    embed.set_thumbnail(url=get_rank_icon_url(new_level))
-                    embed.description = f"Congratulations, you have ranked up to **Level {new_level}**!"
-                    embed.color = discord.Color.green()
-                elif new_level < old_level:
-                    # Derank
-                    embed.set_thumbnail(url=get_rank_icon_url(new_level))
-                    embed.description = f"Sorry, you have deranked to **Level {new_level}**."
-                    embed.color = discord.Color.red()
-
-                await member.send(embed=embed)
-                print(f"Sent rank change DM to {member.name}: {old_level} -> {new_level}")
-            except discord.Forbidden:
-                print(f"Could not DM {member.name} - DMs disabled")
-            except Exception as e:
-                print(f"Error sending DM to {member.name}: {e}")
-    else:
-        print(f"⚠️ Role '{new_role_name}' not found in guild")
+        # Update stored highest_rank
+        if player_stats.get("highest_rank") != highest:
+            player_stats["highest_rank"] = highest
+            updated = True
+        targets[user_id] = highest
+
+    await rank_sync.sync_rank_roles(guild, targets, on_change=notify_rank_change if send_dm else None)
+    return updated
 
 def add_game_stats(match_number: int, game_number: int, map_name: str, gametype: str) -> bool:
     """Add game stats to gamestats.json with timestamp"""
@@ -530,7 +665,7 @@ async def record_manual_match(red_team: List[int], blue_team: List[int], games:
     for i, game in enumerate(games, 1):
         record_game_stat(game["map"], game["gametype"], game["winner"])
 
-    # Refresh ranks for all players from rankstats.json (populated by populate_stats.py)
+    # Refresh ranks for all players from rankstats.json
     all_players = red_team + blue_team
     await refresh_all_ranks(guild, all_players, send_dm=True)
 
@@ -541,86 +676,310 @@ async def refresh_all_ranks(guild: discord.Guild, player_ids: List[int], send_dm
     """Refresh rank roles for all players in a match - always recalculates highest_rank"""
     from searchmatchmaking import queue_state
 
-    # Load stats once
-    stats = load_json_file(RANKSTATS_FILE)
-    updated = False
+    stats = rankstats_store.all()
+    player_ids = [user_id for user_id in player_ids if user_id not in queue_state.guests]  # Skip guests
 
-    for user_id in player_ids:
-        if user_id in queue_state.guests:
-            continue  # Skip guests
+    # Save once at the end if anything changed
+    if await sync_highest_ranks(guild, stats, player_ids, send_dm=send_dm):
+        rankstats_store.mark_dirty(push=False)
 
-        user_key = str(user_id)
-        player_stats = stats.get(user_key)
 
-        if not player_stats:
-            continue  # Skip if no stats
+async def refresh_playlist_ranks(guild: discord.Guild, player_ids: List[int], playlist_type: str, send_dm: bool = True):
+    """Refresh rank roles for players after a playlist match - recalculates and saves highest_rank"""
+    stats = rankstats_store.all()
 
-        # Always recalculate highest rank to ensure accuracy
-        highest = calculate_highest_rank(player_stats)
+    # Save once at the end if anything changed
+    if await sync_highest_ranks(guild, stats, player_ids, send_dm=send_dm):
+        rankstats_store.mark_dirty(push=False)
 
-        # Update stored highest_rank
-        if stats[user_key].get("highest_rank") != highest:
-            stats[user_key]["highest_rank"] = highest
-            updated = True
+def get_refresh_trigger_ids(content: str, stats: dict) -> List[int]:
+    """
+    Player IDs to refresh for a populate_stats.py trigger message. populate_stats.py
+    picks them by comparing highest_rank in its ranks.json between runs; the
+    roles themselves are always recalculated from the bot's rankstats.json,
+    which is authoritative for Discord roles (a listed player whose rankstats
+    entry didn't change is a no-op). Since the two can disagree, populate_stats.py
+    also sends a bare trigger every FULL_RANK_REFRESH_HOURS; members already on
+    the right Level aren't touched, so that costs a plan over the member cache.
+
+      !refresh_ranks_trigger v=<version> ids=<id>,<id>  - the listed players
+      !refresh_ranks_trigger v=<version>                - the players in RANK_CHANGES_FILE,
+                                                          if it's from that run
+      !refresh_ranks_trigger                            - everyone in rankstats
+    """
+    fields = dict(token.split("=", 1) for token in content.split()[1:] if "=" in token)
+    if "ids" in fields:
+        return [int(uid) for uid in fields["ids"].split(",") if uid.isdigit()]
+    if "v" in fields:
+        try:
+            with open(RANK_CHANGES_FILE, 'r') as f:
+                changes = json.load(f)
+            if str(changes.get("version")) == fields["v"]:
+                return [int(uid) for uid in changes.get("changes", {}) if uid.isdigit()]
+            print(f"{RANK_CHANGES_FILE} is not from run {fields['v']} - refreshing everyone")
+        except:
+            print(f"Could not read {RANK_CHANGES_FILE} - refreshing everyone")
+    return [int(uid) for uid in stats.keys() if uid.isdigit()]
+
+LEADERBOARD_SORT_KEYS = ["rank", "wins", "series_wins", "mmr"]
+LEADERBOARD_PER_PAGE = 10
+# Rendered leaderboard pages kept (oldest dropped first)
+LEADERBOARD_PAGE_CACHE_SIZE = 64
+
+PLAYLIST_DISPLAY_NAMES = {
+    "mlg_4v4": "MLG 4v4",
+    "team_hardcore": "Team Hardcore",
+    "double_team": "Double Team",
+    "head_to_head": "Head to Head"
+}
 
-        await update_player_rank_role(guild, user_id, highest, send_dm=send_dm)
+class LeaderboardIndex:
+    """
+    Sorted leaderboards built from RankStatsStore, one ordering per
+    (sort key, playlist), so a page is a slice instead of a rank calculation
+    and sort over every player. Orderings are built on first use and thrown
+    away when the store's version changes (a change by the bot or a reload).
+    """
 
-    # Save once at the end if anything changed
-    if updated:
-        save_json_file(RANKSTATS_FILE, stats, skip_github=True)
+    def __init__(self, store: RankStatsStore):
+        self.store = store
+        self.version = None
+        self.orderings = {}  # {(sort_by, playlist): [(user_id, row stats), ...]}
+
+    def ordering(self, sort_by: str = "rank", playlist: Optional[str] = None) -> List[Tuple[str, dict]]:
+        """All players in leaderboard order (shared list - don't modify)"""
+        with self.store.lock:
+            stats = self.store.all()
+            if self.version != self.store.version:
+                self.version = self.store.version
+                self.orderings = {}
+            key = (sort_by, playlist)
+            if key not in self.orderings:
+                self.orderings[key] = self._build(stats, sort_by, playlist)
+            return self.orderings[key]
+
+    def page(self, sort_by: str, page: int, playlist: Optional[str] = None,
+             per_page: int = LEADERBOARD_PER_PAGE) -> Tuple[List[Tuple[str, dict]], int, int, int]:
+        """
+        Returns:
+            (rows on the page, page clamped to 1..total_pages, total_pages, total players)
+        """
+        players = self.ordering(sort_by, playlist)
+        total_pages = max(1, math.ceil(len(players) / per_page))
+        page = max(1, min(page, total_pages))
+        start_idx = (page - 1) * per_page
+        return players[start_idx:start_idx + per_page], page, total_pages, len(players)
+
+    @staticmethod
+    def _build(stats: dict, sort_by: str, playlist: Optional[str]) -> List[Tuple[str, dict]]:
+        players = []
+        for user_id, player_stats in stats.items():
+            if playlist is None:
+                # Copy - the store's dicts are written back to rankstats.json
+                players.append((user_id, dict(player_stats, rank=calculate_rank(player_stats["xp"]))))
+                continue
+            pstats = player_stats.get("playlist_stats", {}).get(playlist)
+            if not pstats or not (pstats.get("xp", 0) or pstats.get("wins", 0) or pstats.get("losses", 0)):
+                continue
+            wins = pstats.get("wins", 0)
+            losses = pstats.get("losses", 0)
+            players.append((user_id, {
+                "rank": calculate_playlist_rank(pstats.get("xp", 0)),
+                "xp": pstats.get("xp", 0),
+                "wins": wins,
+                "losses": losses,
+                "total_games": wins + losses,
+                "series_wins": pstats.get("series_wins", 0),
+                "series_losses": pstats.get("series_losses", 0),
+                "mmr": player_stats.get("mmr", 1500)
+            }))
+
+        # Sort based on criteria
+        if sort_by == "rank":
+            players.sort(key=lambda x: (x[1]["rank"], x[1]["xp"]), reverse=True)
+        elif sort_by == "wins":
+            players.sort(key=lambda x: x[1]["wins"], reverse=True)
+        elif sort_by == "series_wins":
+            players.sort(key=lambda x: x[1]["series_wins"], reverse=True)
+        elif sort_by == "mmr":
+            players.sort(key=lambda x: x[1].get("mmr", 1500), reverse=True)
+        return players
+
+
+leaderboard_index = LeaderboardIndex(rankstats_store)
+# {(sort_by, playlist, page, data version): (embed, total_pages)}
+leaderboard_page_cache = OrderedDict()
+
+def get_all_players_sorted(sort_by: str = "rank", playlist: Optional[str] = None) -> List[Tuple[str, dict]]:
+    """Get all players sorted by specified criteria (optionally by one playlist's stats)"""
+    return leaderboard_index.ordering(sort_by, playlist)
+
+async def render_leaderboard_page(bot, sort_by: str, page: int, playlist: Optional[str] = None) -> Tuple[discord.Embed, int, int]:
+    """
+    Leaderboard embed for a page, cached per (sort key, playlist, page, data version).
 
+    Returns:
+        (embed, page clamped to the valid range, total_pages)
+    """
+    page_players, page, total_pages, total_players = leaderboard_index.page(sort_by, page, playlist)
+    cache_key = (sort_by, playlist, page, leaderboard_index.version)
+    cached = leaderboard_page_cache.get(cache_key)
+    if cached:
+        leaderboard_page_cache.move_to_end(cache_key)
+        return cached[0], page, cached[1]
+
+    description = f"Sorted by: **{sort_by.replace('_', ' ').title()}**"
+    if playlist:
+        description += f" • {PLAYLIST_DISPLAY_NAMES.get(playlist, playlist)}"
+    embed = discord.Embed(
+        title="🏆 Halo 2 Matchmaking Leaderboard",
+        description=description,
+        color=discord.Color.from_rgb(0, 112, 192)
+    )
 
-async def refresh_playlist_ranks(guild: discord.Guild, player_ids: List[int], playlist_type: str, send_dm: bool = True):
-    """Refresh rank roles for players after a playlist match - recalculates and saves highest_rank"""
-    # Load stats once
-    stats = load_json_file(RANKSTATS_FILE)
-    updated = False
+    # Add players
+    start_idx = (page - 1) * LEADERBOARD_PER_PAGE
+    leaderboard_text = ""
+    for i, (user_id, stats) in enumerate(page_players, start=start_idx + 1):
+        user = bot.get_user(int(user_id))
+        if user is None:
+            try:
+                user = await bot.fetch_user(int(user_id))
+            except:
+                user = None
+        name = user.name if user else f"User {user_id}"
+
+        rank = stats["rank"]
+        xp = stats["xp"]
+        wins = stats["wins"]
+        losses = stats["losses"]
+        mmr = stats.get("mmr", 1500)
+        win_rate = (wins / stats["total_games"] * 100) if stats["total_games"] > 0 else 0
+
+        if sort_by == "rank":
+            leaderboard_text += f"`{i}.` **{name}** - Level {rank} ({xp} XP)\n"
+        elif sort_by == "wins":
+            leaderboard_text += f"`{i}.` **{name}** - {wins}W / {losses}L ({win_rate:.1f}%)\n"
+        elif sort_by == "series_wins":
+            leaderboard_text += f"`{i}.` **{name}** - {stats['series_wins']}W / {stats['series_losses']}L (Series)\n"
+        elif sort_by == "mmr":
+            leaderboard_text += f"`{i}.` **{name}** - MMR: {mmr}\n"
+
+    embed.description += f"\n\n{leaderboard_text}"
+    embed.set_footer(text=f"Page {page}/{total_pages} • {total_players} total players")
+
+    # The store may have changed while names were fetched (the index only
+    # notices on its next ordering() call) - only cache if it didn't
+    if cache_key[3] == rankstats_store.version:
+        leaderboard_page_cache[cache_key] = (embed, total_pages)
+        while len(leaderboard_page_cache) > LEADERBOARD_PAGE_CACHE_SIZE:
+            leaderboard_page_cache.popitem(last=False)
+    return embed, page, total_pages
 
-    for user_id in player_ids:
-        user_key = str(user_id)
-        player_stats = stats.get(user_key)
+class StatsCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.ipc_server = None
+        self.last_published_status = None  # populate_stats.py's last run summary
+        self.refresh_tasks = set()  # background rank refreshes started over IPC
 
-        if not player_stats:
-            continue  # Skip if no stats
+    async def cog_load(self):
+        # Local control channel for populate_stats.py (see bot_ipc.py)
+        try:
+            self.ipc_server = await bot_ipc.start_ipc_server({
+                "refresh-ranks": self.ipc_refresh_ranks,
+                "reload-stats": self.ipc_reload_stats,
+                "publish-status": self.ipc_publish_status,
+                "status": self.ipc_status,
+            })
+        except OSError as e:
+            print(f"[IPC] Could not start control socket: {e}")
+
+    async def cog_unload(self):
+        if self.ipc_server is not None:
+            self.ipc_server.close()
+            self.ipc_server = None
+        for task in list(self.refresh_tasks):
+            task.cancel()
+
+    async def ipc_refresh_ranks(self, ids: Optional[List[str]] = None):
+        """Refresh rank roles for the given players (everyone if ids is None) in the background"""
+        channel = self.bot.get_channel(REFRESH_TRIGGER_CHANNEL_ID)
+        if channel is None:
+            raise RuntimeError("Bot is not connected to the server yet")
+        if ids is None:
+            player_ids = [int(uid) for uid in rankstats_store.all().keys() if uid.isdigit()]
+        else:
+            player_ids = [int(uid) for uid in ids if str(uid).isdigit()]
+        print(f"[IPC] Refreshing ranks for {len(player_ids)} player(s)")
 
-        # Recalculate highest rank
-        highest = calculate_highest_rank(player_stats)
+        async def refresh():
+            try:
+                await refresh_all_ranks(channel.guild, player_ids, send_dm=False)
+                print("[IPC] Rank refresh completed successfully")
+            except Exception as e:
+                print(f"[IPC] Error during rank refresh: {e}")
+
+        # The event loop only keeps a weak reference to tasks - hold on to it until it finishes
+        task = asyncio.create_task(refresh())
+        self.refresh_tasks.add(task)
+        task.add_done_callback(self.refresh_tasks.discard)
+        return {"queued": len(player_ids)}
+
+    async def ipc_reload_stats(self):
+        """Reload rankstats.json from disk"""
+        stats = rankstats_store.reload()
+        return {"players": len(stats), "version": rankstats_store.version}
+
+    async def ipc_publish_status(self, **status):
+        """Keep populate_stats.py's summary of its last run (shown by the status command)"""
+        self.last_published_status = dict(status, received_at=datetime.now().isoformat())
+        print(f"[IPC] populate_stats.py status: {status}")
+        return {"received": True}
+
+    async def ipc_status(self):
+        import github_webhook
+        return {
+            "populate_stats": self.last_published_status,
+            "rankstats_players": len(rankstats_store.all()),
+            "rankstats_version": rankstats_store.version,
+            "push_queue": github_webhook.get_push_queue_stats(),
+        }
 
-        # Update stored highest_rank
-        if stats[user_key].get("highest_rank") != highest:
-            stats[user_key]["highest_rank"] = highest
-            updated = True
+    # Keep rank_sync's level/role cache current from the gateway
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            rank_sync.get_role_cache(guild, reseed=True)
 
-        await update_player_rank_role(guild, user_id, highest, send_dm=send_dm)
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        rank_sync.get_role_cache(guild, reseed=True)
 
-    # Save once at the end if anything changed
-    if updated:
-        save_json_file(RANKSTATS_FILE, stats, skip_github=True)
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            rank_sync.member_updated(after)
 
-def get_all_players_sorted(sort_by: str = "rank") -> List[Tuple[str, dict]]:
-    """Get all players sorted by specified criteria"""
-    stats = load_json_file(RANKSTATS_FILE)
-    
-    players = []
-    for user_id, player_stats in stats.items():
-        player_stats["rank"] = calculate_rank(player_stats["xp"])
-        players.append((user_id, player_stats))
-    
-    # Sort based on criteria
-    if sort_by == "rank":
-        players.sort(key=lambda x: (x[1]["rank"], x[1]["xp"]), reverse=True)
-    elif sort_by == "wins":
-        players.sort(key=lambda x: x[1]["wins"], reverse=True)
-    elif sort_by == "series_wins":
-        players.sort(key=lambda x: x[1]["series_wins"], reverse=True)
-    elif sort_by == "mmr":
-        players.sort(key=lambda x: x[1].get("mmr", 1500), reverse=True)
-    
-    return players
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        rank_sync.member_updated(member)
 
-class StatsCommands(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        rank_sync.member_removed(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        rank_sync.role_changed(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        rank_sync.role_changed(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        rank_sync.role_changed(before, after)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -634,14 +993,14 @@ class StatsCommands(commands.Cog):
             return
 
         # Check for trigger message
-        if message.content == "!refresh_ranks_trigger":
+        if message.content.split(" ", 1)[0] == REFRESH_TRIGGER:
             print("Received rank refresh trigger from populate_stats.py")
             try:
-                # Get all players from rankstats
-                stats = load_json_file(RANKSTATS_FILE)
-                player_ids = [int(uid) for uid in stats.keys() if uid.isdigit()]
+                # Only the players populate_stats.py reported (levels still come from rankstats.json)
+                stats = rankstats_store.all()
+                player_ids = get_refresh_trigger_ids(message.content, stats)
+                print(f"Refreshing ranks for {len(player_ids)} player(s)")
 
-                # Refresh all ranks
                 await refresh_all_ranks(message.guild, player_ids, send_dm=False)
 
                 # Delete the trigger message
@@ -770,12 +1129,7 @@ class StatsCommands(commands.Cog):
         embed.add_field(name="\u200b", value="\u200b", inline=False)  # Spacer
 
         # Per-Playlist Ranks section
-        playlist_names = {
-            "mlg_4v4": "MLG 4v4",
-            "team_hardcore": "Team Hardcore",
-            "double_team": "Double Team",
-            "head_to_head": "Head to Head"
-        }
+        playlist_names = PLAYLIST_DISPLAY_NAMES
 
         # Get playlist-specific stats for display
         playlist_stats = player_stats.get("playlist_stats", {})
@@ -854,9 +1208,7 @@ class StatsCommands(commands.Cog):
         await update_player_rank_role(interaction.guild, interaction.user.id, highest, send_dm=True)
 
         # Update local stats to match GitHub
-        local_stats = load_json_file(RANKSTATS_FILE)
-        local_stats[user_id_str] = player_stats
-        save_json_file(RANKSTATS_FILE, local_stats, skip_github=True)
+        rankstats_store.set(user_id_str, player_stats, push=False)
 
         # Get per-playlist ranks for display
         playlist_stats = player_stats.get("playlist_stats", {})
@@ -874,15 +1226,8 @@ class StatsCommands(commands.Cog):
         )
         print(f"[VERIFY] {interaction.user.name} verified rank: Level {highest}")
     
-    @app_commands.command(name="verifystatsall", description="[ADMIN] Refresh all players' rank roles")
-    @has_admin_role()
-    async def verifystatsall(self, interaction: discord.Interaction):
-        """Refresh all ranks (Admin only) - pulls from GitHub (source of truth)"""
-        await interaction.response.send_message(
-            "🔄 Pulling ranks from GitHub and syncing... This may take a while.",
-            ephemeral=True
-        )
-
+    async def sync_ranks_from_github(self, interaction: discord.Interaction, send_dm: bool, dry_run: bool, label: str):
+        """Shared body of /verifystatsall and /silentverify"""
         import github_webhook
 
         guild = interaction.guild
@@ -897,166 +1242,85 @@ class StatsCommands(commands.Cog):
             )
             return
 
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        not_found_count = 0
-
+        # Use highest_rank from GitHub, fall back to calculating
+        targets = {}
         for user_id_str, player_stats in stats.items():
-            try:
-                user_id = int(user_id_str)
-                member = guild.get_member(user_id)
-
-                # Try to fetch if not in cache
-                if not member:
-                    try:
-                        member = await guild.fetch_member(user_id)
-                    except (discord.NotFound, discord.HTTPException):
-                        not_found_count += 1
-                        continue
-
-                if not member:
-                    not_found_count += 1
-                    continue
-
-                # Get current Discord rank
-                current_rank = None
-                for role in member.roles:
-                    if role.name.startswith("Level "):
-                        try:
-                            current_rank = int(role.name.replace("Level ", ""))
-                            break
-                        except:
-                            pass
-
-                # Use highest_rank from GitHub, fall back to calculating
-                highest = player_stats.get("highest_rank")
-                if highest is None or highest < 1:
-                    highest = calculate_highest_rank(player_stats)
-                    print(f"  [DEBUG] {member.display_name}: highest_rank missing, calculated {highest} from stats: xp={player_stats.get('xp')}, wins={player_stats.get('wins')}")
-
-                # Skip if already correct
-                if current_rank == highest:
-                    skipped_count += 1
-                    continue
-
-                print(f"  [SYNC] {member.display_name}: Discord={current_rank}, GitHub highest_rank={highest}")
-                await update_player_rank_role(guild, user_id, highest, send_dm=True)
-                updated_count += 1
-                print(f"  Updated {member.display_name}: Level {current_rank} → Level {highest}")
-
-                # Small delay to avoid rate limits
-                await asyncio.sleep(0.3)
+            if not user_id_str.isdigit():
+                continue
+            highest = player_stats.get("highest_rank")
+            if highest is None or highest < 1:
+                highest = calculate_highest_rank(player_stats)
+            targets[int(user_id_str)] = highest
+
+        progress_message = None
+
+        async def report_progress(done: int, total: int):
+            nonlocal progress_message
+            text = f"🔄 {label}: {done}/{total} rank roles updated..."
+            if progress_message is None:
+                progress_message = await interaction.followup.send(text, ephemeral=True, wait=True)
+            else:
+                await progress_message.edit(content=text)
 
-            except Exception as e:
-                print(f"❌ Error updating user {user_id_str}: {e}")
-                error_count += 1
+        plan, result = await rank_sync.sync_rank_roles(
+            guild, targets,
+            on_change=notify_rank_change if send_dm else None,
+            progress=report_progress,
+            dry_run=dry_run
+        )
+
+        if dry_run:
+            preview = "\n".join(
+                f"• {change.member.display_name}: Level {change.old_level} → Level {change.new_level}"
+                for change in plan.changes[:20]
+            )
+            if len(plan.changes) > 20:
+                preview += f"\n… and {len(plan.changes) - 20} more"
+            await interaction.followup.send(
+                f"📝 {label} dry run - nothing was changed\n"
+                f"**Would update:** {len(plan.changes)}\n"
+                f"**Already correct:** {plan.unchanged}\n"
+                f"**Not in server:** {len(plan.not_found)}\n\n{preview}",
+                ephemeral=True
+            )
+            return
 
         # Update local stats to match GitHub
-        save_json_file(RANKSTATS_FILE, stats, skip_github=True)
+        rankstats_store.replace_all(stats)
 
         # Summary
         await interaction.followup.send(
-            f"✅ Rank sync complete!\n"
-            f"**Updated:** {updated_count}\n"
-            f"**Already correct:** {skipped_count}\n"
-            f"**Not in server:** {not_found_count}\n"
-            f"**Errors:** {error_count}",
+            f"✅ {label} complete!\n"
+            f"**Updated:** {result['applied']}\n"
+            f"**Already correct:** {plan.unchanged}\n"
+            f"**Not in server:** {len(plan.not_found)}\n"
+            f"**Errors:** {result['failed']}\n"
+            f"(took {result['seconds']}s)",
             ephemeral=True
         )
-        print(f"[VERIFY ALL] Synced {updated_count} ranks, skipped {skipped_count}, not found {not_found_count}, {error_count} errors")
+        print(f"[{label.upper()}] Synced {result['applied']} ranks, skipped {plan.unchanged}, not found {len(plan.not_found)}, {result['failed']} errors")
 
-    @app_commands.command(name="silentverify", description="[ADMIN] Sync all ranks silently (no DMs)")
+    @app_commands.command(name="verifystatsall", description="[ADMIN] Refresh all players' rank roles")
     @has_admin_role()
-    async def silentverify(self, interaction: discord.Interaction):
-        """Refresh all ranks silently (Admin only) - NO DMs sent"""
+    @app_commands.describe(dry_run="Only show what would change")
+    async def verifystatsall(self, interaction: discord.Interaction, dry_run: bool = False):
+        """Refresh all ranks (Admin only) - pulls from GitHub (source of truth)"""
         await interaction.response.send_message(
-            "🔄 Silently syncing ranks from GitHub... (no DMs will be sent)",
+            "🔄 Pulling ranks from GitHub and syncing...",
             ephemeral=True
         )
+        await self.sync_ranks_from_github(interaction, send_dm=True, dry_run=dry_run, label="Rank sync")
 
-        import github_webhook
-
-        guild = interaction.guild
-
-        # Pull latest stats from GitHub (source of truth) - use async version
-        stats = await github_webhook.async_pull_rankstats_from_github()
-
-        if not stats:
-            await interaction.followup.send(
-                "❌ Could not pull stats from GitHub. Please try again later.",
-                ephemeral=True
-            )
-            return
-
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        not_found_count = 0
-
-        for user_id_str, player_stats in stats.items():
-            try:
-                user_id = int(user_id_str)
-                member = guild.get_member(user_id)
-
-                # Try to fetch if not in cache
-                if not member:
-                    try:
-                        member = await guild.fetch_member(user_id)
-                    except (discord.NotFound, discord.HTTPException):
-                        not_found_count += 1
-                        continue
-
-                if not member:
-                    not_found_count += 1
-                    continue
-
-                # Get current Discord rank
-                current_rank = None
-                for role in member.roles:
-                    if role.name.startswith("Level "):
-                        try:
-                            current_rank = int(role.name.replace("Level ", ""))
-                            break
-                        except:
-                            pass
-
-                # Use highest_rank from GitHub, fall back to calculating
-                highest = player_stats.get("highest_rank")
-                if highest is None or highest < 1:
-                    highest = calculate_highest_rank(player_stats)
-                    print(f"  [DEBUG] {member.display_name}: highest_rank missing, calculated {highest} from stats: xp={player_stats.get('xp')}, wins={player_stats.get('wins')}")
-
-                # Skip if already correct
-                if current_rank == highest:
-                    skipped_count += 1
-                    continue
-
-                print(f"  [SILENT SYNC] {member.display_name}: Discord={current_rank}, GitHub highest_rank={highest}")
-                await update_player_rank_role(guild, user_id, highest, send_dm=False)
-                updated_count += 1
-                print(f"  [SILENT] Updated {member.display_name}: Level {current_rank} → Level {highest}")
-
-                # Small delay to avoid rate limits
-                await asyncio.sleep(0.3)
-
-            except Exception as e:
-                print(f"❌ Error updating user {user_id_str}: {e}")
-                error_count += 1
-
-        # Update local stats to match GitHub
-        save_json_file(RANKSTATS_FILE, stats, skip_github=True)
-
-        # Summary
-        await interaction.followup.send(
-            f"✅ Silent rank sync complete!\n"
-            f"**Updated:** {updated_count}\n"
-            f"**Already correct:** {skipped_count}\n"
-            f"**Not in server:** {not_found_count}\n"
-            f"**Errors:** {error_count}",
+    @app_commands.command(name="silentverify", description="[ADMIN] Sync all ranks silently (no DMs)")
+    @has_admin_role()
+    @app_commands.describe(dry_run="Only show what would change")
+    async def silentverify(self, interaction: discord.Interaction, dry_run: bool = False):
+        """Refresh all ranks silently (Admin only) - NO DMs sent"""
+        await interaction.response.send_message(
+            "🔄 Silently syncing ranks from GitHub... (no DMs will be sent)",
             ephemeral=True
         )
-        print(f"[SILENT VERIFY] Synced {updated_count} ranks, skipped {skipped_count}, not found {not_found_count}, {error_count} errors")
+        await self.sync_ranks_from_github(interaction, send_dm=False, dry_run=dry_run, label="Silent rank sync")
 
     @app_commands.command(name="mmr", description="[ADMIN] Set a player's MMR")
     @has_admin_role()
@@ -1075,26 +1339,27 @@ class StatsCommands(commands.Cog):
             return
         
         # Get player stats
-        stats = load_json_file(RANKSTATS_FILE)
-        user_key = str(player.id)
-        
-        # Initialize if doesn't exist
-        if user_key not in stats:
-            stats[user_key] = {
-                "xp": 0,
-                "wins": 0,
-                "losses": 0,
-                "series_wins": 0,
-                "series_losses": 0,
-                "total_games": 0,
-                "total_series": 0,
-                "mmr": value
-            }
-        else:
-            stats[user_key]["mmr"] = value
-        
-        # Save
-        save_json_file(RANKSTATS_FILE, stats)
+        with rankstats_store.lock:
+            stats = rankstats_store.all()
+            user_key = str(player.id)
+
+            # Initialize if doesn't exist
+            if user_key not in stats:
+                stats[user_key] = {
+                    "xp": 0,
+                    "wins": 0,
+                    "losses": 0,
+                    "series_wins": 0,
+                    "series_losses": 0,
+                    "total_games": 0,
+                    "total_series": 0,
+                    "mmr": value
+                }
+            else:
+                stats[user_key]["mmr"] = value
+
+            # Save
+            rankstats_store.mark_dirty()
         
         await interaction.response.send_message(
             f"✅ Set {player.mention}'s MMR to **{value}**",
@@ -1105,81 +1370,41 @@ class StatsCommands(commands.Cog):
     @app_commands.command(name="leaderboard", description="View the matchmaking leaderboard")
     @app_commands.describe(
         sort_by="How to sort the leaderboard",
-        page="Page number to view"
+        page="Page number to view",
+        playlist="Rank by one playlist's stats (optional)"
     )
     @app_commands.choices(sort_by=[
         app_commands.Choice(name="Rank (Default)", value="rank"),
         app_commands.Choice(name="Wins/Losses", value="wins"),
         app_commands.Choice(name="Series Wins/Losses", value="series_wins"),
         app_commands.Choice(name="MMR", value="mmr")
+    ], playlist=[
+        app_commands.Choice(name=name, value=ptype) for ptype, name in PLAYLIST_DISPLAY_NAMES.items()
     ])
-    async def leaderboard(self, interaction: discord.Interaction, sort_by: str = "rank", page: int = 1):
+    async def leaderboard(self, interaction: discord.Interaction, sort_by: str = "rank", page: int = 1,
+                          playlist: str = None):
         """Show leaderboard"""
-        # Get all players sorted
-        players = get_all_players_sorted(sort_by)
-        
-        if not players:
+        if not get_all_players_sorted(sort_by, playlist):
             await interaction.response.send_message("No players have stats yet!", ephemeral=True)
             return
-        
-        # Pagination
-        per_page = 10
-        total_pages = math.ceil(len(players) / per_page)
-        page = max(1, min(page, total_pages))
-        
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        page_players = players[start_idx:end_idx]
-        
-        # Create embed
-        embed = discord.Embed(
-            title="🏆 Halo 2 Matchmaking Leaderboard",
-            description=f"Sorted by: **{sort_by.replace('_', ' ').title()}**",
-            color=discord.Color.from_rgb(0, 112, 192)
-        )
-        
-        # Add players
-        leaderboard_text = ""
-        for i, (user_id, stats) in enumerate(page_players, start=start_idx + 1):
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                name = user.name
-            except:
-                name = f"User {user_id}"
-            
-            rank = stats["rank"]
-            xp = stats["xp"]
-            wins = stats["wins"]
-            losses = stats["losses"]
-            mmr = stats.get("mmr", 1500)
-            win_rate = (wins / stats["total_games"] * 100) if stats["total_games"] > 0 else 0
-            
-            if sort_by == "rank":
-                leaderboard_text += f"`{i}.` **{name}** - Level {rank} ({xp} XP)\n"
-            elif sort_by == "wins":
-                leaderboard_text += f"`{i}.` **{name}** - {wins}W / {losses}L ({win_rate:.1f}%)\n"
-            elif sort_by == "series_wins":
-                leaderboard_text += f"`{i}.` **{name}** - {stats['series_wins']}W / {stats['series_losses']}L (Series)\n"
-            elif sort_by == "mmr":
-                leaderboard_text += f"`{i}.` **{name}** - MMR: {mmr}\n"
-        
-        embed.description += f"\n\n{leaderboard_text}"
-        embed.set_footer(text=f"Page {page}/{total_pages} • {len(players)} total players")
-        
+
+        embed, page, total_pages = await render_leaderboard_page(self.bot, sort_by, page, playlist)
+
         # Add navigation buttons if needed
         if total_pages > 1:
-            view = LeaderboardView(sort_by, page, total_pages, self.bot)
+            view = LeaderboardView(sort_by, page, total_pages, self.bot, playlist)
             await interaction.response.send_message(embed=embed, view=view)
         else:
             await interaction.response.send_message(embed=embed)
 
 class LeaderboardView(discord.ui.View):
-    def __init__(self, sort_by: str, current_page: int, total_pages: int, bot):
+    def __init__(self, sort_by: str, current_page: int, total_pages: int, bot, playlist: str = None):
         super().__init__(timeout=300)
         self.sort_by = sort_by
         self.current_page = current_page
         self.total_pages = total_pages
         self.bot = bot
+        self.playlist = playlist
         
         # Disable buttons if needed
         if current_page <= 1:
@@ -1198,49 +1423,7 @@ class LeaderboardView(discord.ui.View):
         await self.update_leaderboard(interaction, new_page)
     
     async def update_leaderboard(self, interaction: discord.Interaction, page: int):
-        # Get all players sorted
-        players = get_all_players_sorted(self.sort_by)
-        
-        # Pagination
-        per_page = 10
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        page_players = players[start_idx:end_idx]
-        
-        # Create embed
-        embed = discord.Embed(
-            title="🏆 Halo 2 Matchmaking Leaderboard",
-            description=f"Sorted by: **{self.sort_by.replace('_', ' ').title()}**",
-            color=discord.Color.from_rgb(0, 112, 192)
-        )
-        
-        # Add players
-        leaderboard_text = ""
-        for i, (user_id, stats) in enumerate(page_players, start=start_idx + 1):
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                name = user.name
-            except:
-                name = f"User {user_id}"
-            
-            rank = stats["rank"]
-            xp = stats["xp"]
-            wins = stats["wins"]
-            losses = stats["losses"]
-            mmr = stats.get("mmr", 1500)
-            win_rate = (wins / stats["total_games"] * 100) if stats["total_games"] > 0 else 0
-            
-            if self.sort_by == "rank":
-                leaderboard_text += f"`{i}.` **{name}** - Level {rank} ({xp} XP)\n"
-            elif self.sort_by == "wins":
-                leaderboard_text += f"`{i}.` **{name}** - {wins}W / {losses}L ({win_rate:.1f}%)\n"
-            elif self.sort_by == "series_wins":
-                leaderboard_text += f"`{i}.` **{name}** - {stats['series_wins']}W / {stats['series_losses']}L (Series)\n"
-            elif self.sort_by == "mmr":
-                leaderboard_text += f"`{i}.` **{name}** - MMR: {mmr}\n"
-        
-        embed.description += f"\n\n{leaderboard_text}"
-        embed.set_footer(text=f"Page {page}/{self.total_pages} • {len(players)} total players")
+        embed, page, self.total_pages = await render_leaderboard_page(self.bot, self.sort_by, page, self.playlist)
         
         # Update view
         self.current_page = page
@@ -1267,6 +1450,7 @@ __all__ = [
     'refresh_playlist_ranks',
     'get_player_stats',
     'get_existing_player_stats',
+    'get_player_mmr',
     'calculate_rank',
     'calculate_playlist_rank',
     'calculate_highest_rank',
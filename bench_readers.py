@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare the workbook reader engines used by populate_stats.py.
+
+For every game/identity workbook it reads the file with each engine, checks the
+parsed output is the same, and reports per-file read time plus the one-off cost
+of importing pandas (measured in a fresh interpreter).
+
+Usage:
+    python bench_readers.py [stats_dir] [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import populate_stats
+import xlsx_reader
+
+
+def time_import(module):
+    """Seconds a fresh interpreter needs to import a module."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip())
+
+
+def read_file(engine, file_path):
+    """Read one workbook with an engine and return {sheet: (columns, rows)} for comparison."""
+    reader = populate_stats.get_reader_engine(engine)
+    if '_identity' in os.path.basename(file_path):
+        sheets = {'first': reader['first_sheet'](file_path)}
+    else:
+        sheets = reader['workbook'](file_path)
+    return {name: (sheet.columns, [list(row) for row in sheet.rows]) for name, sheet in sheets.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workbook reader engines.")
+    parser.add_argument('stats_dir', nargs='?', default=populate_stats.STATS_DIR)
+    parser.add_argument('--repeat', type=int, default=5, help="reads per file per engine (default: 5)")
+    args = parser.parse_args()
+
+    files = sorted(os.path.join(args.stats_dir, f) for f in os.listdir(args.stats_dir) if f.endswith('.xlsx'))
+    if not files:
+        print(f"No .xlsx files in {args.stats_dir}")
+        return 1
+
+    engines = sorted(populate_stats.READER_ENGINES)
+    totals = {engine: 0.0 for engine in engines}
+    mismatches = 0
+
+    print(f"{'file':<40}" + ''.join(f"{engine:>12}" for engine in engines))
+    for file_path in files:
+        outputs = {}
+        line = f"{os.path.basename(file_path):<40}"
+        for engine in engines:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                outputs[engine] = read_file(engine, file_path)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            totals[engine] += elapsed
+            line += f"{elapsed * 1000:>10.2f}ms"
+        if any(outputs[engine] != outputs[engines[0]] for engine in engines[1:]):
+            mismatches += 1
+            line += "  MISMATCH"
+        print(line)
+
+    print("-" * (40 + 12 * len(engines)))
+    print(f"{'total per pass':<40}" + ''.join(f"{totals[engine] * 1000:>10.2f}ms" for engine in engines))
+
+    pandas_import = time_import('pandas')
+    stream_import = time_import('xlsx_reader')
+    if pandas_import is not None:
+        print(f"\nimport pandas:      {pandas_import * 1000:.1f}ms (paid once per process by the pandas engine)")
+    if stream_import is not None:
+        print(f"import xlsx_reader: {stream_import * 1000:.1f}ms")
+
+    if mismatches:
+        print(f"\n{mismatches} file(s) read differently between engines")
+        return 1
+    print(f"\nAll {len(files)} file(s) read identically by: {', '.join(engines)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
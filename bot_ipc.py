@@ -0,0 +1,144 @@
+"""
+bot_ipc.py - Local control channel between populate_stats.py and the bot
+
+The STATSRANKS cog listens on a Unix socket (IPC_SOCKET_PATH) for commands
+from processes on the same machine, so a trigger is a local round trip
+instead of a Discord webhook message parsed by on_message.
+
+Protocol: one JSON object per line each way.
+
+    -> {"command": "refresh-ranks", "args": {"ids": ["123", "456"]}}
+    <- {"ok": true, "result": {"queued": 2}}
+    <- {"ok": false, "error": "Unknown command: ..."}
+
+Commands (handled by StatsCommands, see STATSRANKS_new.py):
+    refresh-ranks   - args: ids (list of user IDs, default everyone in rankstats)
+    reload-stats    - reload rankstats.json from disk
+    publish-status  - args: any - populate_stats.py's summary of its last run
+    status          - the last published status and bot-side counters
+
+From a shell:
+
+    python bot_ipc.py status
+    python bot_ipc.py refresh-ranks '{"ids": ["123456789012345678"]}'
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+
+IPC_SOCKET_PATH = os.environ.get('BOT_IPC_SOCKET', '/home/carnagereport/bot/bot_ipc.sock')
+# Seconds the client waits to connect and for a reply
+IPC_TIMEOUT = 5.0
+# Largest request line the server accepts
+IPC_MAX_REQUEST = 1024 * 1024
+
+
+class BotIpcError(Exception):
+    """The bot couldn't be reached or the command failed."""
+
+
+async def start_ipc_server(handlers, path=IPC_SOCKET_PATH):
+    """
+    Start serving commands on a Unix socket.
+
+    Args:
+        handlers: {command name: coroutine function(**args) -> JSON-serializable result}
+        path: Socket path (a stale socket file from a previous run is replaced)
+
+    Returns:
+        asyncio Server (close() it on shutdown)
+    """
+    async def handle_client(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await dispatch(handlers, line)
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            print(f"[IPC] Connection error: {e}")
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(handle_client, path=path, limit=IPC_MAX_REQUEST)
+    os.chmod(path, 0o660)
+    print(f"[IPC] Listening on {path}")
+    return server
+
+
+async def dispatch(handlers, line):
+    """Run one request line through its handler and build the response."""
+    try:
+        request = json.loads(line)
+        command = request['command']
+        args = request.get('args') or {}
+    except (ValueError, KeyError, TypeError):
+        return {'ok': False, 'error': 'Invalid request'}
+
+    handler = handlers.get(command)
+    if handler is None:
+        return {'ok': False, 'error': f"Unknown command: {command}"}
+    try:
+        return {'ok': True, 'result': await handler(**args)}
+    except Exception as e:
+        print(f"[IPC] {command} failed: {e}")
+        return {'ok': False, 'error': str(e)}
+
+
+def send_command(command, args=None, path=IPC_SOCKET_PATH, timeout=IPC_TIMEOUT):
+    """
+    Send one command to the bot and wait for the reply.
+
+    Returns:
+        The command's result
+
+    Raises:
+        BotIpcError if the bot isn't listening, times out or the command failed
+    """
+    request = json.dumps({'command': command, 'args': args or {}}).encode('utf-8') + b'\n'
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(request)
+            reply = b''
+            while not reply.endswith(b'\n'):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                reply += chunk
+    except OSError as e:
+        raise BotIpcError(f"Bot not reachable at {path}: {e}")
+
+    try:
+        response = json.loads(reply)
+    except ValueError:
+        raise BotIpcError(f"Invalid reply from bot: {reply[:200]!r}")
+    if not response.get('ok'):
+        raise BotIpcError(response.get('error', 'Command failed'))
+    return response.get('result')
+
+
+def main(argv):
+    if not argv:
+        print(__doc__)
+        return 1
+    args = json.loads(argv[1]) if len(argv) > 1 else {}
+    try:
+        result = send_command(argv[0], args)
+    except BotIpcError as e:
+        print(f"Error: {e}")
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -25,12 +25,9 @@ def log_action(message: str):
     queue_log(message)
 
 async def get_player_mmr(user_id: int) -> int:
-    """Get player MMR"""
+    """Get player MMR (in-memory lookup, see STATSRANKS.RankStatsStore)"""
     import STATSRANKS
-    stats = STATSRANKS.get_player_stats(user_id)
-    if stats and 'mmr' in stats:
-        return stats['mmr']
-    return 1500
+    return STATSRANKS.get_player_mmr(user_id)
 
 def setup_commands(bot: commands.Bot, PREGAME_LOBBY_ID: int, POSTGAME_LOBBY_ID: int, QUEUE_CHANNEL_ID: int):
     """Setup all bot commands"""
@@ -254,7 +251,7 @@ def setup_commands(bot: commands.Bot, PREGAME_LOBBY_ID: int, POSTGAME_LOBBY_ID:
         # Push to GitHub
         try:
             import github_webhook
-            github_webhook.update_queue_config_on_github()
+            github_webhook.queue_github_push('queue_config.json')
         except:
             pass
         
@@ -283,7 +280,7 @@ def setup_commands(bot: commands.Bot, PREGAME_LOBBY_ID: int, POSTGAME_LOBBY_ID:
         # Push to GitHub
         try:
             import github_webhook
-            github_webhook.update_queue_config_on_github()
+            github_webhook.queue_github_push('queue_config.json')
         except:
             pass
         
@@ -292,66 +289,50 @@ def setup_commands(bot: commands.Bot, PREGAME_LOBBY_ID: int, POSTGAME_LOBBY_ID:
     
     @bot.tree.command(name='silentrankrefresh', description='[ADMIN] Silently refresh all player ranks (no DMs)')
     @has_admin_role()
-    async def silent_rank_refresh(interaction: discord.Interaction):
+    @app_commands.describe(dry_run="Only show what would change")
+    async def silent_rank_refresh(interaction: discord.Interaction, dry_run: bool = False):
         """Refresh all player ranks based on their stats - no DMs sent"""
         await interaction.response.defer(ephemeral=True)
         
         import STATSRANKS
+        import rank_sync
         
         guild = interaction.guild
-        stats = STATSRANKS.load_json_file(STATSRANKS.RANKSTATS_FILE)
+        stats = STATSRANKS.rankstats_store.all()
         
-        refreshed = 0
-        reset_to_one = 0
-        
-        # Process all players in the stats file
+        # Target level for every player in the stats file
+        targets = {}
         for user_id_str, player_stats in stats.items():
-            try:
-                user_id = int(user_id_str)
-                member = guild.get_member(user_id)
-                
-                if not member:
-                    continue
-                
-                # Check if they have any games played
-                total_games = player_stats.get("wins", 0) + player_stats.get("losses", 0)
-                
-                if total_games == 0:
-                    # No games = Level 1
-                    new_level = 1
-                    reset_to_one += 1
-                else:
-                    # Calculate rank from XP
-                    new_level = STATSRANKS.calculate_rank(player_stats.get("xp", 0))
-                
-                # Update role silently (send_dm=False)
-                await STATSRANKS.update_player_rank_role(guild, user_id, new_level, send_dm=False)
-                refreshed += 1
-                
-            except Exception as e:
-                log_action(f"Error refreshing rank for {user_id_str}: {e}")
-                continue
-        
-        # Also check all guild members who might not be in stats yet
-        for member in guild.members:
-            if member.bot:
+            if not user_id_str.isdigit():
                 continue
-            
-            user_id_str = str(member.id)
-            if user_id_str not in stats:
-                # Not in stats = Level 1
-                try:
-                    await STATSRANKS.update_player_rank_role(guild, member.id, 1, send_dm=False)
-                    reset_to_one += 1
-                    refreshed += 1
-                except:
-                    pass
+            # Check if they have any games played
+            total_games = player_stats.get("wins", 0) + player_stats.get("losses", 0)
+            if total_games == 0:
+                # No games = Level 1
+                targets[int(user_id_str)] = 1
+            else:
+                # Calculate rank from XP
+                targets[int(user_id_str)] = STATSRANKS.calculate_rank(player_stats.get("xp", 0))
+        
+        # Guild members who aren't in stats yet go to Level 1; roles are updated silently
+        plan, result = await rank_sync.sync_rank_roles(guild, targets, default_level=1, dry_run=dry_run)
+        reset_to_one = sum(1 for change in plan.changes if change.new_level == 1)
+        
+        if dry_run:
+            await interaction.followup.send(
+                f"📝 Silent rank refresh dry run - nothing was changed\n"
+                f"• **{len(plan.changes)}** players would be updated ({reset_to_one} to Level 1)\n"
+                f"• **{plan.unchanged}** already correct",
+                ephemeral=True
+            )
+            return
         
-        log_action(f"Admin {interaction.user.name} ran silent rank refresh: {refreshed} players updated, {reset_to_one} reset to Level 1")
+        log_action(f"Admin {interaction.user.name} ran silent rank refresh: {result['applied']} players updated, {reset_to_one} reset to Level 1")
         await interaction.followup.send(
             f"✅ Silent rank refresh complete!\n"
-            f"• **{refreshed}** players updated\n"
-            f"• **{reset_to_one}** players set to Level 1 (no games)",
+            f"• **{result['applied']}** players updated ({reset_to_one} set to Level 1)\n"
+            f"• **{plan.unchanged}** already correct\n"
+            f"• **{result['failed']}** errors",
             ephemeral=True
         )
     
@@ -535,7 +516,7 @@ def setup_commands(bot: commands.Bot, PREGAME_LOBBY_ID: int, POSTGAME_LOBBY_ID:
         # Push to GitHub
         try:
             import github_webhook
-            github_webhook.update_testmatchhistory_on_github()
+            github_webhook.queue_github_push('testmatchhistory.json')
         except Exception as e:
             log_action(f"Failed to push test match history to GitHub: {e}")
         
@@ -15,9 +15,8 @@ import json
 import argparse
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import urllib.request
-import urllib.parse
-import urllib.error
+
+import http_client
 
 # Twitch API endpoints
 TWITCH_AUTH_URL = "https://id.twitch.tv/oauth2/token"
@@ -26,17 +25,16 @@ TWITCH_API_BASE = "https://api.twitch.tv/helix"
 
 def get_app_access_token(client_id: str, client_secret: str) -> Optional[str]:
     """Get an app access token from Twitch"""
-    data = urllib.parse.urlencode({
+    data = {
         "client_id": client_id,
         "client_secret": client_secret,
         "grant_type": "client_credentials"
-    }).encode()
+    }
 
     try:
-        req = urllib.request.Request(TWITCH_AUTH_URL, data=data, method="POST")
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            result = json.loads(resp.read().decode())
-            return result.get("access_token")
+        resp = http_client.get_client().post(TWITCH_AUTH_URL, data=data, timeout=10, retry=True)
+        resp.raise_for_status()
+        return resp.json().get("access_token")
     except Exception as e:
         print(f"Error getting access token: {e}")
         return None
@@ -45,8 +43,6 @@ def get_app_access_token(client_id: str, client_secret: str) -> Optional[str]:
 def twitch_api_request(endpoint: str, params: dict, client_id: str, access_token: str) -> Optional[dict]:
     """Make an authenticated request to Twitch API"""
     url = f"{TWITCH_API_BASE}/{endpoint}"
-    if params:
-        url += "?" + urllib.parse.urlencode(params)
 
     headers = {
         "Client-ID": client_id,
@@ -54,12 +50,11 @@ def twitch_api_request(endpoint: str, params: dict, client_id: str, access_token
     }
 
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            return json.loads(resp.read().decode())
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}")
-        return None
+        resp = http_client.get_client().get(url, params=params or None, headers=headers, timeout=15)
+        if resp.status_code >= 400:
+            print(f"HTTP Error {resp.status_code}: {resp.reason}")
+            return None
+        return resp.json()
     except Exception as e:
         print(f"Error: {e}")
         return None
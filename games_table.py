@@ -0,0 +1,247 @@
+"""
+games_table.py - Columnar per-player-per-game table for analysis (NumPy .npz)
+
+populate_stats.py keeps one row per player per game in games_table.npz: game
+fields (source file, playlist, time, map, gametype), the player's identity,
+team and result, their Post Game Report stats, and one column per medal
+(medal_*) and per weapon stat (weapon_*). Every column is a typed NumPy array,
+so aggregates are column scans (see stats_query.py) instead of loops over the
+nested match JSON.
+
+The table is updated incrementally: each game's rows carry a content hash, so
+an update only builds rows for new or changed games, drops the rows of games
+that changed or disappeared and keeps everything else as is.
+
+NumPy is optional. Without it NUMPY_AVAILABLE is False and populate_stats
+skips the table.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+TABLE_VERSION = 1
+
+# Column name -> kind ('str', 'int' or 'float'). medal_*/weapon_* columns are
+# added as games bring them and are always 'int'.
+BASE_COLUMNS = {
+    'source_file': 'str',
+    'playlist': 'str',      # '' for custom games
+    'timestamp': 'str',
+    'map': 'str',
+    'gametype': 'str',
+    'player': 'str',        # display name
+    'user_id': 'str',       # '' when unresolved
+    'team': 'str',
+    'result': 'int',        # RESULT_WIN / RESULT_LOSS / RESULT_TIE
+    'kills': 'int',
+    'deaths': 'int',
+    'assists': 'int',
+    'headshots': 'int',
+    'suicides': 'int',
+    'shots_fired': 'int',
+    'shots_hit': 'int',
+    'score': 'int',
+    'accuracy': 'float',
+}
+DYNAMIC_PREFIXES = ('medal_', 'weapon_')
+
+RESULT_LOSS = -1
+RESULT_TIE = 0
+RESULT_WIN = 1
+RESULT_CODES = {'win': RESULT_WIN, 'loss': RESULT_LOSS, 'tie': RESULT_TIE}
+
+# Bookkeeping arrays stored next to the columns
+GAMES_SOURCE_KEY = '_games_source_file'
+GAMES_HASH_KEY = '_games_hash'
+VERSION_KEY = '_version'
+
+
+def column_slug(name):
+    """'Battle Rifle Kills' -> 'battle_rifle_kills'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+
+
+def column_kind(name):
+    return BASE_COLUMNS.get(name, 'int')
+
+
+def empty_column(kind, length=0):
+    if kind == 'str':
+        return np.full(length, '', dtype=str)
+    if kind == 'float':
+        return np.zeros(length, dtype=np.float32)
+    return np.zeros(length, dtype=np.int32)
+
+
+def game_hash(playlist, match, player_rows):
+    """Content hash of everything a game's rows are built from."""
+    content = json.dumps([playlist, match, player_rows], separators=(',', ':'), sort_keys=True)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+def build_game_rows(playlist, match, player_rows):
+    """
+    Rows for one game.
+
+    Args:
+        playlist: Playlist name (None for custom games)
+        match: Match entry as written to the matches files (display names)
+        player_rows: get_player_game_rows() output, in the same player order as
+                     match['player_stats']
+
+    Returns:
+        List of {column: value} dicts
+    """
+    medals = {medal.get('player', ''): medal for medal in match.get('medals', [])}
+    weapons = {weapon.get('Player', ''): weapon for weapon in match.get('weapons', [])}
+
+    rows = []
+    for stats, player in zip(match.get('player_stats', []), player_rows):
+        row = {
+            'source_file': match.get('source_file', ''),
+            'playlist': playlist or '',
+            'timestamp': match.get('timestamp', ''),
+            'map': match.get('map', ''),
+            'gametype': match.get('gametype', ''),
+            'player': stats.get('name', ''),
+            'user_id': player.get('user_id') or '',
+            'team': stats.get('team', ''),
+            'result': RESULT_CODES.get(player.get('result'), RESULT_TIE),
+            'kills': stats.get('kills', 0),
+            'deaths': stats.get('deaths', 0),
+            'assists': stats.get('assists', 0),
+            'headshots': stats.get('headshots', 0),
+            'suicides': stats.get('suicides', 0),
+            'shots_fired': stats.get('shots_fired', 0),
+            'shots_hit': stats.get('shots_hit', 0),
+            'score': stats.get('score_numeric', 0),
+            'accuracy': stats.get('accuracy', 0),
+        }
+        for key, value in medals.get(row['player'], {}).items():
+            if key != 'player':
+                row['medal_' + column_slug(key)] = value
+        for key, value in weapons.get(row['player'], {}).items():
+            if key != 'Player':
+                row['weapon_' + column_slug(key)] = value
+        rows.append(row)
+    return rows
+
+
+class GamesTable:
+    """Per-player-per-game rows as a dict of equal-length NumPy arrays."""
+
+    def __init__(self, columns=None, game_hashes=None):
+        self.columns = columns if columns is not None else {
+            name: empty_column(kind) for name, kind in BASE_COLUMNS.items()
+        }
+        self.game_hashes = game_hashes if game_hashes is not None else {}  # {source_file: hash}
+
+    def __len__(self):
+        return len(self.columns['source_file'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def column_names(self, prefix=''):
+        return [name for name in self.columns if name.startswith(prefix)]
+
+    @classmethod
+    def load(cls, path):
+        """Load a table saved by save() (an empty table if missing, unreadable or outdated)."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data[VERSION_KEY]) != TABLE_VERSION:
+                    return cls()
+                game_hashes = dict(zip(data[GAMES_SOURCE_KEY].tolist(), data[GAMES_HASH_KEY].tolist()))
+                columns = {name: data[name] for name in data.files if not name.startswith('_')}
+        except:
+            return cls()
+        for name, kind in BASE_COLUMNS.items():
+            if name not in columns:
+                return cls()
+        return cls(columns, game_hashes)
+
+    def save(self, path):
+        """Write the table (to a temp file first, so readers never see a partial file)."""
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **self.columns, **{
+            VERSION_KEY: np.array(TABLE_VERSION),
+            GAMES_SOURCE_KEY: np.array(list(self.game_hashes), dtype=str),
+            GAMES_HASH_KEY: np.array(list(self.game_hashes.values()), dtype=str),
+        })
+        os.replace(tmp_path, path)
+
+    def update(self, games):
+        """
+        Bring the table in line with the current set of games.
+
+        Args:
+            games: (source_file, playlist, match, player_rows) for every game,
+                   as passed to StatsStore.sync_games()
+
+        Returns:
+            (added, removed) - number of games whose rows were (re)built / dropped
+        """
+        hashes = {source_file: game_hash(playlist, match, player_rows)
+                  for source_file, playlist, match, player_rows in games}
+        stale = {source_file for source_file, old_hash in self.game_hashes.items()
+                 if hashes.get(source_file) != old_hash}
+
+        new_rows = []
+        for source_file, playlist, match, player_rows in games:
+            if self.game_hashes.get(source_file) != hashes[source_file]:
+                new_rows.extend(build_game_rows(playlist, match, player_rows))
+
+        if stale:
+            keep = ~np.isin(self.columns['source_file'], list(stale))
+            self.columns = {name: values[keep] for name, values in self.columns.items()}
+        if new_rows:
+            self._append(new_rows)
+
+        added = sum(1 for source_file, new_hash in hashes.items() if self.game_hashes.get(source_file) != new_hash)
+        self.game_hashes = hashes
+        return added, len(stale - hashes.keys())
+
+    def _append(self, rows):
+        names = list(self.columns)
+        for row in rows:
+            for name in row:
+                if name not in self.columns and name.startswith(DYNAMIC_PREFIXES):
+                    # New medal/weapon column: zero for every existing row
+                    self.columns[name] = empty_column('int', len(self))
+                    names.append(name)
+
+        for name in names:
+            kind = column_kind(name)
+            default = '' if kind == 'str' else 0
+            values = [row.get(name, default) for row in rows]
+            if kind == 'str':
+                added = np.array(values, dtype=str)
+            else:
+                added = np.array(values, dtype=np.float32 if kind == 'float' else np.int32)
+            self.columns[name] = np.concatenate([self.columns[name], added])
+
+
+def update_games_table(path, games):
+    """
+    Load the table at path, update it with the current games and save it.
+
+    Returns:
+        (table, added, removed)
+    """
+    table = GamesTable.load(path)
+    added, removed = table.update(games)
+    if added or removed or not os.path.exists(path):
+        table.save(path)
+    return table, added, removed
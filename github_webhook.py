@@ -3,16 +3,34 @@ github_webhook.py - Automatic GitHub Updates
 Pushes all JSON data files to GitHub whenever they're updated
 """
 
-import requests
+import atexit
 import json
-import base64
+import hashlib
 import os
+import random
+import threading
+import time
 from datetime import datetime
 
+import http_client
+
 # GitHub Configuration
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')  # Personal Access Token
 GITHUB_REPO = "I2aMpAnT/CarnageReport.com"
 GITHUB_BRANCH = "main"
+# API base URL (point at a local stand-in for testing, or a GitHub Enterprise host)
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+# Blob SHAs of the files last pushed, so unchanged files are skipped without an API call
+GITHUB_BLOB_CACHE_FILE = os.getenv('GITHUB_BLOB_CACHE', '.github_blob_cache.json')
+
+# Background push queue (queue_github_push): a file is pushed once it has gone
+# PUSH_DEBOUNCE seconds without another update, or PUSH_MAX_DELAY seconds after
+# its first queued update. Failed pushes are retried after PUSH_RETRY_BASE
+# seconds, doubling up to PUSH_RETRY_MAX.
+PUSH_DEBOUNCE = float(os.getenv('GITHUB_PUSH_DEBOUNCE', '5'))
+PUSH_MAX_DELAY = float(os.getenv('GITHUB_PUSH_MAX_DELAY', '30'))
+PUSH_RETRY_BASE = 5.0
+PUSH_RETRY_MAX = 300.0
 
 # JSON files to sync (local filename -> GitHub path)
 # Does NOT include matchmakingstate.json (internal bot state only)
@@ -31,6 +49,241 @@ def log_github_action(message: str):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     print(f"[GITHUB] [{timestamp}] {message}")
 
+def git_blob_sha(content: bytes) -> str:
+    """SHA git gives a blob with this content (same as `git hash-object`)"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GitHubPublisher:
+    """
+    Publishes files to a branch through the Git Data API, one commit per flush.
+
+    stage() queues a file unless its blob SHA matches the one last pushed
+    (kept in GITHUB_BLOB_CACHE_FILE). flush() then reads the branch head,
+    creates one tree with every staged file on top of it, commits that tree
+    and moves the branch - five requests however many files changed, instead
+    of a GET and a PUT (and a commit) per file with the contents API.
+    """
+
+    # The branch moved between reading the head and updating it (someone else
+    # pushed) - rebuild the commit on the new head this many times
+    MAX_REF_RETRIES = 3
+
+    def __init__(self, repo: str, branch: str, token: str, api_url: str = GITHUB_API_URL,
+                 cache_file: str = GITHUB_BLOB_CACHE_FILE, client=None):
+        self.repo = repo
+        self.branch = branch
+        self.token = token
+        self.api_url = api_url.rstrip('/')
+        self.cache_file = cache_file
+        self.client = client or http_client.get_client()
+        self.pending = {}  # {github path: content bytes}
+        self.lock = threading.Lock()  # pending / blob_cache - never held across a request
+        self.flush_lock = threading.Lock()  # one flush at a time
+        self.in_flight = {}  # {github path: content bytes} being committed by flush()
+        self.blob_cache = self._load_cache()
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f).get(f"{self.repo}@{self.branch}", {})
+        except:
+            return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except:
+            data = {}
+        data[f"{self.repo}@{self.branch}"] = self.blob_cache
+        tmp_path = self.cache_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.cache_file)
+
+    def _request(self, method: str, path: str, payload: dict = None):
+        # Every step can be retried: trees and commits are content-addressed (a
+        # retried POST at worst leaves an unused object) and repeating a ref
+        # update that already went through either succeeds again or is seen
+        # as a conflict, after which the next attempt finds nothing to commit
+        return self.client.request(method, f"{self.api_url}/repos/{self.repo}/{path}", json=payload, retry=True, headers={
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github.v3+json"
+        })
+
+    def stage_content(self, github_path: str, content) -> bool:
+        """
+        Queue content for the next flush.
+
+        Returns:
+            bool: True if queued, False if it matches what was last pushed
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        blob_sha = git_blob_sha(content)
+        with self.lock:
+            in_flight = self.in_flight.get(github_path)
+            if in_flight is not None:
+                if git_blob_sha(in_flight) == blob_sha:
+                    # Being committed right now - stays queued in case that flush fails
+                    self.pending[github_path] = in_flight
+                    return False
+            elif self.blob_cache.get(github_path) == blob_sha:
+                self.pending.pop(github_path, None)
+                return False
+            self.pending[github_path] = content
+            return True
+
+    def stage(self, local_file: str, github_path: str) -> bool:
+        """
+        Queue a local JSON file for the next flush.
+
+        Returns:
+            bool: True if queued, False if unchanged since the last push
+
+        Raises:
+            OSError if the file can't be read, ValueError if it isn't valid JSON
+        """
+        with open(local_file, 'rb') as f:
+            content = f.read()
+        json.loads(content)
+        return self.stage_content(github_path, content)
+
+    def flush(self, commit_message: str = None) -> bool:
+        """
+        Commit every staged file to the branch in one commit.
+
+        Returns:
+            bool: True if everything staged is on the branch (or nothing was staged)
+        """
+        with self.flush_lock:
+            # Commit a snapshot, so stage_content() doesn't wait for the requests
+            with self.lock:
+                if not self.pending:
+                    return True
+                pending = dict(self.pending)
+                self.in_flight = pending
+            if commit_message is None:
+                commit_message = f"Auto-update: {', '.join(sorted(pending))} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+
+            try:
+                for attempt in range(self.MAX_REF_RETRIES + 1):
+                    result = self._commit(pending, commit_message)
+                    if result != 'conflict':
+                        break
+                    log_github_action(f"Branch {self.branch} moved during the update, retrying")
+            finally:
+                with self.lock:
+                    self.in_flight = {}
+            if result not in ('committed', 'unchanged'):
+                return False
+
+            with self.lock:
+                for github_path, content in pending.items():
+                    self.blob_cache[github_path] = git_blob_sha(content)
+                    # Restaged while the commit was in flight: keep the newer content for the next flush
+                    if self.pending.get(github_path) is content:
+                        del self.pending[github_path]
+                self._save_cache()
+            return True
+
+    def _commit(self, pending: dict, commit_message: str) -> str:
+        """One attempt at committing pending files. Returns 'committed', 'unchanged', 'conflict' or 'failed'."""
+        response = self._request('GET', f"git/ref/heads/{self.branch}")
+        if response.status_code != 200:
+            log_github_action(f"❌ Failed to read branch {self.branch}: {response.status_code}")
+            return 'failed'
+        head_sha = response.json()["object"]["sha"]
+
+        response = self._request('GET', f"git/commits/{head_sha}")
+        if response.status_code != 200:
+            log_github_action(f"❌ Failed to read commit {head_sha}: {response.status_code}")
+            return 'failed'
+        base_tree = response.json()["tree"]["sha"]
+
+        response = self._request('POST', "git/trees", {
+            "base_tree": base_tree,
+            "tree": [{"path": github_path, "mode": "100644", "type": "blob", "content": content.decode('utf-8')}
+                     for github_path, content in sorted(pending.items())]
+        })
+        if response.status_code != 201:
+            log_github_action(f"❌ Failed to create tree: {response.status_code}")
+            return 'failed'
+        tree_sha = response.json()["sha"]
+        if tree_sha == base_tree:
+            # Files were already up to date on the branch
+            return 'unchanged'
+
+        response = self._request('POST', "git/commits", {
+            "message": commit_message,
+            "tree": tree_sha,
+            "parents": [head_sha]
+        })
+        if response.status_code != 201:
+            log_github_action(f"❌ Failed to create commit: {response.status_code}")
+            return 'failed'
+        commit_sha = response.json()["sha"]
+
+        response = self._request('PATCH', f"git/refs/heads/{self.branch}", {"sha": commit_sha})
+        if response.status_code == 422:
+            return 'conflict'
+        if response.status_code != 200:
+            log_github_action(f"❌ Failed to update branch {self.branch}: {response.status_code}")
+            return 'failed'
+        log_github_action(f"✅ Pushed {', '.join(sorted(pending))} to GitHub ({commit_sha[:7]})")
+        return 'committed'
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+def get_publisher() -> GitHubPublisher:
+    """Shared publisher for GITHUB_REPO/GITHUB_BRANCH"""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = GitHubPublisher(GITHUB_REPO, GITHUB_BRANCH, GITHUB_TOKEN)
+        return _publisher
+
+def push_files_to_github(files: dict, commit_message: str = None) -> bool:
+    """
+    Push several local files to GitHub in one commit (unchanged files are skipped)
+
+    Args:
+        files: {local filename: path in the GitHub repo}
+        commit_message: Git commit message (auto-generated if None)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not GITHUB_TOKEN:
+        log_github_action("⚠️ GITHUB_TOKEN not set in .env file")
+        return False
+
+    publisher = get_publisher()
+    ok = True
+    for local_file, github_path in files.items():
+        if not os.path.exists(local_file):
+            log_github_action(f"⚠️ {local_file} not found")
+            ok = False
+            continue
+        try:
+            if not publisher.stage(local_file, github_path):
+                log_github_action(f"{local_file} unchanged, skipped")
+        except ValueError as e:
+            log_github_action(f"⚠️ Invalid JSON in {local_file}: {e}")
+            ok = False
+        except Exception as e:
+            log_github_action(f"❌ Exception reading {local_file}: {e}")
+            ok = False
+
+    try:
+        return publisher.flush(commit_message) and ok
+    except Exception as e:
+        log_github_action(f"❌ Exception pushing to GitHub: {e}")
+        return False
+
 def push_file_to_github(local_file: str, github_path: str, commit_message: str = None) -> bool:
     """
     Push a local file to GitHub repo
@@ -43,74 +296,183 @@ def push_file_to_github(local_file: str, github_path: str, commit_message: str =
     Returns:
         bool: True if successful, False otherwise
     """
+    return push_files_to_github({local_file: github_path}, commit_message)
+
+
+class PushQueue:
+    """
+    Pushes files from a background thread so callers (bot event handlers)
+    never wait on GitHub.
+
+    Repeated updates of a file are coalesced: the queue holds one entry per
+    file and reads it when the batch goes out, so only the latest version is
+    pushed. Everything due is pushed together (one commit through
+    push_files_to_github). A failed batch goes back on the queue and is
+    retried with exponential backoff.
+    """
+
+    def __init__(self, push_func=None, debounce: float = PUSH_DEBOUNCE, max_delay: float = PUSH_MAX_DELAY,
+                 retry_base: float = PUSH_RETRY_BASE, retry_max: float = PUSH_RETRY_MAX):
+        self.push_func = push_func or push_files_to_github
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.cond = threading.Condition()
+        self.pending = {}  # {local file: {'github_path', 'first', 'last'}} (monotonic times)
+        self.in_flight = 0
+        self.flush_requested = False
+        self.failures = 0  # consecutive failed batches
+        self.retry_at = 0.0
+        self.thread = None
+        self.counters = {'queued': 0, 'coalesced': 0, 'pushed': 0, 'batches': 0, 'failed_batches': 0}
+        self.last_push_lag = None  # seconds from first queued update to pushed, for the last batch
+
+    def enqueue(self, local_file: str, github_path: str = None):
+        """Queue a file for pushing (replaces any queued version of it)"""
+        github_path = github_path or JSON_FILES.get(local_file, os.path.basename(local_file))
+        now = time.monotonic()
+        with self.cond:
+            entry = self.pending.get(local_file)
+            if entry:
+                entry['last'] = now
+                entry['github_path'] = github_path
+                self.counters['coalesced'] += 1
+            else:
+                self.pending[local_file] = {'github_path': github_path, 'first': now, 'last': now}
+            self.counters['queued'] += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='github-push', daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def _due_at(self) -> float:
+        due = min(min(entry['last'] + self.debounce, entry['first'] + self.max_delay)
+                  for entry in self.pending.values())
+        if self.flush_requested:
+            due = 0.0
+        return max(due, self.retry_at)
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                wait = self._due_at() - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                batch, self.pending = self.pending, {}
+                self.in_flight = len(batch)
+
+            files = {}
+            for local_file, entry in batch.items():
+                if os.path.exists(local_file):
+                    files[local_file] = entry['github_path']
+                else:
+                    log_github_action(f"⚠️ {local_file} not found, dropped from the push queue")
+            try:
+                ok = not files or self.push_func(files)
+            except Exception as e:
+                log_github_action(f"❌ Exception in push queue: {e}")
+                ok = False
+
+            now = time.monotonic()
+            with self.cond:
+                self.in_flight = 0
+                if ok:
+                    self.failures = 0
+                    self.retry_at = 0.0
+                    self.counters['batches'] += 1
+                    self.counters['pushed'] += len(files)
+                    if batch:
+                        self.last_push_lag = now - min(entry['first'] for entry in batch.values())
+                    if not self.pending:
+                        self.flush_requested = False
+                else:
+                    self.failures += 1
+                    self.counters['failed_batches'] += 1
+                    delay = min(self.retry_max, self.retry_base * 2 ** (self.failures - 1)) * random.uniform(0.5, 1.0)
+                    self.retry_at = now + delay
+                    # Back on the queue, unless a newer update of the file arrived meanwhile
+                    for local_file in files:
+                        entry = batch[local_file]
+                        newer = self.pending.get(local_file)
+                        if newer:
+                            newer['first'] = min(newer['first'], entry['first'])
+                        else:
+                            self.pending[local_file] = entry
+                    log_github_action(f"Push of {', '.join(sorted(files))} failed, retrying in {delay:.0f}s")
+                self.cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Push everything queued now (skipping the debounce, not a retry backoff)
+        and wait for it.
+
+        Returns:
+            bool: True if the queue emptied within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            if self.pending:
+                self.flush_requested = True
+                self.cond.notify_all()
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def stats(self) -> dict:
+        """Queue depth and lag metrics"""
+        now = time.monotonic()
+        with self.cond:
+            oldest = min((entry['first'] for entry in self.pending.values()), default=None)
+            return {
+                'depth': len(self.pending),
+                'in_flight': self.in_flight,
+                'oldest_lag': round(now - oldest, 3) if oldest is not None else 0.0,
+                'last_push_lag': round(self.last_push_lag, 3) if self.last_push_lag is not None else None,
+                'consecutive_failures': self.failures,
+                'retry_in': round(max(0.0, self.retry_at - now), 3),
+                **self.counters
+            }
+
+
+_push_queue = None
+
+def get_push_queue() -> PushQueue:
+    """Shared background push queue"""
+    global _push_queue
+    with _publisher_lock:
+        if _push_queue is None:
+            _push_queue = PushQueue()
+            # Give queued pushes a chance to go out when the bot exits
+            atexit.register(_push_queue.flush, 10)
+        return _push_queue
+
+def queue_github_push(local_file: str, github_path: str = None) -> bool:
+    """
+    Queue a file to be pushed to GitHub in the background (returns immediately)
+
+    Args:
+        local_file: Local filename
+        github_path: Path in the GitHub repo (defaults to the JSON_FILES entry)
+
+    Returns:
+        bool: True if queued
+    """
     if not GITHUB_TOKEN:
         log_github_action("⚠️ GITHUB_TOKEN not set in .env file")
         return False
-    
-    if not os.path.exists(local_file):
-        log_github_action(f"⚠️ {local_file} not found")
-        return False
-    
-    # GitHub API endpoint
-    api_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{github_path}"
-    
-    # Headers
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    try:
-        # Read local file
-        with open(local_file, 'r') as f:
-            content = f.read()
-        
-        # Verify it's valid JSON
-        json.loads(content)
-        
-        # Get current file SHA (needed for updates)
-        response = requests.get(api_url, headers=headers)
-        
-        if response.status_code == 200:
-            current_sha = response.json()["sha"]
-        else:
-            current_sha = None  # File doesn't exist yet
-        
-        # Encode content to base64
-        content_bytes = content.encode('utf-8')
-        content_base64 = base64.b64encode(content_bytes).decode('utf-8')
-        
-        # Auto-generate commit message if not provided
-        if commit_message is None:
-            commit_message = f"Auto-update: {local_file} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        
-        # Prepare payload
-        payload = {
-            "message": commit_message,
-            "content": content_base64,
-            "branch": GITHUB_BRANCH
-        }
-        
-        # Add SHA if file exists (for updates)
-        if current_sha:
-            payload["sha"] = current_sha
-        
-        # Push to GitHub
-        response = requests.put(api_url, headers=headers, json=payload)
-        
-        if response.status_code in [200, 201]:
-            log_github_action(f"✅ Pushed {local_file} to GitHub")
-            return True
-        else:
-            log_github_action(f"❌ Failed to push {local_file}: {response.status_code}")
-            return False
-    
-    except json.JSONDecodeError as e:
-        log_github_action(f"⚠️ Invalid JSON in {local_file}: {e}")
-        return False
-    except Exception as e:
-        log_github_action(f"❌ Exception pushing {local_file}: {e}")
-        return False
+    get_push_queue().enqueue(local_file, github_path)
+    return True
+
+def get_push_queue_stats() -> dict:
+    """Metrics of the background push queue (depth, lag, counters)"""
+    return get_push_queue().stats()
 
 
 # Convenience functions for each file type
@@ -143,11 +505,10 @@ def update_xp_config_on_github():
     return push_file_to_github("xp_config.json", "xp_config.json")
 
 def update_all_on_github():
-    """Push all JSON files to GitHub"""
-    results = {}
-    for local_file, github_path in JSON_FILES.items():
-        results[local_file] = push_file_to_github(local_file, github_path)
-    return results
+    """Push all JSON files to GitHub in one commit"""
+    files = {local_file: github_path for local_file, github_path in JSON_FILES.items() if os.path.exists(local_file)}
+    ok = push_files_to_github(files)
+    return {local_file: ok and local_file in files for local_file in JSON_FILES}
 
 
 # Legacy function for backwards compatibility
@@ -157,33 +518,10 @@ def push_to_github(file_content: str, commit_message: str = "Update match histor
         log_github_action("⚠️ GITHUB_TOKEN not set in .env file")
         return False
     
-    api_url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/matchhistory.json"
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
     try:
-        response = requests.get(api_url, headers=headers)
-        current_sha = response.json()["sha"] if response.status_code == 200 else None
-        
-        content_base64 = base64.b64encode(file_content.encode('utf-8')).decode('utf-8')
-        payload = {
-            "message": commit_message,
-            "content": content_base64,
-            "branch": GITHUB_BRANCH
-        }
-        if current_sha:
-            payload["sha"] = current_sha
-        
-        response = requests.put(api_url, headers=headers, json=payload)
-        
-        if response.status_code in [200, 201]:
-            log_github_action(f"✅ Successfully pushed to GitHub: {commit_message}")
-            return True
-        else:
-            log_github_action(f"❌ GitHub push failed: {response.status_code}")
-            return False
+        publisher = get_publisher()
+        publisher.stage_content("matchhistory.json", file_content)
+        return publisher.flush(commit_message)
     except Exception as e:
         log_github_action(f"❌ Exception during GitHub push: {e}")
         return False
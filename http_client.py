@@ -0,0 +1,181 @@
+"""
+http_client.py - Shared HTTP client: pooled connections, timeouts and retries
+
+Used for the GitHub API (github_webhook.py), the Discord refresh webhook
+(populate_stats.py) and the Twitch API (fetch_twitch_vods.py). One
+requests.Session keeps connections alive between calls, so repeated requests
+to the same host skip the TCP/TLS handshake.
+
+HttpClient.request() adds a default timeout and retries:
+  - connection errors, timeouts and 500/502/503/504, with jittered
+    exponential backoff (only for idempotent methods unless retry=True)
+  - rate limits (429, or 403 with X-RateLimit-Remaining: 0 / Retry-After),
+    waiting as long as the server asks: Retry-After (Discord, GitHub
+    secondary limits), X-RateLimit-Reset-After (Discord) or
+    X-RateLimit-Reset / Ratelimit-Reset (GitHub / Twitch, epoch seconds)
+
+The transport is anything with requests.Session's request(method, url,
+**kwargs) method, so tests can pass a fake that returns canned responses.
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# Don't sleep longer than this for a rate limit - the response is returned instead
+MAX_RATE_LIMIT_WAIT = 120.0
+
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+def create_session(pool_size=10):
+    """requests.Session with a connection pool of pool_size per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def rate_limit_delay(response, now=None):
+    """
+    Seconds the server asked us to wait, or None if the response isn't a rate limit.
+    """
+    status = response.status_code
+    if status not in (403, 429):
+        return None
+    headers = response.headers
+    if status == 403 and headers.get('X-RateLimit-Remaining') != '0' and 'Retry-After' not in headers:
+        return None  # an ordinary permission error
+
+    now = time.time() if now is None else now
+    retry_after = headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+    reset_after = headers.get('X-RateLimit-Reset-After')
+    if reset_after is not None:
+        try:
+            return max(0.0, float(reset_after))
+        except ValueError:
+            pass
+    reset = headers.get('X-RateLimit-Reset') or headers.get('Ratelimit-Reset')
+    if reset is not None:
+        try:
+            return max(0.0, float(reset) - now)
+        except ValueError:
+            pass
+    return BACKOFF_BASE if status == 429 else None
+
+
+class HttpClient:
+    """Pooled HTTP client with default timeouts and retries (see module docstring)."""
+
+    def __init__(self, transport=None, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, max_rate_limit_wait=MAX_RATE_LIMIT_WAIT,
+                 sleep=time.sleep):
+        self.transport = transport if transport is not None else create_session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.sleep = sleep
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for a retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, retry=None, **kwargs):
+        """
+        Send a request, retrying as described in the module docstring.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            retry: Retry connection errors and 5xx responses (default: only for
+                   idempotent methods). Rate limits are always retried - the
+                   request wasn't processed.
+            **kwargs: Passed to the transport (json, data, params, headers, ...)
+
+        Returns:
+            The last response (callers check status_code as before)
+
+        Raises:
+            requests.RequestException if the last attempt failed to connect
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.transport.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not retry or last_attempt:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"[HTTP] {method} {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+                continue
+
+            delay = rate_limit_delay(response)
+            if delay is not None:
+                if last_attempt or delay > self.max_rate_limit_wait:
+                    return response
+                delay += random.uniform(0, self.backoff_base)
+                print(f"[HTTP] {method} {url} rate limited ({response.status_code}), retrying in {delay:.1f}s")
+            elif response.status_code in RETRY_STATUSES and retry and not last_attempt:
+                delay = self.backoff(attempt)
+                print(f"[HTTP] {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            else:
+                return response
+            self.sleep(delay)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+_client = None
+
+
+def get_client():
+    """Shared client (one connection pool per process)."""
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
+
+
+def set_client(client):
+    """Replace the shared client (e.g. with one on a fake transport for tests)."""
+    global _client
+    _client = client
@@ -0,0 +1,160 @@
+"""
+match_shards.py - Per-match shard files plus a manifest for the website
+
+Used by populate_stats.py --match-output shards instead of rewriting the whole
+{playlist}_matches.json every run. Each match is written to its own file under
+matches/<playlist>/, named after its source workbook, and manifest.json lists
+every shard with a content hash and a short summary.
+
+The manifest doubles as the playlist's summary index: it only carries what the
+games list, leaderboard and search need (time, map, gametype, score, teams,
+winner and each player's kills/deaths/assists, score and pre-game rank - under
+1 KB a match), while the full player stats, medals, weapons and the versus
+matrix stay in the shard, which the site fetches when a view needs them
+(opening a game or a profile).
+
+A shard is only written when it's new or its content hash changed, so a run
+that adds one game writes one shard plus the manifest. The site requests
+shards as <file>?v=<hash>: a shard's URL only changes when its content does,
+so browsers keep serving unchanged shards from cache.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Match fields copied into the manifest next to each shard ('players' instead
+# of the team lists for Head to Head)
+SUMMARY_FIELDS = ('timestamp', 'map', 'gametype', 'variant_name', 'duration',
+                  'red_score', 'blue_score', 'winner', 'red_team', 'blue_team', 'players',
+                  'source_file')
+# player_stats fields copied into the manifest
+PLAYER_SUMMARY_FIELDS = ('name', 'team', 'kills', 'deaths', 'assists', 'score', 'pre_game_rank')
+
+
+def playlist_slug(playlist_name):
+    """'MLG 4v4' -> 'mlg_4v4'"""
+    return re.sub(r'[^a-z0-9]+', '_', playlist_name.lower()).strip('_')
+
+
+def get_shard_dir(base_dir, playlist_name):
+    """Directory holding a playlist's shards and manifest."""
+    return os.path.join(base_dir, playlist_slug(playlist_name))
+
+
+def get_shard_id(match):
+    """Shard ID for a match: its source file without the extension (e.g. '20251202_203858')."""
+    return os.path.splitext(match.get('source_file') or match.get('timestamp', ''))[0]
+
+
+def encode_shard(match):
+    """Serialized shard content and its short content hash."""
+    content = json.dumps(match, separators=(',', ':'))
+    return content, hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+
+def load_manifest(shard_dir):
+    """Load a playlist manifest (None if missing or unreadable)."""
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except:
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_match_shards(shard_dir, playlist_name, matches):
+    """
+    Write a playlist's matches as shards and update its manifest.
+
+    Args:
+        shard_dir: Directory for this playlist (see get_shard_dir)
+        playlist_name: Playlist name stored in the manifest
+        matches: Match entries in display order
+
+    Returns:
+        (written, removed) - lists of shard paths written and deleted
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    old_manifest = load_manifest(shard_dir) or {'matches': []}
+    old_hashes = {entry['id']: entry.get('hash') for entry in old_manifest.get('matches', [])}
+
+    entries = []
+    written = []
+    for match in matches:
+        shard_id = get_shard_id(match)
+        filename = f"{shard_id}.json"
+        path = os.path.join(shard_dir, filename)
+        content, content_hash = encode_shard(match)
+        if old_hashes.get(shard_id) != content_hash or not os.path.exists(path):
+            with open(path, 'w') as f:
+                f.write(content)
+            written.append(path)
+
+        entry = {'id': shard_id, 'file': filename, 'hash': content_hash}
+        entry.update(summarize_match(match))
+        entries.append(entry)
+
+    # Shards of matches that left the playlist (retagged or removed)
+    current_ids = {entry['id'] for entry in entries}
+    removed = []
+    for shard_id in old_hashes:
+        if shard_id not in current_ids:
+            path = os.path.join(shard_dir, f"{shard_id}.json")
+            if os.path.exists(path):
+                os.remove(path)
+                removed.append(path)
+
+    with open(os.path.join(shard_dir, MANIFEST_NAME), 'w') as f:
+        write_manifest(f, playlist_name, entries)
+    return written, removed
+
+
+def summarize_match(match):
+    """A match's manifest summary: SUMMARY_FIELDS plus PLAYER_SUMMARY_FIELDS of each player."""
+    summary = {field: match[field] for field in SUMMARY_FIELDS if field in match}
+    if 'player_stats' in match:
+        summary['player_stats'] = [{field: player[field] for field in PLAYER_SUMMARY_FIELDS if field in player}
+                                   for player in match['player_stats']]
+    return summary
+
+
+def write_manifest(f, playlist_name, entries):
+    """
+    Write the manifest with one compact line per match: small enough to load
+    up front with thousands of games, and a run's git diff is one line per
+    changed match.
+    """
+    header = json.dumps({'version': MANIFEST_VERSION, 'playlist': playlist_name})
+    f.write(header[:-1] + ', "matches": [\n')
+    f.write(',\n'.join(json.dumps(entry, separators=(',', ':')) for entry in entries))
+    f.write('\n]}\n')
+
+
+def remove_match_shards(shard_dir):
+    """
+    Delete a playlist's manifest and the shards it lists (used when switching
+    back to single-file output, so the site doesn't read stale shards).
+
+    Returns:
+        List of deleted paths
+    """
+    manifest = load_manifest(shard_dir)
+    if manifest is None:
+        return []
+    removed = []
+    for entry in manifest.get('matches', []):
+        path = os.path.join(shard_dir, entry.get('file', ''))
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+    manifest_path = os.path.join(shard_dir, MANIFEST_NAME)
+    os.remove(manifest_path)
+    removed.append(manifest_path)
+    return removed
@@ -7,12 +7,28 @@ Supports multiple playlists based on active matches from the Discord bot:
 - Head to Head: 1v1 games
 """
 
-import pandas as pd
+import argparse
+import hashlib
 import json
 import os
-import requests
+import re
 import subprocess
-from datetime import datetime
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import bot_ipc
+import games_table
+import http_client
+import xlsx_reader
+from match_shards import MANIFEST_NAME, get_shard_dir, remove_match_shards, write_match_shards
+from rank_table import RankTable
+from stats_cache import FingerprintCache
+from stats_store import StatsStore
+from stats_scanner import scan_game_files
+from stats_watcher import create_watcher, wait_for_changes
+from xlsx_reader import Sheet
 
 # File paths
 STATS_DIR = 'stats'
@@ -20,6 +36,12 @@ STATS_DIR = 'stats'
 STATS_PUBLIC_DIR = '/home/carnagereport/stats/public'
 STATS_PRIVATE_DIR = '/home/carnagereport/stats/private'
 STATS_THEATER_DIR = '/home/carnagereport/stats/theater'
+# Directories searched for game workbooks, in priority order (a filename found in
+# more than one is taken from the first). Override with STATS_SOURCE_DIRS
+# (os.pathsep-separated) or --source-dir.
+STATS_SOURCE_DIRS = [d for d in os.environ.get('STATS_SOURCE_DIRS', '').split(os.pathsep) if d] or [
+    STATS_DIR, STATS_PUBLIC_DIR, STATS_PRIVATE_DIR
+]
 RANKSTATS_FILE = 'rankstats.json'  # Legacy - will be replaced by per-playlist stats
 RANKS_FILE = 'ranks.json'  # Simple discord_id -> rank mapping for bot
 PLAYLISTS_FILE = 'playlists.json'
@@ -32,13 +54,73 @@ RANKHISTORY_FILE = 'rankhistory.json'
 MANUAL_PLAYLISTS_FILE = 'manual_playlists.json'
 PROCESSED_STATE_FILE = 'processed_state.json'
 SERIES_FILE = 'series.json'
+# Players whose highest rank changed in the last run. The bot reads it too (the
+# refresh trigger's fallback), so both sides use the same absolute path -
+# override with BOT_RANK_CHANGES_FILE.
+RANK_CHANGES_FILE = os.environ.get('BOT_RANK_CHANGES_FILE', '/home/carnagereport/bot/rank_changes.json')
+# SQLite store recording every run's results (see stats_store.py) for lookups
+# and change detection. Each run still computes everything in memory and
+# writes the JSON files from that; the store is kept in step alongside.
+STATS_DB_FILE = os.environ.get('STATS_DB_FILE', 'stats.db')
+# Columnar per-player-per-game table for analysis (see games_table.py / stats_query.py)
+GAMES_TABLE_FILE = os.environ.get('STATS_GAMES_TABLE', 'games_table.npz')
+
+# On-disk cache of parsed games, keyed by file fingerprint (see stats_cache.py)
+GAME_CACHE_DIR = '.stats_cache/games'
+# Bump when parse_excel_file() or get_classification_inputs() output changes
+# (2: stream reader engine, 3: blank cells read as 'None', 4: blank cells read
+# as 'nan' again). Entries are also keyed by reader engine - see cache_version().
+GAME_CACHE_VERSION = 4
+# Parsed identity files (name -> MAC maps), same fingerprint cache
+IDENTITY_CACHE_DIR = '.stats_cache/identity'
+IDENTITY_CACHE_VERSION = 1
+# Step 3b XP journal: every ranked game's results plus a checkpoint of all
+# players' XP state every XP_CHECKPOINT_INTERVAL games, so a playlist change
+# only replays games from the last checkpoint before the first affected game
+XP_JOURNAL_FILE = '.stats_cache/xp_journal.json'
+XP_JOURNAL_VERSION = 1
+XP_CHECKPOINT_INTERVAL = 50
+# Workbooks that failed to parse, with the error (retried once the file changes)
+QUARANTINE_FILE = 'quarantine.json'
+
+# Parallel workbook ingestion (Step 2)
+DEFAULT_INGEST_WORKERS = os.cpu_count() or 1
+# Workbooks queued per worker at any time - bounds memory held by pending results
+INGEST_TASKS_PER_WORKER = 2
+
+# Workbook reader engine (see READER_ENGINES / --reader). 'pandas' goes through
+# pd.read_excel; 'stream' parses the sheet XML directly and never imports pandas.
+DEFAULT_READER_ENGINE = os.environ.get('STATS_READER_ENGINE', 'pandas')
+
+# Playlist match output (see --match-output). 'file' writes {playlist}_matches.json,
+# 'shards' writes one file per match plus a manifest under MATCH_SHARDS_DIR/<playlist>/
+# (see match_shards.py)
+MATCH_OUTPUT_MODES = ('file', 'shards')
+DEFAULT_MATCH_OUTPUT = os.environ.get('STATS_MATCH_OUTPUT', 'file')
+MATCH_SHARDS_DIR = 'matches'
+
+# --watch mode: wait this long after the last file change before processing,
+# but never longer than WATCH_MAX_DELAY_SECONDS after the first one
+WATCH_DEBOUNCE_SECONDS = 3.0
+WATCH_MAX_DELAY_SECONDS = 30.0
+# Directory scan interval when inotify isn't available
+WATCH_POLL_SECONDS = 2.0
 
 # Base URL for downloadable files on the VPS
 STATS_BASE_URL = 'http://104.207.143.249/stats'
 
-# Discord webhook for triggering bot rank refresh
+# Discord webhook for triggering bot rank refresh (used when the bot's local
+# control socket, bot_ipc.IPC_SOCKET_PATH, isn't reachable)
 DISCORD_REFRESH_WEBHOOK = 'https://discord.com/api/webhooks/1445741545318780958/Vp-tbL32JhMu36j7qxG704GbWcgrJE9-JIdhUrpMMfAx3fpsGv82Sxi5F3r0lepor4fq'
 DISCORD_TRIGGER_CHANNEL_ID = 1427929973125156924
+REFRESH_TRIGGER = '!refresh_ranks_trigger'
+# Hours between full rank refreshes (everyone instead of the run's changes).
+# The changes come from highest_rank in ranks.json, but the bot sets roles from
+# its own rankstats.json - a full refresh catches anything that moves a role
+# without moving ranks.json.
+FULL_RANK_REFRESH_HOURS = 24
+# Discord message length limit - longer ID lists are left to RANK_CHANGES_FILE
+DISCORD_MESSAGE_LIMIT = 2000
 
 # Default playlist name for 4v4 games (fallback)
 PLAYLIST_NAME = 'MLG 4v4'
@@ -121,6 +203,41 @@ def save_playlist_matches(playlist_name, matches_data):
     with open(files['matches'], 'w') as f:
         json.dump(matches_data, f, indent=2)
 
+def set_playlist_manifest_files(manifest_files):
+    """
+    Set or drop each playlist's manifest_file in playlists.json, so the site
+    only requests a shard manifest for playlists saved as shards (it falls
+    back to matches_file otherwise).
+
+    Args:
+        manifest_files: {playlist_name: manifest path, or None for a single matches file}
+
+    Returns:
+        True if playlists.json changed
+    """
+    try:
+        with open(PLAYLISTS_FILE, 'r') as f:
+            config = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    changed = False
+    for playlist in config.get('playlists', []):
+        if playlist.get('name') not in manifest_files:
+            continue
+        manifest_file = manifest_files[playlist['name']]
+        if playlist.get('manifest_file') == manifest_file:
+            continue
+        if manifest_file:
+            playlist['manifest_file'] = manifest_file
+        else:
+            playlist.pop('manifest_file', None)
+        changed = True
+    if changed:
+        with open(PLAYLISTS_FILE, 'w') as f:
+            json.dump(config, f, indent=2)
+            f.write('\n')
+    return changed
+
 def load_playlist_stats(playlist_name):
     """Load existing stats for a playlist."""
     files = get_playlist_files(playlist_name)
@@ -160,11 +277,19 @@ def get_team_signature(game):
     # Return as tuple with teams sorted to ensure consistent ordering
     return (red_team, blue_team)
 
-def detect_series(games, get_display_name_func):
+def detect_series(games, get_display_name_func, get_player_id_func=None):
     """
     Detect series from consecutive games with the same team composition.
     A series ends when the player/team composition changes.
 
+    Args:
+        games: Games of one playlist
+        get_display_name_func: In-game name -> display name
+        get_player_id_func: Optional in-game name -> Discord ID (or None). When
+            given, each series also gets '_player_ids': {'Red': set, 'Blue': set}
+            so results can be credited without mapping display names back to
+            IDs. Internal - pop it before saving.
+
     Returns:
         list of series dicts with:
         - series_id: unique identifier
@@ -196,6 +321,13 @@ def detect_series(games, get_display_name_func):
         # Get team names
         red_team = sorted([get_display_name_func(p['name']) for p in game['players'] if p.get('team') == 'Red'])
         blue_team = sorted([get_display_name_func(p['name']) for p in game['players'] if p.get('team') == 'Blue'])
+        team_ids = None
+        if get_player_id_func:
+            team_ids = {'Red': set(), 'Blue': set()}
+            for p in game['players']:
+                player_id = get_player_id_func(p['name'])
+                if player_id and p.get('team') in team_ids:
+                    team_ids[p.get('team')].add(player_id)
 
         # Determine which team won this game
         red_team_lower = [n.lower() for n in red_team]
@@ -223,6 +355,9 @@ def detect_series(games, get_display_name_func):
                 'source_file': game.get('source_file', '')
             })
             current_series['end_time'] = game['details'].get('Start Time', '')
+            if team_ids:
+                for team, ids in team_ids.items():
+                    current_series['_player_ids'][team] |= ids
 
             if game_winner == 'Red':
                 current_series['red_wins'] += 1
@@ -259,6 +394,8 @@ def detect_series(games, get_display_name_func):
                 'winner': 'Ongoing',
                 'series_type': 'Custom'
             }
+            if team_ids:
+                current_series['_player_ids'] = team_ids
 
     # Don't forget the last series
     if current_series:
@@ -302,20 +439,6 @@ def _finalize_series(series):
     else:
         series['winner'] = 'Tie'  # Equal wins when series ended
 
-def get_loss_factor(rank, loss_factors):
-    """Get the loss factor for a given rank. Lower ranks lose less XP."""
-    rank_str = str(rank)
-    if rank >= 30:
-        return 1.0  # Full loss penalty
-    return loss_factors.get(rank_str, 1.0)
-
-def get_win_factor(rank, win_factors):
-    """Get the win factor for a given rank. Higher ranks gain less XP."""
-    rank_str = str(rank)
-    if rank <= 40:
-        return 1.0  # Full win bonus
-    return win_factors.get(rank_str, 0.50)
-
 def load_xp_config():
     """Load XP configuration for ranking."""
     with open(XP_CONFIG_FILE, 'r') as f:
@@ -392,18 +515,26 @@ def load_manual_playlists():
     except:
         return {}
 
-def load_processed_state():
+def load_processed_state(store=None):
     """
-    Load processed_state.json which tracks what has been processed.
+    Load the processed state which tracks what has been processed (from the
+    stats store, else processed_state.json).
 
     Format:
     {
         "games": {
             "filename.xlsx": "playlist_or_null"
         },
-        "manual_playlists_hash": "hash_of_manual_playlists_json"
+        "manual_playlists_hash": "hash_of_manual_playlists_json",
+        "session_files": {
+            "filename_identity.xlsx": [size, mtime]
+        }
     }
     """
+    if store is not None:
+        state = store.get_meta('processed_state')
+        if state is not None:
+            return state
     try:
         with open(PROCESSED_STATE_FILE, 'r') as f:
             return json.load(f)
@@ -415,21 +546,206 @@ def save_processed_state(state):
     with open(PROCESSED_STATE_FILE, 'w') as f:
         json.dump(state, f, indent=2)
 
+def get_temp_player_id(player_name):
+    """
+    Placeholder user ID for a player not matched to a Discord account. Derived
+    from a SHA-1 of the name (not hash(), which changes per process), so the
+    same player keeps the same ID across runs.
+    """
+    return str(int(hashlib.sha1(player_name.encode('utf-8')).hexdigest(), 16) % 10**18)
+
+def save_rank_changes(version, changes):
+    """
+    Save the run's highest rank changes for the bot.
+
+    Args:
+        version: Run number, also sent in the refresh trigger
+        changes: {user_id: (old highest_rank or None, new highest_rank)}
+    """
+    data = {
+        'version': version,
+        'generated_at': datetime.now().isoformat(),
+        'changes': {user_id: {'old': old, 'new': new} for user_id, (old, new) in changes.items()}
+    }
+    with open(RANK_CHANGES_FILE, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def build_refresh_trigger(version, user_ids):
+    """
+    Refresh trigger message: '!refresh_ranks_trigger v=<version> ids=<id>,<id>,...'
+
+    The bot refreshes only the listed members. If the IDs don't fit in one
+    message they're left out and the bot reads them from RANK_CHANGES_FILE
+    (matching the version).
+    """
+    content = f"{REFRESH_TRIGGER} v={version}"
+    with_ids = f"{content} ids={','.join(user_ids)}"
+    return with_ids if len(with_ids) <= DISCORD_MESSAGE_LIMIT else content
+
+def merge_pending_rank_changes(pending, changes):
+    """
+    Add rank changes the bot never received (a failed trigger) to this run's.
+
+    Args:
+        pending: {user_id: [old, new]} undelivered from earlier runs (store meta)
+        changes: {user_id: (old, new)} from this run
+
+    Returns:
+        {user_id: (old, new)} - a player in both keeps the undelivered old rank
+    """
+    merged = {user_id: tuple(change) for user_id, change in pending.items()}
+    for user_id, (old, new) in changes.items():
+        if user_id in merged:
+            old = merged[user_id][0]
+        merged[user_id] = (old, new)
+    return merged
+
+def full_rank_refresh_due(store, now):
+    """True if the last full rank refresh was FULL_RANK_REFRESH_HOURS ago (or never)."""
+    last = store.get_meta('last_full_rank_refresh')
+    return last is None or now - datetime.fromisoformat(last) >= timedelta(hours=FULL_RANK_REFRESH_HOURS)
+
+def notify_bot_ipc(version, changed_ids, summary=None):
+    """
+    Send the run's status and rank refresh to the bot over its local control
+    socket (see bot_ipc.py). changed_ids=None refreshes everyone.
+
+    Returns:
+        True if the bot got them, False if the webhook should be used instead
+    """
+    print("\nNotifying Discord bot over its control socket...")
+    try:
+        if summary is not None:
+            bot_ipc.send_command('publish-status', dict(summary, version=version,
+                                                        finished_at=datetime.now().isoformat()))
+        if changed_ids is None:
+            result = bot_ipc.send_command('refresh-ranks')
+            print(f"  Full rank refresh queued for {result.get('queued', 0)} player(s)")
+        elif changed_ids:
+            result = bot_ipc.send_command('refresh-ranks', {'ids': changed_ids})
+            print(f"  Rank refresh queued for {result.get('queued', 0)} player(s)")
+        else:
+            print("  No highest rank changes - no rank refresh needed")
+        return True
+    except bot_ipc.BotIpcError as e:
+        print(f"  {e} - falling back to the Discord webhook")
+        return False
+
+def send_refresh_webhook(version, changed_ids):
+    """
+    Post the rank refresh trigger for changed_ids to the bot's Discord channel
+    (a bare trigger, which refreshes everyone, for changed_ids=None).
+
+    Returns:
+        True if Discord accepted it (or there was nothing to send)
+    """
+    if changed_ids is None:
+        print("\nTriggering Discord bot rank refresh for everyone...")
+        content = REFRESH_TRIGGER
+    elif not changed_ids:
+        print("\nNo highest rank changes - skipping Discord bot rank refresh")
+        return True
+    else:
+        print(f"\nTriggering Discord bot rank refresh for {len(changed_ids)} player(s)...")
+        content = build_refresh_trigger(version, changed_ids)
+    try:
+        response = http_client.get_client().post(DISCORD_REFRESH_WEBHOOK, json={"content": content})
+        if response.status_code == 204:
+            print("  Discord webhook sent successfully!")
+            return True
+        print(f"  Warning: Webhook returned status {response.status_code}")
+    except Exception as e:
+        print(f"  Error sending webhook: {e}")
+    return False
+
+def trigger_rank_refresh(store, version, changed_ids, summary=None):
+    """
+    Ask the bot to refresh the ranks in changed_ids - over its control socket,
+    or the Discord webhook if that's down. Every FULL_RANK_REFRESH_HOURS it
+    refreshes everyone instead.
+
+    The changes stay in the store's 'pending_rank_changes' until the bot has
+    them, so a failed trigger is retried with the next run's changes.
+
+    Returns:
+        True if the bot got the trigger
+    """
+    now = datetime.now()
+    full_refresh = full_rank_refresh_due(store, now)
+    refresh_ids = None if full_refresh else changed_ids
+    if not (notify_bot_ipc(version, refresh_ids, summary) or send_refresh_webhook(version, refresh_ids)):
+        print(f"  {len(changed_ids)} rank change(s) kept for the next run")
+        return False
+    with store.transaction():
+        store.set_meta('pending_rank_changes', {})
+        if full_refresh:
+            store.set_meta('last_full_rank_refresh', now.isoformat())
+    return True
+
+def get_player_game_rows(game, winners, losers, player_to_id):
+    """Rows for the stats store's player_games table (one per player in the game)."""
+    rows = []
+    for p in game['players']:
+        player_name = p['name']
+        result = 'win' if player_name in winners else 'loss' if player_name in losers else 'tie'
+        rows.append({
+            'player_name': player_name,
+            'user_id': player_to_id.get(player_name),
+            'team': p.get('team', ''),
+            'kills': p.get('kills', 0),
+            'deaths': p.get('deaths', 0),
+            'assists': p.get('assists', 0),
+            'result': result
+        })
+    return rows
+
 def get_manual_playlists_hash(manual_playlists):
     """Get a hash of manual_playlists to detect changes"""
-    import hashlib
     content = json.dumps(manual_playlists, sort_keys=True)
     return hashlib.md5(content.encode()).hexdigest()
 
-def check_for_changes(stats_files, manual_playlists, processed_state):
+def get_session_file_fingerprints(identity_dir):
+    """
+    (size, mtime) of every identity file in identity_dir and theater file in
+    STATS_THEATER_DIR. Games' players are resolved through their session's
+    identity file and their theater links depend on the theater files, and
+    either can be uploaded after the game itself.
+
+    Returns:
+        {filename: [size, mtime]}
+    """
+    fingerprints = {}
+    for directory, is_session_file in ((identity_dir, lambda name: IdentityIndex.SUFFIX in name),
+                                       (STATS_THEATER_DIR, lambda name: name.endswith('.csv'))):
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if not is_session_file(entry.name):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                fingerprints[entry.name] = [st.st_size, st.st_mtime]
+    return fingerprints
+
+def check_for_changes(stats_files, manual_playlists, processed_state, session_files=None):
     """
     Check what needs to be processed.
 
+    Args:
+        session_files: get_session_file_fingerprints() result
+
     Returns:
-        (needs_full_rebuild, new_files, changed_playlists)
+        (needs_full_rebuild, new_files, changed_playlists, changed_session_files)
         - needs_full_rebuild: True if we need to recalc everything
         - new_files: List of new game files to process
         - changed_playlists: Dict of files whose playlist changed
+        - changed_session_files: Identity/theater files added, changed or removed
+          since the last run (the games are re-resolved, XP isn't rebuilt)
     """
     old_games = processed_state.get("games", {})
     old_hash = processed_state.get("manual_playlists_hash", "")
@@ -453,15 +769,172 @@ def check_for_changes(stats_files, manual_playlists, processed_state):
     # (because XP calculations depend on game order and player rank at time)
     needs_full_rebuild = len(changed_playlists) > 0
 
-    return needs_full_rebuild, new_files, changed_playlists
+    old_session_files = processed_state.get("session_files", {})
+    session_files = session_files or {}
+    changed_session_files = sorted(
+        filename for filename in set(old_session_files) | set(session_files)
+        if old_session_files.get(filename) != session_files.get(filename)
+    )
+
+    return needs_full_rebuild, new_files, changed_playlists, changed_session_files
+
+
+def get_xp_config_hash(xp_config):
+    """Hash of xp_config.json - XP checkpoints are only reused while it's unchanged."""
+    content = json.dumps(xp_config, sort_keys=True)
+    return hashlib.md5(content.encode()).hexdigest()
+
+def get_xp_game_key(game, winners, losers):
+    """Hash of everything a ranked game's XP results depend on (file, playlist, players, result)."""
+    content = json.dumps([
+        game.get('source_file'), game.get('playlist'),
+        [player['name'] for player in game['players']], winners, losers
+    ])
+    return hashlib.md5(content.encode()).hexdigest()
+
+def load_xp_journal(config_hash):
+    """
+    Load the XP journal written by the last run, or None if it's missing or
+    was built with a different xp_config.json / journal version.
+
+    Format:
+    {
+        "version": XP_JOURNAL_VERSION,
+        "config_hash": "hash_of_xp_config",
+        "games": [{"key": "game_key", "players": [[rank_before, xp_change, xp_total, rank_after, result] or null, ...]}],
+        "checkpoints": [{"index": n, "state": {player_name: {field: {playlist: value}}}}]
+    }
+    games is in Step 3b processing order; a checkpoint holds the XP state before games[index].
+    """
+    try:
+        with open(XP_JOURNAL_FILE, 'r') as f:
+            journal = json.load(f)
+    except:
+        return None
+    if journal.get('version') != XP_JOURNAL_VERSION or journal.get('config_hash') != config_hash:
+        return None
+    return journal
+
+def save_xp_journal(journal):
+    """Save the XP journal (see load_xp_journal)."""
+    os.makedirs(os.path.dirname(XP_JOURNAL_FILE), exist_ok=True)
+    with open(XP_JOURNAL_FILE, 'w') as f:
+        json.dump(journal, f)
 
+def parse_replay_from(value):
+    """
+    --replay-from argument: a date (YYYY-MM-DD or YYYYMMDD) or a game file name.
+    Returns the filename timestamp prefix to compare game files against.
+    """
+    name = os.path.basename(value).replace('.xlsx', '')
+    if re.match(r'^\d{8}(_\d{6})?$', name):
+        return name
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y%m%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, YYYYMMDD or a game file name, got '{value}'")
 
-def load_player_state_from_processed(processed_state):
+def find_xp_replay_start(journal, game_keys, source_files, replay_from=None):
     """
-    Load saved player XP/rank state from processed_state.json.
-    Returns dict of {user_id: {playlist: {'xp': int, 'rank': int, ...}}}
+    Work out where the XP replay has to start.
+
+    The first ranked game whose key differs from the journal (a playlist change,
+    a new game, ...) - or the first game at/after replay_from - is the earliest
+    affected game. The replay resumes from the last checkpoint at or before it.
+
+    Args:
+        journal: Previous XP journal (or None)
+        game_keys: get_xp_game_key() for each ranked game, in processing order
+        source_files: Source file for each ranked game, in processing order
+        replay_from: Optional filename timestamp prefix (see parse_replay_from)
+
+    Returns:
+        (start_index, checkpoint) - checkpoint is None when replaying from the first game
     """
-    return processed_state.get("player_state", {})
+    if not journal:
+        return 0, None
+
+    old_keys = [game['key'] for game in journal.get('games', [])]
+    first_changed = 0
+    while (first_changed < min(len(old_keys), len(game_keys))
+           and old_keys[first_changed] == game_keys[first_changed]):
+        first_changed += 1
+
+    if replay_from:
+        for i, source_file in enumerate(source_files[:first_changed]):
+            if source_file >= replay_from:
+                first_changed = i
+                break
+
+    usable = [cp for cp in journal.get('checkpoints', []) if 0 < cp['index'] <= first_changed]
+    if not usable:
+        return 0, None
+    checkpoint = max(usable, key=lambda cp: cp['index'])
+    return checkpoint['index'], checkpoint
+
+def snapshot_xp_state(xp_tables):
+    """Copy the per-player, per-playlist XP state (players without ranked games are left out)."""
+    state = {}
+    for player_name, playlists in xp_tables['xp'].items():
+        if playlists:
+            state[player_name] = {field: dict(table[player_name]) for field, table in xp_tables.items()}
+    return state
+
+def restore_xp_state(xp_tables, state):
+    """Load a snapshot_xp_state() checkpoint back into the XP tables."""
+    for player_name, fields in state.items():
+        if player_name in xp_tables['xp']:
+            for field, values in fields.items():
+                xp_tables[field][player_name] = dict(values)
+
+def get_game_timestamp(game):
+    """Game end time as an ISO timestamp for rankhistory ("MM/DD/YYYY HH:MM" -> "YYYY-MM-DDTHH:MM:00")."""
+    game_end_time = game['details'].get('End Time', '')
+    try:
+        if game_end_time and '/' in game_end_time:
+            dt = datetime.strptime(game_end_time, '%m/%d/%Y %H:%M')
+            return dt.strftime('%Y-%m-%dT%H:%M:00')
+        return game_end_time
+    except:
+        return game_end_time
+
+def make_rankhistory_entry(game, game_timestamp, result_record):
+    """rankhistory.json entry for one player's result (an XP journal record) in a ranked game."""
+    rank_before, xp_change, xp_total, rank_after, game_result = result_record
+    return {
+        'timestamp': game_timestamp,
+        'source_file': game.get('source_file'),
+        'map': game['details'].get('Map Name', 'Unknown'),
+        'gametype': game['details'].get('Variant Name', 'Unknown'),
+        'playlist': game.get('playlist'),
+        'xp_change': xp_change,
+        'xp_total': xp_total,
+        'rank_before': rank_before,
+        'rank_after': rank_after,
+        'result': game_result
+    }
+
+def add_rankhistory_entry(rankhistory, rankstats, user_id, player_name, entry):
+    """Append to a user's rank history (created with their discord_name on first use)."""
+    if user_id not in rankhistory:
+        discord_name = rankstats.get(user_id, {}).get('discord_name', player_name)
+        rankhistory[user_id] = {
+            'discord_name': discord_name,
+            'history': []
+        }
+    rankhistory[user_id]['history'].append(entry)
+
+def apply_xp_journal_game(game, player_results, rankhistory, rankstats, player_to_id):
+    """Re-apply a ranked game's recorded XP results (pre_game_rank, rank history) without replaying it."""
+    game_timestamp = get_game_timestamp(game)
+    for player, result_record in zip(game['players'], player_results):
+        if result_record is None:
+            continue
+        player['pre_game_rank'] = result_record[0]
+        user_id = player_to_id.get(player['name'])
+        if user_id:
+            entry = make_rankhistory_entry(game, game_timestamp, result_record)
+            add_rankhistory_entry(rankhistory, rankstats, user_id, player['name'], entry)
 
 def is_dedicated_server(player_name):
     """Check if a player name is a dedicated server (not a real player)."""
@@ -521,12 +994,84 @@ def parse_duration_seconds(duration_str):
         pass
     return 0
 
+def dataframe_to_sheet(df):
+    """Convert a DataFrame into an xlsx_reader.Sheet (NaN -> None, numpy scalars -> Python values)."""
+    values = df.astype(object).where(df.notna(), None)
+    return Sheet(list(df.columns), list(values.itertuples(index=False, name=None)))
+
+def read_workbook_pandas(file_path):
+    """Read every sheet with pd.read_excel. pandas is imported here so the stream engine never loads it."""
+    import pandas as pd
+    return {name: dataframe_to_sheet(df) for name, df in pd.read_excel(file_path, sheet_name=None).items()}
+
+def read_first_sheet_pandas(file_path):
+    """Read the first sheet with pd.read_excel."""
+    import pandas as pd
+    return dataframe_to_sheet(pd.read_excel(file_path))
+
+READER_ENGINES = {
+    'pandas': {'workbook': read_workbook_pandas, 'first_sheet': read_first_sheet_pandas},
+    'stream': {'workbook': xlsx_reader.read_workbook, 'first_sheet': xlsx_reader.read_first_sheet},
+}
+
+def cache_version(version, engine=None):
+    """Cache entry version for data read with a reader engine ('3-pandas')."""
+    return f"{version}-{engine or DEFAULT_READER_ENGINE}"
+
+def get_reader_engine(engine=None):
+    """Look up a reader engine by name (None = DEFAULT_READER_ENGINE)."""
+    name = engine or DEFAULT_READER_ENGINE
+    if name not in READER_ENGINES:
+        raise ValueError(f"Unknown reader engine '{name}' (expected one of: {', '.join(READER_ENGINES)})")
+    return READER_ENGINES[name]
+
+class WorkbookSnapshot:
+    """
+    Every sheet of a game workbook, read in a single pass.
+
+    A game .xlsx used to be reopened by each classification helper and again by
+    parse_excel_file. Loading a snapshot once and passing it to determine_playlist(),
+    is_4v4_team_game() and parse_excel_file() keeps the rest of the run in memory.
+    """
+
+    def __init__(self, file_path, sheets):
+        self.file_path = file_path
+        self.sheets = sheets
+
+    @classmethod
+    def load(cls, file_path, engine=None):
+        """Read all sheets of the workbook at file_path with the given reader engine."""
+        return cls(file_path, get_reader_engine(engine)['workbook'](file_path))
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file_path)
+
+    def sheet(self, name):
+        """Get a sheet by name (raises ValueError if it's missing)."""
+        if name not in self.sheets:
+            raise ValueError(f"Worksheet named '{name}' not found")
+        return self.sheets[name]
+
+    def game_details_row(self):
+        """First row of 'Game Details' as a dict, or None if the sheet is empty."""
+        game_details = self.sheet('Game Details')
+        if len(game_details) > 0:
+            return dict(zip(game_details.columns, game_details.rows[0]))
+        return None
+
+
+def load_workbook_snapshot(source, engine=None):
+    """Accept either a file path or an existing WorkbookSnapshot and return a snapshot."""
+    if isinstance(source, WorkbookSnapshot):
+        return source
+    return WorkbookSnapshot.load(source, engine)
+
 def get_game_duration_seconds(file_path):
     """Get game duration in seconds from Game Details sheet."""
     try:
-        game_details_df = pd.read_excel(file_path, sheet_name='Game Details')
-        if len(game_details_df) > 0:
-            row = game_details_df.iloc[0]
+        row = load_workbook_snapshot(file_path).game_details_row()
+        if row is not None:
             duration = str(row.get('Duration', '0:00'))
             return parse_duration_seconds(duration)
     except:
@@ -541,7 +1086,7 @@ def is_game_long_enough(file_path):
 def get_game_player_count(file_path):
     """Get the number of players in a game from the Post Game Report."""
     try:
-        post_df = pd.read_excel(file_path, sheet_name='Post Game Report')
+        post_df = load_workbook_snapshot(file_path).sheet('Post Game Report')
         return len(post_df)
     except:
         return 0
@@ -549,8 +1094,8 @@ def get_game_player_count(file_path):
 def is_team_game(file_path):
     """Check if a game has Red and Blue teams."""
     try:
-        post_df = pd.read_excel(file_path, sheet_name='Post Game Report')
-        teams = post_df['team'].unique().tolist()
+        post_df = load_workbook_snapshot(file_path).sheet('Post Game Report')
+        teams = set(post_df.column('team'))
         return 'Red' in teams and 'Blue' in teams
     except:
         return False
@@ -558,8 +1103,8 @@ def is_team_game(file_path):
 def get_game_players(file_path):
     """Get list of player names from the game."""
     try:
-        post_df = pd.read_excel(file_path, sheet_name='Post Game Report')
-        return [str(row.get('name', '')).strip() for _, row in post_df.iterrows() if row.get('name')]
+        post_df = load_workbook_snapshot(file_path).sheet('Post Game Report')
+        return [str(row.get('name', '')).strip() for row in post_df.records() if row.get('name')]
     except:
         return []
 
@@ -586,34 +1131,20 @@ def players_match_active_match(game_players, active_match):
     # At least 75% of game players should be in active match
     return matches >= len(game_players) * 0.75
 
-def determine_playlist(file_path, active_match=None, manual_playlists=None):
+def get_classification_inputs(file_path):
     """
-    Determine the appropriate playlist for a game based on:
-    1. Manual override from manual_playlists.json (highest priority)
-    2. Game duration (must be >= 2 minutes to filter restarts)
-    3. Active match from Discord bot (if any)
+    Collect everything determine_playlist needs to know about a workbook.
 
-    Returns: playlist name string or None if game doesn't qualify for any playlist
+    The result is cached alongside the parsed game (see GAME_CACHE_DIR) so a cached
+    game can be classified against the current active match and manual playlists
+    without opening the file again.
     """
-    # Check manual override first (highest priority)
-    if manual_playlists:
-        filename = os.path.basename(file_path)
-        if filename in manual_playlists:
-            return manual_playlists[filename]
-
-    # Filter out short games (restarts)
-    if not is_game_long_enough(file_path):
-        return None
-
-    player_count = get_game_player_count(file_path)
-    is_team = is_team_game(file_path)
-    game_players = get_game_players(file_path)
+    snapshot = load_workbook_snapshot(file_path)
 
     # Get map and base gametype from game details
     try:
-        game_details_df = pd.read_excel(file_path, sheet_name='Game Details')
-        if len(game_details_df) > 0:
-            row = game_details_df.iloc[0]
+        row = snapshot.game_details_row()
+        if row is not None:
             map_name = str(row.get('Map Name', '')).strip()
             base_gametype = str(row.get('Game Type', '')).strip()  # Use base gametype, not variant
         else:
@@ -623,6 +1154,34 @@ def determine_playlist(file_path, active_match=None, manual_playlists=None):
         map_name = ''
         base_gametype = ''
 
+    return {
+        'duration_seconds': get_game_duration_seconds(snapshot),
+        'player_count': get_game_player_count(snapshot),
+        'is_team': is_team_game(snapshot),
+        'players': get_game_players(snapshot),
+        'map_name': map_name,
+        'base_gametype': base_gametype
+    }
+
+def classify_game(filename, inputs, active_match=None, manual_playlists=None):
+    """
+    Pick a playlist for a game from its classification inputs.
+    See determine_playlist() for the rules.
+    """
+    # Check manual override first (highest priority)
+    if manual_playlists and filename in manual_playlists:
+        return manual_playlists[filename]
+
+    # Filter out short games (restarts)
+    if inputs['duration_seconds'] < MIN_GAME_DURATION_SECONDS:
+        return None
+
+    player_count = inputs['player_count']
+    is_team = inputs['is_team']
+    game_players = inputs['players']
+    map_name = inputs['map_name']
+    base_gametype = inputs['base_gametype']
+
     # If there's an active match, check if this game matches it
     if active_match:
         active_playlist = active_match.get('playlist', '')
@@ -648,6 +1207,33 @@ def determine_playlist(file_path, active_match=None, manual_playlists=None):
     # Games MUST have a bot session to be tagged with a playlist
     return None
 
+def determine_playlist(file_path, active_match=None, manual_playlists=None):
+    """
+    Determine the appropriate playlist for a game based on:
+    1. Manual override from manual_playlists.json (highest priority)
+    2. Game duration (must be >= 2 minutes to filter restarts)
+    3. Active match from Discord bot (if any)
+
+    file_path may also be a WorkbookSnapshot, in which case no file is read.
+
+    Returns: playlist name string or None if game doesn't qualify for any playlist
+    """
+    if isinstance(file_path, WorkbookSnapshot):
+        filename = file_path.filename
+    else:
+        filename = os.path.basename(file_path)
+
+    # Manual overrides don't need the workbook at all
+    if manual_playlists and filename in manual_playlists:
+        return manual_playlists[filename]
+
+    try:
+        inputs = get_classification_inputs(file_path)
+    except:
+        return None
+
+    return classify_game(filename, inputs, active_match, manual_playlists)
+
 def build_mac_to_discord_lookup(players):
     """
     Build a lookup from MAC address to Discord user_id from players.json.
@@ -663,15 +1249,15 @@ def build_mac_to_discord_lookup(players):
     return mac_to_user
 
 
-def parse_identity_file(identity_path):
+def parse_identity_file(identity_path, engine=None):
     """
     Parse an identity XLSX file and return a mapping of in-game name to MAC address.
     Identity files contain: Player Name, Xbox Identifier, Machine Identifier (MAC)
     """
     try:
-        df = pd.read_excel(identity_path)
+        sheet = get_reader_engine(engine)['first_sheet'](identity_path)
         name_to_mac = {}
-        for _, row in df.iterrows():
+        for row in sheet.records():
             player_name = str(row.get('Player Name', '')).strip()
             # Machine Identifier is the MAC address (without colons)
             mac = str(row.get('Machine Identifier', '')).strip().lower()
@@ -683,44 +1269,111 @@ def parse_identity_file(identity_path):
         return {}
 
 
+class IdentityIndex:
+    """
+    The identity files of one directory, listed once per run.
+
+    Timestamps are kept sorted so the session file for a game is found with a
+    bisect instead of a directory listing and linear scan per game. Parsed
+    name -> MAC maps come from a FingerprintCache, so an identity file is only
+    re-parsed when its contents change.
+    """
+
+    SUFFIX = '_identity.xlsx'
+
+    def __init__(self, identity_dir, identity_files):
+        """
+        Args:
+            identity_dir: Directory the identity files live in
+            identity_files: List of (filename, os.stat_result or None)
+        """
+        self.identity_dir = identity_dir
+        entries = sorted((filename.replace(self.SUFFIX, ''), filename, st) for filename, st in identity_files)
+        self.timestamps = [timestamp for timestamp, _, _ in entries]
+        self.identity_files = [filename for _, filename, _ in entries]
+        self._stats = {filename: st for _, filename, st in entries}
+        self.mappings = {}  # {identity_file: {name_lower: mac}}
+        self.combined = {}  # every mapping merged, for games without a session file
+
+    @classmethod
+    def scan(cls, identity_dir):
+        """List the identity files in identity_dir (a missing directory gives an empty index)."""
+        identity_files = []
+        if identity_dir and os.path.exists(identity_dir):
+            with os.scandir(identity_dir) as it:
+                for entry in it:
+                    if cls.SUFFIX in entry.name:
+                        try:
+                            identity_files.append((entry.name, entry.stat()))
+                        except OSError:
+                            identity_files.append((entry.name, None))
+        return cls(identity_dir, identity_files)
+
+    def load_mappings(self, cache=None, engine=None):
+        """
+        Parse every identity file (or take it from the cache) into self.mappings.
+
+        Args:
+            cache: Optional FingerprintCache for parsed name -> MAC maps
+            engine: Workbook reader engine name (see READER_ENGINES)
+        """
+        for identity_file in self.identity_files:
+            identity_path = os.path.join(self.identity_dir, identity_file)
+            st = self._stats.get(identity_file)
+            name_to_mac = None
+            if cache is not None and st is not None:
+                name_to_mac = cache.get(identity_path, st)
+            if name_to_mac is None:
+                name_to_mac = parse_identity_file(identity_path, engine)
+                if cache is not None and st is not None:
+                    cache.put(identity_path, name_to_mac, st)
+            self.mappings[identity_file] = name_to_mac
+            print(f"    {identity_file}: {len(name_to_mac)} player(s)")
+
+        self.combined = {}
+        for mapping in self.mappings.values():
+            self.combined.update(mapping)
+        return self
+
+    def identity_file_for(self, game_file):
+        """
+        Filename of the identity file for a game's session: the most recent one
+        with timestamp <= the game's, else the earliest. None if there are none.
+        """
+        if not self.identity_files:
+            return None
+        game_timestamp = os.path.basename(game_file).replace('.xlsx', '')
+        i = bisect_right(self.timestamps, game_timestamp)
+        return self.identity_files[i - 1] if i else self.identity_files[0]
+
+    def mapping_for(self, game_file):
+        """name -> MAC map for a game (combined map when there is no identity file)."""
+        identity_file = self.identity_file_for(game_file)
+        if identity_file is None:
+            return self.combined
+        return self.mappings.get(identity_file, {})
+
+
 def get_identity_file_for_game(game_file, identity_dir=None):
     """
     Find the corresponding identity file for a game file.
     Game files: 20251128_201839.xlsx
     Identity files: 20251128_074332_identity.xlsx (use closest timestamp before game)
 
+    Lists the directory on every call - when resolving many games use an
+    IdentityIndex instead.
+
     Args:
         game_file: Path to the game file
         identity_dir: Directory to search for identity files (optional, defaults to game's dir)
     """
-    game_basename = os.path.basename(game_file)
-    game_timestamp = game_basename.replace('.xlsx', '')
-
     # Look for identity files in the specified directory, or game's directory as fallback
     if identity_dir and os.path.exists(identity_dir):
         search_dir = identity_dir
     else:
         search_dir = os.path.dirname(game_file) or STATS_DIR
 
-    if not os.path.exists(search_dir):
-        return None
-
-    identity_files = sorted([f for f in os.listdir(search_dir) if '_identity.xlsx' in f])
-
-    if not identity_files:
-        return None
-
-    # Find the most recent identity file with timestamp <= game timestamp
-    best_identity = None
-    for identity_file in identity_files:
-        identity_timestamp = identity_file.replace('_identity.xlsx', '')
-        if identity_timestamp <= game_timestamp:
-            best_identity = identity_file
-
-    # If no identity file before, use the earliest one
-    if not best_identity and identity_files:
-        best_identity = identity_files[0]
-
+    best_identity = IdentityIndex.scan(search_dir).identity_file_for(game_file)
     return os.path.join(search_dir, best_identity) if best_identity else None
 
 
@@ -755,7 +1408,101 @@ def build_profile_lookup(players):
     return profile_to_user
 
 
-def resolve_player_to_discord(player_name, identity_name_to_mac, mac_to_discord, profile_lookup, rankstats):
+def normalize_player_name(player_name):
+    """
+    Name variants used for matching, most specific first.
+
+    Returns:
+        (raw, lower, stripped, no_spaces) - raw keeps case for PUA/symbol names,
+        stripped drops Unicode invisible characters and punctuation
+    """
+    name_raw = player_name.strip()
+    name_lower = name_raw.lower()
+    name_stripped = ''.join(c for c in name_lower if c.isalnum() or c.isspace()).strip()
+    return name_raw, name_lower, name_stripped, name_stripped.replace(' ', '')
+
+
+def build_discord_name_lookup(rankstats):
+    """Build a lookup from lowercase discord_name to user_id (first entry wins, like a scan would)."""
+    discord_name_to_user = {}
+    for user_id, data in rankstats.items():
+        discord_name_to_user.setdefault((data.get('discord_name') or '').lower(), user_id)
+    return discord_name_to_user
+
+
+class PlayerResolver:
+    """
+    Resolves in-game names to Discord IDs, built once per run.
+
+    The profile/alias and discord_name lookups are plain dicts, normalized name
+    variants are computed once per name, and resolved IDs are memoized per
+    (name, identity file), so a name that matches nothing (usually a guest)
+    costs a few dict lookups instead of a scan over every rankstats entry.
+    """
+
+    def __init__(self, identity_index, mac_to_discord, profile_lookup, rankstats):
+        """
+        Args:
+            identity_index: IdentityIndex with its mappings loaded
+            mac_to_discord: MAC -> Discord ID (build_mac_to_discord_lookup)
+            profile_lookup: stats_profile/display_name/alias -> Discord ID (build_profile_lookup)
+            rankstats: rankstats dict (entries added later go through register())
+        """
+        self.identity_index = identity_index
+        self.mac_to_discord = mac_to_discord
+        self.profile_lookup = profile_lookup
+        self.rankstats = rankstats
+        self.discord_names = build_discord_name_lookup(rankstats)
+        self._variants = {}  # {player_name: normalize_player_name(player_name)}
+        self._resolved = {}  # {(player_name, identity_file): user_id}
+
+    def variants(self, player_name):
+        """normalize_player_name(), cached per name."""
+        variants = self._variants.get(player_name)
+        if variants is None:
+            variants = self._variants[player_name] = normalize_player_name(player_name)
+        return variants
+
+    def register(self, user_id, discord_name):
+        """Index a rankstats entry created during the run (e.g. a temp ID for an unmatched player)."""
+        self.discord_names.setdefault((discord_name or '').lower(), user_id)
+
+    def resolve(self, player_name, game_file):
+        """
+        Resolve a player's in-game name to their Discord ID.
+
+        Args:
+            player_name: Name from the game workbook
+            game_file: Path of the game (picks the session identity file)
+
+        Returns:
+            Discord ID, or None if nothing matched
+        """
+        identity_file = self.identity_index.identity_file_for(game_file)
+        key = (player_name, identity_file)
+        user_id = self._resolved.get(key)
+        if user_id is None:
+            user_id = resolve_player_to_discord(
+                player_name, self.identity_index.mapping_for(game_file), self.mac_to_discord,
+                self.profile_lookup, self.rankstats, discord_names=self.discord_names,
+                variants=self.variants(player_name)
+            )
+            # Misses aren't memoized: register() can make them resolvable later
+            if user_id is not None:
+                self._resolved[key] = user_id
+        return user_id
+
+    def find_player(self, name):
+        """find_player_by_name() using the prebuilt lookups."""
+        name_lower = name.lower().strip()
+        user_id = self.profile_lookup.get(name_lower)
+        if user_id is not None and user_id in self.rankstats:
+            return user_id
+        return self.discord_names.get(name_lower)
+
+
+def resolve_player_to_discord(player_name, identity_name_to_mac, mac_to_discord, profile_lookup, rankstats,
+                              discord_names=None, variants=None):
     """
     Resolve a player's in-game name to their Discord ID using multiple methods.
 
@@ -764,25 +1511,21 @@ def resolve_player_to_discord(player_name, identity_name_to_mac, mac_to_discord,
     1. Identity file MAC -> Discord ID (most reliable)
     2. Profile lookup from players.json aliases
     3. Discord name match in rankstats
+
+    Args:
+        discord_names: Optional prebuilt build_discord_name_lookup(rankstats)
+        variants: Optional precomputed normalize_player_name(player_name)
+
+    Builds the discord_name lookup on every call when it isn't passed in -
+    when resolving many players use a PlayerResolver instead.
     """
-    name_lower = player_name.strip().lower()
-    name_raw = player_name.strip()  # Keep original case for PUA characters
+    name_raw, name_lower, name_stripped, name_no_spaces = variants or normalize_player_name(player_name)
 
     # Method 0: Check hardcoded Unicode name mappings first (before any normalization)
     # Check raw name first (for PUA/symbol characters that don't have case)
-    if name_raw in UNICODE_NAME_MAPPINGS:
-        return UNICODE_NAME_MAPPINGS[name_raw]
-    if name_lower in UNICODE_NAME_MAPPINGS:
-        return UNICODE_NAME_MAPPINGS[name_lower]
-
-    # Strip Unicode invisible characters and normalize for additional checks
-    name_stripped = ''.join(c for c in name_lower if c.isalnum() or c.isspace()).strip()
-    name_no_spaces = name_stripped.replace(' ', '')
-
-    if name_stripped in UNICODE_NAME_MAPPINGS:
-        return UNICODE_NAME_MAPPINGS[name_stripped]
-    if name_no_spaces in UNICODE_NAME_MAPPINGS:
-        return UNICODE_NAME_MAPPINGS[name_no_spaces]
+    for name in (name_raw, name_lower, name_stripped, name_no_spaces):
+        if name in UNICODE_NAME_MAPPINGS:
+            return UNICODE_NAME_MAPPINGS[name]
 
     # Method 1: Use identity file MAC address
     if name_lower in identity_name_to_mac:
@@ -795,12 +1538,9 @@ def resolve_player_to_discord(player_name, identity_name_to_mac, mac_to_discord,
         return profile_lookup[name_lower]
 
     # Method 3: Discord name match in rankstats
-    for user_id, data in rankstats.items():
-        discord_name = data.get('discord_name', '').lower()
-        if discord_name == name_lower:
-            return user_id
-
-    return None
+    if discord_names is None:
+        discord_names = build_discord_name_lookup(rankstats)
+    return discord_names.get(name_lower)
 
 def get_download_urls(game_filename):
     """
@@ -839,53 +1579,17 @@ def get_download_urls(game_filename):
     return downloads
 
 
-def get_all_game_files():
+def get_all_game_files(source_dirs=None):
     """
-    Get all game files from local stats dir and VPS public/private folders.
-    Returns a list of tuples: (filename, source_dir)
+    Get all game files from the stats source directories (STATS_SOURCE_DIRS by default).
+    Returns a list of stats_scanner.GameFile (filename, source_dir, stat) sorted by filename.
     """
-    game_files = []
-
-    # Local stats directory
-    if os.path.exists(STATS_DIR):
-        for f in os.listdir(STATS_DIR):
-            if f.endswith('.xlsx') and '_identity' not in f:
-                game_files.append((f, STATS_DIR))
-
-    # VPS public directory (if accessible)
-    if os.path.exists(STATS_PUBLIC_DIR):
-        for f in os.listdir(STATS_PUBLIC_DIR):
-            if f.endswith('.xlsx') and '_identity' not in f:
-                # Only add if not already in the list
-                if not any(gf[0] == f for gf in game_files):
-                    game_files.append((f, STATS_PUBLIC_DIR))
-
-    # VPS private directory (if accessible)
-    if os.path.exists(STATS_PRIVATE_DIR):
-        for f in os.listdir(STATS_PRIVATE_DIR):
-            if f.endswith('.xlsx') and '_identity' not in f:
-                # Only add if not already in the list
-                if not any(gf[0] == f for gf in game_files):
-                    game_files.append((f, STATS_PRIVATE_DIR))
-
-    # Sort by filename (timestamp)
-    game_files.sort(key=lambda x: x[0])
-    return game_files
+    return scan_game_files(source_dirs or STATS_SOURCE_DIRS)
 
 
-def calculate_rank(xp, rank_thresholds):
-    """Calculate rank based on XP and thresholds."""
-    for rank in range(50, 0, -1):
-        rank_str = str(rank)
-        if rank_str in rank_thresholds:
-            min_xp, max_xp = rank_thresholds[rank_str]
-            if min_xp <= xp <= max_xp:
-                return rank
-    return 1
-
 def parse_score(score_val):
     """Parse score which can be an integer or time format (M:SS)."""
-    if pd.isna(score_val):
+    if score_val is None:
         return 0, '0'
 
     score_str = str(score_val).strip()
@@ -910,15 +1614,16 @@ def is_4v4_team_game(file_path, require_valid_combo=True):
     Check if a game is a 4v4 team game (has Red and Blue teams).
 
     Args:
-        file_path: Path to the Excel stats file
+        file_path: Path to the Excel stats file (or a WorkbookSnapshot)
         require_valid_combo: If True, also require valid MLG map/gametype combo
 
     Returns:
         bool: True if it's a valid 4v4 team game
     """
     try:
-        post_df = pd.read_excel(file_path, sheet_name='Post Game Report')
-        teams = post_df['team'].unique().tolist()
+        snapshot = load_workbook_snapshot(file_path)
+        post_df = snapshot.sheet('Post Game Report')
+        teams = set(post_df.column('team'))
         # Must have both Red and Blue teams and 8 players
         is_4v4 = 'Red' in teams and 'Blue' in teams and len(post_df) == 8
 
@@ -927,9 +1632,8 @@ def is_4v4_team_game(file_path, require_valid_combo=True):
 
         if require_valid_combo:
             # Check map + base gametype combo (use Game Type, not Variant Name)
-            game_details_df = pd.read_excel(file_path, sheet_name='Game Details')
-            if len(game_details_df) > 0:
-                row = game_details_df.iloc[0]
+            row = snapshot.game_details_row()
+            if row is not None:
                 map_name = str(row.get('Map Name', '')).strip()
                 base_gametype = str(row.get('Game Type', '')).strip()
                 return is_valid_mlg_combo(map_name, base_gametype)
@@ -939,116 +1643,130 @@ def is_4v4_team_game(file_path, require_valid_combo=True):
     except:
         return False
 
-def parse_excel_file(file_path):
-    """Parse a single Excel stats file and return game data."""
-    print(f"Parsing {file_path}...")
+def cell_str(value):
+    """
+    Cell value -> str. Blank cells read as 'nan', as they did when the parser
+    read pandas rows (str(NaN)).
+    """
+    return 'nan' if value is None else str(value)
+
+def str_stripped(value):
+    """Cell value -> stripped str."""
+    return cell_str(value).strip()
+
+def sheet_column(sheet, name, cast, blank=None, default=None):
+    """
+    Convert a whole sheet column in one pass.
+
+    Args:
+        sheet: xlsx_reader.Sheet
+        name: Column name; a missing column reads as `default` in every row (like row.get(name, default))
+        cast: Conversion applied to each value
+        blank: Value used for blank cells instead of casting them (None = cast blanks too)
+    """
+    try:
+        values = sheet.column(name)
+    except KeyError:
+        values = (default,) * len(sheet)
+    if blank is None or None not in values:
+        return list(map(cast, values))
+    return [blank if value is None else cast(value) for value in values]
+
+def column_records(columns):
+    """Zip {field: converted column} into one dict per row, fields in the given order."""
+    fields = list(columns)
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
 
-    # Read all sheets
-    game_details_df = pd.read_excel(file_path, sheet_name='Game Details')
-    post_game_df = pd.read_excel(file_path, sheet_name='Post Game Report')
-    versus_df = pd.read_excel(file_path, sheet_name='Versus')
-    game_stats_df = pd.read_excel(file_path, sheet_name='Game Statistics')
-    medal_stats_df = pd.read_excel(file_path, sheet_name='Medal Stats')
-    weapon_stats_df = pd.read_excel(file_path, sheet_name='Weapon Statistics')
+def parse_excel_file(file_path):
+    """Parse a single Excel stats file (path or WorkbookSnapshot) and return game data."""
+    snapshot = load_workbook_snapshot(file_path)
+    print(f"Parsing {snapshot.file_path}...")
+
+    # All sheets come from the snapshot (read once)
+    game_details_df = snapshot.sheet('Game Details')
+    post_game_df = snapshot.sheet('Post Game Report')
+    versus_df = snapshot.sheet('Versus')
+    game_stats_df = snapshot.sheet('Game Statistics')
+    medal_stats_df = snapshot.sheet('Medal Stats')
+    weapon_stats_df = snapshot.sheet('Weapon Statistics')
 
     # Extract game details
     details = {}
     if len(game_details_df) > 0:
-        row = game_details_df.iloc[0]
+        row = snapshot.game_details_row()
         details = {
-            'Game Type': str(row.get('Game Type', 'Unknown')),
-            'Variant Name': str(row.get('Variant Name', 'Unknown')),
-            'Map Name': str(row.get('Map Name', 'Unknown')),
-            'Start Time': str(row.get('Start Time', '')),
-            'End Time': str(row.get('End Time', '')),
-            'Duration': str(row.get('Duration', '0:00'))
+            'Game Type': cell_str(row.get('Game Type', 'Unknown')),
+            'Variant Name': cell_str(row.get('Variant Name', 'Unknown')),
+            'Map Name': cell_str(row.get('Map Name', 'Unknown')),
+            'Start Time': cell_str(row.get('Start Time', '')),
+            'End Time': cell_str(row.get('End Time', '')),
+            'Duration': cell_str(row.get('Duration', '0:00'))
         }
 
-    # Extract players from Post Game Report
-    players = []
-    for _, row in post_game_df.iterrows():
-        score_numeric, score_display = parse_score(row.get('score', 0))
-        player = {
-            'name': str(row.get('name', '')).strip(),
-            'place': str(row.get('place', '')),
-            'score': score_display,
-            'score_numeric': score_numeric,
-            'kills': int(row.get('kills', 0)) if pd.notna(row.get('kills')) else 0,
-            'deaths': int(row.get('deaths', 0)) if pd.notna(row.get('deaths')) else 0,
-            'assists': int(row.get('assists', 0)) if pd.notna(row.get('assists')) else 0,
-            'kda': float(row.get('kda', 0)) if pd.notna(row.get('kda')) else 0,
-            'suicides': int(row.get('suicides', 0)) if pd.notna(row.get('suicides')) else 0,
-            'team': str(row.get('team', '')).strip(),
-            'shots_fired': int(row.get('shots_fired', 0)) if pd.notna(row.get('shots_fired')) else 0,
-            'shots_hit': int(row.get('shots_hit', 0)) if pd.notna(row.get('shots_hit')) else 0,
-            'accuracy': float(row.get('accuracy', 0)) if pd.notna(row.get('accuracy')) else 0,
-            'head_shots': int(row.get('head_shots', 0)) if pd.notna(row.get('head_shots')) else 0
-        }
-        if player['name']:
-            players.append(player)
+    # Extract players from Post Game Report. Each column is converted once and
+    # the records are zipped together afterwards.
+    scores = sheet_column(post_game_df, 'score', parse_score, default=0)
+    players = [player for player in column_records({
+        'name': sheet_column(post_game_df, 'name', str_stripped, default=''),
+        'place': sheet_column(post_game_df, 'place', cell_str, default=''),
+        'score': [display for _, display in scores],
+        'score_numeric': [numeric for numeric, _ in scores],
+        'kills': sheet_column(post_game_df, 'kills', int, 0),
+        'deaths': sheet_column(post_game_df, 'deaths', int, 0),
+        'assists': sheet_column(post_game_df, 'assists', int, 0),
+        'kda': sheet_column(post_game_df, 'kda', float, 0),
+        'suicides': sheet_column(post_game_df, 'suicides', int, 0),
+        'team': sheet_column(post_game_df, 'team', str_stripped, default=''),
+        'shots_fired': sheet_column(post_game_df, 'shots_fired', int, 0),
+        'shots_hit': sheet_column(post_game_df, 'shots_hit', int, 0),
+        'accuracy': sheet_column(post_game_df, 'accuracy', float, 0),
+        'head_shots': sheet_column(post_game_df, 'head_shots', int, 0)
+    }) if player['name']]
 
     # Extract versus data
     versus = {}
     if len(versus_df) > 0:
-        for i, row in versus_df.iterrows():
-            player_name = str(row.iloc[0]).strip()
+        player_names = sheet_column(versus_df, versus_df.columns[0], str_stripped)
+        opponents = [(str(col).strip(), sheet_column(versus_df, col, int, 0)) for col in versus_df.columns[1:]]
+        for i, player_name in enumerate(player_names):
             if player_name:
-                versus[player_name] = {}
-                for col in versus_df.columns[1:]:
-                    opponent = str(col).strip()
-                    kills = int(row[col]) if pd.notna(row[col]) else 0
-                    versus[player_name][opponent] = kills
+                versus[player_name] = {opponent: kills[i] for opponent, kills in opponents}
 
     # Extract detailed game statistics
-    detailed_stats = []
-    for _, row in game_stats_df.iterrows():
-        player_name = str(row.get('Player', '')).strip()
-        if player_name:
-            stats = {
-                'player': player_name,
-                'emblem_url': str(row.get('Emblem URL', '')) if pd.notna(row.get('Emblem URL')) else '',
-                'kills': int(row.get('kills', 0)) if pd.notna(row.get('kills')) else 0,
-                'assists': int(row.get('assists', 0)) if pd.notna(row.get('assists')) else 0,
-                'deaths': int(row.get('deaths', 0)) if pd.notna(row.get('deaths')) else 0,
-                'headshots': int(row.get('headshots', 0)) if pd.notna(row.get('headshots')) else 0,
-                'betrayals': int(row.get('betrayals', 0)) if pd.notna(row.get('betrayals')) else 0,
-                'suicides': int(row.get('suicides', 0)) if pd.notna(row.get('suicides')) else 0,
-                'best_spree': int(row.get('best_spree', 0)) if pd.notna(row.get('best_spree')) else 0,
-                'total_time_alive': int(row.get('total_time_alive', 0)) if pd.notna(row.get('total_time_alive')) else 0,
-                'ctf_scores': int(row.get('ctf_scores', 0)) if pd.notna(row.get('ctf_scores')) else 0,
-                'ctf_flag_steals': int(row.get('ctf_flag_steals', 0)) if pd.notna(row.get('ctf_flag_steals')) else 0,
-                'ctf_flag_saves': int(row.get('ctf_flag_saves', 0)) if pd.notna(row.get('ctf_flag_saves')) else 0
-            }
-            detailed_stats.append(stats)
+    detailed_stats = [stats for stats in column_records({
+        'player': sheet_column(game_stats_df, 'Player', str_stripped, default=''),
+        'emblem_url': sheet_column(game_stats_df, 'Emblem URL', str, ''),
+        'kills': sheet_column(game_stats_df, 'kills', int, 0),
+        'assists': sheet_column(game_stats_df, 'assists', int, 0),
+        'deaths': sheet_column(game_stats_df, 'deaths', int, 0),
+        'headshots': sheet_column(game_stats_df, 'headshots', int, 0),
+        'betrayals': sheet_column(game_stats_df, 'betrayals', int, 0),
+        'suicides': sheet_column(game_stats_df, 'suicides', int, 0),
+        'best_spree': sheet_column(game_stats_df, 'best_spree', int, 0),
+        'total_time_alive': sheet_column(game_stats_df, 'total_time_alive', int, 0),
+        'ctf_scores': sheet_column(game_stats_df, 'ctf_scores', int, 0),
+        'ctf_flag_steals': sheet_column(game_stats_df, 'ctf_flag_steals', int, 0),
+        'ctf_flag_saves': sheet_column(game_stats_df, 'ctf_flag_saves', int, 0)
+    }) if stats['player']]
 
     # Extract medal statistics
-    medals = []
     medal_columns = ['double_kill', 'triple_kill', 'killtacular', 'kill_frenzy', 'killtrocity',
                      'killamanjaro', 'sniper_kill', 'road_kill', 'bone_cracker', 'assassin',
                      'vehicle_destroyed', 'car_jacking', 'stick_it', 'killing_spree',
                      'running_riot', 'rampage', 'beserker', 'over_kill', 'flag_taken',
                      'flag_carrier_kill', 'flag_returned', 'bomb_planted', 'bomb_carrier_kill', 'bomb_returned']
-
-    for _, row in medal_stats_df.iterrows():
-        player_name = str(row.get('player', '')).strip()
-        if player_name:
-            medal_data = {'player': player_name}
-            for col in medal_columns:
-                if col in row:
-                    medal_data[col] = int(row[col]) if pd.notna(row[col]) else 0
-            medals.append(medal_data)
+    medal_data = {'player': sheet_column(medal_stats_df, 'player', str_stripped, default='')}
+    for col in medal_columns:
+        if col in medal_stats_df:
+            medal_data[col] = sheet_column(medal_stats_df, col, int, 0)
+    medals = [medal for medal in column_records(medal_data) if medal['player']]
 
     # Extract weapon statistics
-    weapons = []
-    for _, row in weapon_stats_df.iterrows():
-        player_name = str(row.get('Player', '')).strip()
-        if player_name:
-            weapon_data = {'Player': player_name}
-            for col in weapon_stats_df.columns:
-                if col != 'Player':
-                    col_clean = str(col).strip().lower()
-                    weapon_data[col_clean] = int(row[col]) if pd.notna(row[col]) else 0
-            weapons.append(weapon_data)
+    weapon_data = {'Player': sheet_column(weapon_stats_df, 'Player', str_stripped, default='')}
+    for col in weapon_stats_df.columns:
+        if col != 'Player':
+            weapon_data[str(col).strip().lower()] = sheet_column(weapon_stats_df, col, int, 0)
+    weapons = [weapon for weapon in column_records(weapon_data) if weapon['Player']]
 
     game = {
         'details': details,
@@ -1061,6 +1779,150 @@ def parse_excel_file(file_path):
 
     return game
 
+def load_quarantine():
+    """Load quarantine.json (files that previously failed to parse)."""
+    try:
+        with open(QUARANTINE_FILE, 'r') as f:
+            return json.load(f)
+    except:
+        return {}
+
+def save_quarantine(quarantine):
+    """Save quarantine.json."""
+    with open(QUARANTINE_FILE, 'w') as f:
+        json.dump(quarantine, f, indent=2)
+
+def is_still_quarantined(quarantine, filename, file_path, stat_result=None):
+    """True if filename failed before and hasn't changed since (same size and mtime)."""
+    entry = quarantine.get(filename)
+    if not entry:
+        return False
+    if stat_result is None:
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return False
+    return entry.get('size') == stat_result.st_size and entry.get('mtime') == stat_result.st_mtime
+
+def ingest_workbook(file_path, engine=None):
+    """
+    Load and parse one game workbook.
+    Top-level so it can run in a ProcessPoolExecutor worker.
+    """
+    snapshot = WorkbookSnapshot.load(file_path, engine)
+    return {
+        'classification': get_classification_inputs(snapshot),
+        'game': parse_excel_file(snapshot)
+    }
+
+def _quarantine_entry(game_file, error):
+    """Build a quarantine.json entry for a workbook (GameFile) that failed to parse."""
+    return {
+        'source_dir': game_file.source_dir,
+        'error': f"{type(error).__name__}: {error}",
+        'quarantined_at': datetime.now().isoformat(),
+        'size': game_file.size,
+        'mtime': game_file.mtime
+    }
+
+def ingest_game_files(game_files, game_cache, workers=DEFAULT_INGEST_WORKERS, quarantine=None, engine=None):
+    """
+    Parse game workbooks, fanning cache misses out across a process pool.
+
+    A workbook that fails to parse is quarantined (error recorded) instead of
+    aborting the run. Quarantined files that haven't changed since they failed
+    are skipped without being retried.
+
+    Args:
+        game_files: List of stats_scanner.GameFile, sorted by timestamp
+        game_cache: FingerprintCache for parsed games
+        workers: Maximum worker processes (1 = parse in this process)
+        quarantine: Previous quarantine.json contents
+        engine: Workbook reader engine name (see READER_ENGINES)
+
+    Returns:
+        (ingested, failures)
+        - ingested: List of (filename, source_dir, data) in the same (timestamp) order as game_files,
+          where data is {'classification': ..., 'game': ...}
+        - failures: Dict of filename -> quarantine entry for every file that failed
+    """
+    quarantine = quarantine or {}
+    results = {}
+    failures = {}
+    pending = []
+
+    # The scan's stat results are reused for the quarantine and cache checks
+    for game_file in game_files:
+        if is_still_quarantined(quarantine, game_file.filename, game_file.path, game_file.stat):
+            failures[game_file.filename] = quarantine[game_file.filename]
+            continue
+        cached = game_cache.get(game_file.path, game_file.stat)
+        if cached:
+            results[game_file.filename] = cached
+        else:
+            pending.append(game_file)
+
+    def record_success(game_file, data):
+        game_cache.put(game_file.path, data, game_file.stat)
+        results[game_file.filename] = data
+
+    def ingest_serially(items):
+        for game_file in items:
+            try:
+                record_success(game_file, ingest_workbook(game_file.path, engine))
+            except Exception as e:
+                failures[game_file.filename] = _quarantine_entry(game_file, e)
+
+    def ingest_isolated(game_file):
+        # Own single-worker pool, so a workbook that kills its worker is quarantined
+        # instead of taking this process down with it
+        try:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                data = pool.submit(ingest_workbook, game_file.path, engine).result()
+        except Exception as e:
+            failures[game_file.filename] = _quarantine_entry(game_file, e)
+        else:
+            record_success(game_file, data)
+
+    if workers <= 1 or len(pending) <= 1:
+        ingest_serially(pending)
+    else:
+        max_workers = min(workers, len(pending))
+        max_in_flight = max_workers * INGEST_TASKS_PER_WORKER
+        queue = list(reversed(pending))
+        while queue:
+            in_flight = {}
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    while queue or in_flight:
+                        # Keep a bounded number of workbooks in flight
+                        while queue and len(in_flight) < max_in_flight:
+                            game_file = queue.pop()
+                            in_flight[pool.submit(ingest_workbook, game_file.path, engine)] = game_file
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            game_file = in_flight[future]
+                            try:
+                                data = future.result()
+                            except BrokenProcessPool:
+                                raise
+                            except Exception as e:
+                                failures[game_file.filename] = _quarantine_entry(game_file, e)
+                            else:
+                                record_success(game_file, data)
+                            del in_flight[future]
+            except BrokenProcessPool:
+                # A worker died outright (e.g. out of memory or a crash in a native
+                # reader). Any of the files in flight may have done it, so each is
+                # retried on its own; the rest of the queue goes to a fresh pool.
+                print(f"  Warning: worker process died, retrying {len(in_flight)} file(s) one at a time")
+                for game_file in in_flight.values():
+                    ingest_isolated(game_file)
+
+    ingested = [(game_file.filename, game_file.source_dir, results[game_file.filename])
+                for game_file in game_files if game_file.filename in results]
+    return ingested, failures
+
 def determine_winners_losers(game):
     """Determine winning and losing teams for a 4v4 team game."""
     players = game['players']
@@ -1108,34 +1970,64 @@ def find_player_by_name(rankstats, name, profile_lookup=None):
     Matching priority:
     1. MAC ID-linked stats_profile from players.json (via profile_lookup)
     2. discord_name field in rankstats.json
-    """
-    name_lower = name.lower().strip()
-
-    # First try MAC ID-linked profile lookup from players.json
-    if profile_lookup and name_lower in profile_lookup:
-        user_id = profile_lookup[name_lower]
-        if user_id in rankstats:
-            return user_id
 
-    # Fall back to discord_name matching in rankstats
-    for user_id, data in rankstats.items():
-        discord_name = data.get('discord_name', '').lower()
-        if discord_name == name_lower:
-            return user_id
+    Builds the lookups on every call - use PlayerResolver.find_player() for
+    repeated lookups.
+    """
+    return PlayerResolver(None, {}, profile_lookup or {}, rankstats).find_player(name)
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Populate CarnageReport stats from game workbooks.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_INGEST_WORKERS,
+                        help=f"worker processes for parsing workbooks (default: {DEFAULT_INGEST_WORKERS}, 1 = no pool)")
+    parser.add_argument('--reader', choices=sorted(READER_ENGINES), default=DEFAULT_READER_ENGINE,
+                        help=f"workbook reader engine (default: {DEFAULT_READER_ENGINE}, "
+                             "set STATS_READER_ENGINE to change it)")
+    parser.add_argument('--match-output', choices=MATCH_OUTPUT_MODES, default=DEFAULT_MATCH_OUTPUT,
+                        help=f"playlist match output: one {{playlist}}_matches.json, or per-match shards plus a "
+                             f"manifest under {MATCH_SHARDS_DIR}/ (default: {DEFAULT_MATCH_OUTPUT}, "
+                             "set STATS_MATCH_OUTPUT to change it)")
+    parser.add_argument('--source-dir', dest='source_dirs', action='append', metavar='DIR',
+                        help="directory to read game workbooks from; repeat for several, in priority order "
+                             "(default: STATS_SOURCE_DIRS)")
+    parser.add_argument('--full', action='store_true',
+                        help="ignore XP checkpoints and replay XP from the first ranked game")
+    parser.add_argument('--replay-from', type=parse_replay_from, metavar='DATE|FILE',
+                        help="replay XP from the first ranked game on/after a date (YYYY-MM-DD) or game file")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and process new games as they land in the stats directories")
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE_SECONDS,
+                        help=f"--watch: seconds of quiet before processing a batch (default: {WATCH_DEBOUNCE_SECONDS})")
+    parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_SECONDS,
+                        help=f"--watch: directory poll interval without inotify (default: {WATCH_POLL_SECONDS})")
+    return parser.parse_args(argv)
+
+def main(args=None):
+    if args is None:
+        args = parse_args([])
+    store = StatsStore(STATS_DB_FILE)
+    try:
+        process_stats(args, store)
+    finally:
+        store.close()
 
-    return None
+def process_stats(args, store):
+    """
+    One populate_stats.py run: process new or changed games and export the results.
 
-def main():
+    Args:
+        args: parse_args() result
+        store: Open StatsStore (the caller closes it)
+    """
     print("Starting stats population...")
     print("=" * 50)
 
     # Load configurations
     xp_config = load_xp_config()
-    rank_thresholds = xp_config['rank_thresholds']
+    rank_table = RankTable(xp_config)  # rank thresholds + win/loss factors
     xp_win = xp_config['game_win']  # 100 XP per win
     xp_loss = xp_config['game_loss']  # -100 XP per loss
-    loss_factors = xp_config.get('loss_factors', {})
-    win_factors = xp_config.get('win_factors', {})
 
     # Load existing rankstats
     rankstats = load_rankstats()
@@ -1169,15 +2061,30 @@ def main():
     if manual_playlists:
         print(f"Loaded {len(manual_playlists)} manual playlist override(s)")
 
-    # Check for changes since last run - use get_all_game_files() which checks all directories
-    all_game_files = get_all_game_files()
-    stats_files = sorted([f[0] for f in all_game_files])  # Extract just filenames
-    processed_state = load_processed_state()
-    needs_full_rebuild, new_files, changed_playlists = check_for_changes(stats_files, manual_playlists, processed_state)
+    # Check for changes since last run - scan every source directory once; the
+    # same listing (with its stat results) is reused in Step 2.
+    # Files that failed to parse before and haven't changed are left out until they do
+    all_game_files = get_all_game_files(args.source_dirs)
+    quarantine = load_quarantine()
+    stats_files = [
+        game_file.filename for game_file in all_game_files
+        if not is_still_quarantined(quarantine, game_file.filename, game_file.path, game_file.stat)
+    ]  # Already sorted by filename
+    processed_state = load_processed_state(store)
+    # Identity files are in the private directory
+    identity_dir = STATS_PRIVATE_DIR if os.path.exists(STATS_PRIVATE_DIR) else STATS_DIR
+    session_files = get_session_file_fingerprints(identity_dir)
+    needs_full_rebuild, new_files, changed_playlists, changed_session_files = check_for_changes(
+        stats_files, manual_playlists, processed_state, session_files)
 
-    if not new_files and not changed_playlists:
+    if not (new_files or changed_playlists or changed_session_files or args.full or args.replay_from):
         print("\nNo changes detected - nothing to process!")
-        print("  (Add new game files or update manual_playlists.json to trigger processing)")
+        print("  (Add new game or identity files or update manual_playlists.json to trigger processing)")
+        # Retry a rank refresh the bot didn't get last time (RANK_CHANGES_FILE still has
+        # them), or send the periodic full refresh
+        pending_rank_changes = store.get_meta('pending_rank_changes', {})
+        if pending_rank_changes or full_rank_refresh_due(store, datetime.now()):
+            trigger_rank_refresh(store, store.get_meta('rank_changes_version', 0), list(pending_rank_changes))
         return
 
     print(f"\nChanges detected:")
@@ -1191,63 +2098,42 @@ def main():
         print(f"  Playlist changes: {len(changed_playlists)}")
         for f, change in list(changed_playlists.items())[:3]:
             print(f"    - {f}: {change['old']} -> {change['new']}")
+    if changed_session_files:
+        print(f"  Identity/theater file changes: {len(changed_session_files)}")
+        for f in changed_session_files[:3]:
+            print(f"    - {f}")
 
-    # Determine processing mode
-    incremental_mode = not needs_full_rebuild and len(new_files) > 0
-    saved_player_state = load_player_state_from_processed(processed_state) if incremental_mode else {}
-
-    if needs_full_rebuild:
-        print("\n  -> Playlist changes require full recalculation from start")
-    elif incremental_mode and saved_player_state:
-        print("\n  -> Incremental mode: resuming from saved state, processing new games only")
+    # Stats are always re-totalled from every game (cheap). XP is replayed from
+    # the last checkpoint before the first ranked game that changed (Step 3b).
+    if args.full:
+        print("\n  -> Full recalculation requested (--full)")
+    elif args.replay_from:
+        print(f"\n  -> Replaying XP from {args.replay_from} (--replay-from)")
+    elif needs_full_rebuild:
+        print("\n  -> Playlist changes: replaying XP from the last checkpoint before the first affected game")
     else:
-        print("\n  -> Full processing (no saved state found)")
-        incremental_mode = False
-
-    # STEP 1: Zero out or restore player stats
-    if incremental_mode and saved_player_state:
-        print("\nStep 1: Restoring player stats from saved state...")
-        for user_id, state in saved_player_state.items():
-            if user_id in rankstats:
-                # Restore per-playlist state
-                for playlist, pl_state in state.get('playlists', {}).items():
-                    if 'playlists' not in rankstats[user_id]:
-                        rankstats[user_id]['playlists'] = {}
-                    rankstats[user_id]['playlists'][playlist] = pl_state.copy()
-                    rankstats[user_id][playlist] = pl_state.get('rank', 1)
-                # Restore overall stats
-                rankstats[user_id]['xp'] = state.get('xp', 0)
-                rankstats[user_id]['rank'] = state.get('rank', 1)
-                rankstats[user_id]['wins'] = state.get('wins', 0)
-                rankstats[user_id]['losses'] = state.get('losses', 0)
-                rankstats[user_id]['total_games'] = state.get('total_games', 0)
-                rankstats[user_id]['kills'] = state.get('kills', 0)
-                rankstats[user_id]['deaths'] = state.get('deaths', 0)
-                rankstats[user_id]['assists'] = state.get('assists', 0)
-                rankstats[user_id]['headshots'] = state.get('headshots', 0)
-                rankstats[user_id]['highest_rank'] = state.get('highest_rank', 1)
-        print(f"  Restored state for {len(saved_player_state)} players")
-    else:
-        print("\nStep 1: Zeroing out all player stats...")
-        for user_id in rankstats:
-            rankstats[user_id]['xp'] = 0
-            rankstats[user_id]['wins'] = 0
-            rankstats[user_id]['losses'] = 0
-            rankstats[user_id]['total_games'] = 0
-            rankstats[user_id]['series_wins'] = 0
-            rankstats[user_id]['series_losses'] = 0
-            rankstats[user_id]['total_series'] = 0
-            rankstats[user_id]['rank'] = 1
-            # Remove any detailed stats
-            for key in ['kills', 'deaths', 'assists', 'headshots']:
-                if key in rankstats[user_id]:
-                    del rankstats[user_id][key]
-        print(f"  Zeroed stats for {len(rankstats)} players")
+        print("\n  -> Resuming XP from the latest checkpoint")
+
+    # STEP 1: Zero out player stats
+    print("\nStep 1: Zeroing out all player stats...")
+    for user_id in rankstats:
+        rankstats[user_id]['xp'] = 0
+        rankstats[user_id]['wins'] = 0
+        rankstats[user_id]['losses'] = 0
+        rankstats[user_id]['total_games'] = 0
+        rankstats[user_id]['series_wins'] = 0
+        rankstats[user_id]['series_losses'] = 0
+        rankstats[user_id]['total_series'] = 0
+        rankstats[user_id]['rank'] = 1
+        # Remove any detailed stats
+        for key in ['kills', 'deaths', 'assists', 'headshots']:
+            if key in rankstats[user_id]:
+                del rankstats[user_id][key]
+    print(f"  Zeroed stats for {len(rankstats)} players")
 
     # STEP 2: Find and parse ALL games, determining playlist for each
     # ALL matches are logged for stats, but only playlist-tagged matches count for rank
     print("\nStep 2: Finding and categorizing games...")
-    all_game_files = get_all_game_files()  # Returns list of (filename, source_dir) tuples
 
     # Store ALL games (for stats tracking)
     all_games = []
@@ -1255,11 +2141,22 @@ def main():
     games_by_playlist = {}
     untagged_games = []
 
-    for filename, source_dir in all_game_files:
-        file_path = os.path.join(source_dir, filename)
-        playlist = determine_playlist(file_path, active_match, manual_playlists)
+    # Parsed games are cached by file fingerprint, so only new or changed
+    # workbooks are opened, and those are parsed in parallel. The playlist is
+    # always re-evaluated because the active match and manual overrides can
+    # change between runs.
+    game_cache = FingerprintCache(GAME_CACHE_DIR, version=cache_version(GAME_CACHE_VERSION, args.reader))
+    ingested, quarantined = ingest_game_files(all_game_files, game_cache, args.workers, quarantine,
+                                              args.reader)
+    save_quarantine(quarantined)
+    for filename, entry in quarantined.items():
+        print(f"  [QUARANTINED] {filename}: {entry.get('error')}")
+
+    for filename, source_dir, data in ingested:
+        classification = data['classification']
+        game = data['game']
+        playlist = classify_game(filename, classification, active_match, manual_playlists)
 
-        game = parse_excel_file(file_path)
         game['source_file'] = filename
         game['source_dir'] = source_dir  # Track where game came from
         game['playlist'] = playlist  # Will be None for untagged games
@@ -1291,9 +2188,11 @@ def main():
     if untagged_games:
         print(f"  Unranked (stats only): {len(untagged_games)} games")
     print(f"  Total games: {len(all_games)}")
+    print(f"  Parsed game cache: {game_cache.hits} hits, {game_cache.misses} misses")
 
     # Ranked games are those with a valid playlist tag
-    ranked_games = games_by_playlist.get(PLAYLIST_MLG_4V4, [])
+    # Copy - extending the MLG 4v4 list itself would add every other playlist's games to it
+    ranked_games = list(games_by_playlist.get(PLAYLIST_MLG_4V4, []))
     ranked_games.extend(games_by_playlist.get(PLAYLIST_TEAM_HARDCORE, []))
     ranked_games.extend(games_by_playlist.get(PLAYLIST_DOUBLE_TEAM, []))
     ranked_games.extend(games_by_playlist.get(PLAYLIST_HEAD_TO_HEAD, []))
@@ -1315,47 +2214,23 @@ def main():
     # Parse all identity files and build per-game name->MAC mappings
     # Each identity file covers a session, use it for games in that session
     print("\n  Loading identity files for MAC->name resolution...")
-    all_identity_mappings = {}  # {identity_file: {name_lower: mac}}
-    # Identity files are in the private directory
-    identity_dir = STATS_PRIVATE_DIR if os.path.exists(STATS_PRIVATE_DIR) else STATS_DIR
-    identity_files = sorted([f for f in os.listdir(identity_dir) if '_identity.xlsx' in f]) if os.path.exists(identity_dir) else []
-    for identity_file in identity_files:
-        identity_path = os.path.join(identity_dir, identity_file)
-        name_to_mac = parse_identity_file(identity_path)
-        all_identity_mappings[identity_file] = name_to_mac
-        print(f"    {identity_file}: {len(name_to_mac)} player(s)")
-
-    # Get combined identity mapping (for games that don't have a specific identity file)
-    combined_identity = {}
-    for mapping in all_identity_mappings.values():
-        combined_identity.update(mapping)
+    identity_cache = FingerprintCache(IDENTITY_CACHE_DIR,
+                                      version=cache_version(IDENTITY_CACHE_VERSION, args.reader))
+    identity_index = IdentityIndex.scan(identity_dir).load_mappings(identity_cache, args.reader)
+    print(f"  Identity file cache: {identity_cache.hits} hits, {identity_cache.misses} misses")
+    resolver = PlayerResolver(identity_index, mac_to_discord, profile_lookup, rankstats)
 
     # First, identify all players from ALL games and match them to rankstats
     # Uses identity file MAC -> Discord ID resolution (game by game)
     all_player_names = set()
     player_to_id = {}  # {player_name: discord_id}
-
-    # In incremental mode, restore previous player name -> ID mappings
-    if incremental_mode:
-        saved_name_to_id = processed_state.get("player_name_to_id", {})
-        if saved_name_to_id:
-            player_to_id.update(saved_name_to_id)
-            print(f"  Restored {len(saved_name_to_id)} player name->ID mappings from saved state")
+    temp_ids = set()  # placeholder IDs for players not matched to a Discord account
 
     for game in all_games:
         game_file = game.get('source_file', '')
         game_source_dir = game.get('source_dir', STATS_DIR)
         file_path = os.path.join(game_source_dir, game_file)
 
-        # Find and use the identity file for this game's session
-        # Identity files are in private dir on VPS, same dir locally
-        identity_file = get_identity_file_for_game(file_path, identity_dir)
-        if identity_file:
-            identity_basename = os.path.basename(identity_file)
-            identity_name_to_mac = all_identity_mappings.get(identity_basename, {})
-        else:
-            identity_name_to_mac = combined_identity
-
         for player in game['players']:
             player_name = player['name']
 
@@ -1370,10 +2245,9 @@ def main():
             if player_name in player_to_id:
                 continue
 
-            # Resolve player using identity MAC -> Discord ID
-            user_id = resolve_player_to_discord(
-                player_name, identity_name_to_mac, mac_to_discord, profile_lookup, rankstats
-            )
+            # Resolve player using the identity file for this game's session (MAC -> Discord ID)
+            # Identity files are in private dir on VPS, same dir locally
+            user_id = resolver.resolve(player_name, file_path)
 
             if user_id:
                 player_to_id[player_name] = user_id
@@ -1382,8 +2256,9 @@ def main():
                 # Only set alias if player has explicitly set one (not from in-game names)
             else:
                 # Create new entry for unmatched player
-                temp_id = str(abs(hash(player_name)) % 10**18)
+                temp_id = get_temp_player_id(player_name)
                 player_to_id[player_name] = temp_id
+                temp_ids.add(temp_id)
                 rankstats[temp_id] = {
                     'xp': 0,
                     'wins': 0,
@@ -1396,40 +2271,20 @@ def main():
                     'discord_name': player_name,
                     'rank': 1
                 }
+                resolver.register(temp_id, player_name)
                 print(f"    Warning: Could not resolve '{player_name}' to Discord ID")
 
             # Initialize overall stats tracking (from ALL games) - only if not already initialized
             if player_name not in player_game_stats:
-                # Check if we have saved state for this player (in incremental mode)
-                if incremental_mode and user_id and user_id in saved_player_state:
-                    saved = saved_player_state[user_id]
-                    player_game_stats[player_name] = {
-                        'kills': saved.get('kills', 0),
-                        'deaths': saved.get('deaths', 0),
-                        'assists': saved.get('assists', 0),
-                        'games': saved.get('total_games', 0),
-                        'headshots': saved.get('headshots', 0)
-                    }
-                    # Restore per-playlist tracking from saved state
-                    player_playlist_xp[player_name] = {}
-                    player_playlist_wins[player_name] = {}
-                    player_playlist_losses[player_name] = {}
-                    player_playlist_games[player_name] = {}
-                    for pl, pl_state in saved.get('playlists', {}).items():
-                        player_playlist_xp[player_name][pl] = pl_state.get('xp', 0)
-                        player_playlist_wins[player_name][pl] = pl_state.get('wins', 0)
-                        player_playlist_losses[player_name][pl] = pl_state.get('losses', 0)
-                        player_playlist_games[player_name][pl] = pl_state.get('games', 0)
-                else:
-                    player_game_stats[player_name] = {
-                        'kills': 0, 'deaths': 0, 'assists': 0,
-                        'games': 0, 'headshots': 0
-                    }
-                    # Initialize per-playlist tracking (only from ranked games)
-                    player_playlist_xp[player_name] = {}
-                    player_playlist_wins[player_name] = {}
-                    player_playlist_losses[player_name] = {}
-                    player_playlist_games[player_name] = {}
+                player_game_stats[player_name] = {
+                    'kills': 0, 'deaths': 0, 'assists': 0,
+                    'games': 0, 'headshots': 0
+                }
+                # Initialize per-playlist tracking (only from ranked games)
+                player_playlist_xp[player_name] = {}
+                player_playlist_wins[player_name] = {}
+                player_playlist_losses[player_name] = {}
+                player_playlist_games[player_name] = {}
 
     # Track current rank per player per playlist
     player_playlist_rank = {}  # {player_name: {playlist: rank}}
@@ -1438,52 +2293,17 @@ def main():
     for name in all_player_names:
         player_playlist_rank[name] = {}
         player_playlist_highest_rank[name] = {}
-        # In incremental mode, restore saved ranks
-        if incremental_mode and name in player_to_id:
-            user_id = player_to_id[name]
-            if user_id in saved_player_state:
-                for pl, pl_state in saved_player_state[user_id].get('playlists', {}).items():
-                    player_playlist_rank[name][pl] = pl_state.get('rank', 1)
-                    player_playlist_highest_rank[name][pl] = pl_state.get('highest_rank', 1)
-
-    # In incremental mode, restore player XP/rank state from saved state
-    if incremental_mode and saved_player_state:
-        print("\n  Restoring player XP/rank state from saved state...")
-        for user_id, state in saved_player_state.items():
-            # Find player names that map to this user_id
-            for player_name, pid in player_to_id.items():
-                if pid == user_id:
-                    # Restore per-playlist XP and rank
-                    for playlist, pl_state in state.get('playlists', {}).items():
-                        player_playlist_xp[player_name][playlist] = pl_state.get('xp', 0)
-                        player_playlist_rank[player_name][playlist] = pl_state.get('rank', 1)
-                        player_playlist_highest_rank[player_name][playlist] = pl_state.get('highest_rank', 1)
-                        player_playlist_wins[player_name][playlist] = pl_state.get('wins', 0)
-                        player_playlist_losses[player_name][playlist] = pl_state.get('losses', 0)
-                        player_playlist_games[player_name][playlist] = pl_state.get('games', 0)
-                    # Restore game stats (kills, deaths, etc.)
-                    if player_name in player_game_stats:
-                        player_game_stats[player_name]['kills'] = state.get('kills', 0)
-                        player_game_stats[player_name]['deaths'] = state.get('deaths', 0)
-                        player_game_stats[player_name]['assists'] = state.get('assists', 0)
-                        player_game_stats[player_name]['headshots'] = state.get('headshots', 0)
-                        player_game_stats[player_name]['games'] = state.get('total_games', 0)
 
     # Initialize rank history tracking (for rankhistory.json)
     # Structure: {discord_id: {"discord_name": str, "history": [...]}}
-    rankhistory = load_rankhistory() if incremental_mode else {}
+    rankhistory = {}
 
     print(f"  Found {len(all_player_names)} unique players")
 
     # STEP 3a: Process RANKED games for stats (kills, deaths, etc.)
     # Only include games with a playlist - custom/unranked games are excluded from stats
-    # In incremental mode, only process new games (old stats restored from saved state)
-    if incremental_mode:
-        games_to_process_for_stats = [g for g in ranked_games if g.get('source_file') in new_files]
-        print(f"\n  Processing {len(games_to_process_for_stats)} NEW ranked games for stats (incremental mode)...")
-    else:
-        games_to_process_for_stats = ranked_games
-        print(f"\n  Processing {len(games_to_process_for_stats)} ranked games for stats...")
+    games_to_process_for_stats = ranked_games
+    print(f"\n  Processing {len(games_to_process_for_stats)} ranked games for stats...")
 
     for game_num, game in enumerate(games_to_process_for_stats, 1):
         game_name = game['details'].get('Variant Name', 'Unknown')
@@ -1511,16 +2331,48 @@ def main():
     print(f"  Processed {len(games_to_process_for_stats)} games for stats")
 
     # STEP 3b: Process RANKED games for XP/wins/losses (per playlist)
-    # In incremental mode, only process new games
-    if incremental_mode:
-        games_to_process_for_xp = [g for g in ranked_games if g.get('source_file') in new_files]
-        print(f"\n  Processing {len(games_to_process_for_xp)} NEW ranked games for XP (incremental mode)...")
-    else:
-        games_to_process_for_xp = ranked_games
-        print(f"\n  Processing {len(games_to_process_for_xp)} RANKED games for XP (per playlist)...")
+    # XP depends on game order, so games are replayed from the last checkpoint
+    # before the first ranked game that differs from the last run. Games before
+    # the checkpoint take their results from the XP journal.
+    xp_tables = {
+        'xp': player_playlist_xp,
+        'wins': player_playlist_wins,
+        'losses': player_playlist_losses,
+        'games': player_playlist_games,
+        'rank': player_playlist_rank,
+        'highest_rank': player_playlist_highest_rank
+    }
+    xp_inputs = [(game, *determine_winners_losers(game)) for game in ranked_games]
+    xp_game_keys = [get_xp_game_key(game, winners, losers) for game, winners, losers in xp_inputs]
+    xp_config_hash = get_xp_config_hash(xp_config)
+    xp_journal = None if args.full else load_xp_journal(xp_config_hash)
+    replay_start, checkpoint = find_xp_replay_start(
+        xp_journal, xp_game_keys, [game.get('source_file', '') for game in ranked_games], args.replay_from
+    )
+
+    journal_games = []
+    checkpoints = []
+    if checkpoint:
+        restore_xp_state(xp_tables, checkpoint['state'])
+        for (game, _, _), journal_game in zip(xp_inputs[:replay_start], xp_journal['games']):
+            apply_xp_journal_game(game, journal_game['players'], rankhistory, rankstats, player_to_id)
+        journal_games = xp_journal['games'][:replay_start]
+        checkpoints = [cp for cp in xp_journal['checkpoints'] if cp['index'] <= replay_start]
+        print(f"\n  Resuming XP from checkpoint at ranked game {replay_start} "
+              f"({replay_start} games reused from {XP_JOURNAL_FILE})")
+
+    print(f"\n  Processing {len(xp_inputs) - replay_start} RANKED games for XP (per playlist)...")
+
+    for game_index in range(replay_start, len(xp_inputs)):
+        game, winners, losers = xp_inputs[game_index]
+        game_num = game_index + 1
+        if game_index and game_index % XP_CHECKPOINT_INTERVAL == 0 and game_index > replay_start:
+            checkpoints.append({'index': game_index, 'state': snapshot_xp_state(xp_tables)})
+
+        # Journal record per player, None where the player was skipped
+        player_results = []
+        journal_games.append({'key': xp_game_keys[game_index], 'players': player_results})
 
-    for game_num, game in enumerate(games_to_process_for_xp, 1):
-        winners, losers = determine_winners_losers(game)
         game_name = game['details'].get('Variant Name', 'Unknown')
         playlist = game.get('playlist')
 
@@ -1528,16 +2380,7 @@ def main():
             continue  # Skip untagged games for ranking
 
         # Get game end time for rankhistory timestamp
-        game_end_time = game['details'].get('End Time', '')
-        # Convert "MM/DD/YYYY HH:MM" to ISO format "YYYY-MM-DDTHH:MM:00"
-        try:
-            if game_end_time and '/' in game_end_time:
-                dt = datetime.strptime(game_end_time, '%m/%d/%Y %H:%M')
-                game_timestamp = dt.strftime('%Y-%m-%dT%H:%M:00')
-            else:
-                game_timestamp = game_end_time
-        except:
-            game_timestamp = game_end_time
+        game_timestamp = get_game_timestamp(game)
 
         print(f"\n  Ranked Game {game_num} [{playlist}]: {game_name}")
 
@@ -1546,12 +2389,14 @@ def main():
 
             # Skip dedicated servers
             if is_dedicated_server(player_name):
+                player_results.append(None)
                 continue
 
             user_id = player_to_id.get(player_name)
 
             # Skip if not properly resolved
             if player_name not in player_playlist_xp:
+                player_results.append(None)
                 continue
 
             # Initialize playlist tracking if needed
@@ -1578,7 +2423,7 @@ def main():
                 player_playlist_wins[player_name][playlist] += 1
                 player_playlist_games[player_name][playlist] += 1
                 # Apply win factor (high ranks gain less)
-                win_factor = get_win_factor(rank_before, win_factors)
+                win_factor = rank_table.win_factor(rank_before)
                 xp_change = int(xp_win * win_factor)
                 player_playlist_xp[player_name][playlist] += xp_change
                 result = f"WIN (+{xp_change} @ {int(win_factor*100)}%)"
@@ -1587,7 +2432,7 @@ def main():
                 player_playlist_losses[player_name][playlist] += 1
                 player_playlist_games[player_name][playlist] += 1
                 # Apply loss factor (low ranks lose less)
-                loss_factor = get_loss_factor(rank_before, loss_factors)
+                loss_factor = rank_table.loss_factor(rank_before)
                 xp_change = int(xp_loss * loss_factor)  # xp_loss is negative
                 player_playlist_xp[player_name][playlist] += xp_change
                 # Ensure XP cannot go below 0
@@ -1600,34 +2445,19 @@ def main():
                 result = "TIE"
 
             new_xp = player_playlist_xp[player_name][playlist]
-            new_rank = calculate_rank(new_xp, rank_thresholds)
+            new_rank = rank_table.rank(new_xp)
             player_playlist_rank[player_name][playlist] = new_rank
             # Track highest rank achieved in this playlist
             if new_rank > player_playlist_highest_rank[player_name][playlist]:
                 player_playlist_highest_rank[player_name][playlist] = new_rank
 
+            result_record = [rank_before, xp_change, new_xp, new_rank, game_result]
+            player_results.append(result_record)
+
             # Add entry to rankhistory for this player
             if user_id:
-                if user_id not in rankhistory:
-                    discord_name = rankstats.get(user_id, {}).get('discord_name', player_name)
-                    rankhistory[user_id] = {
-                        'discord_name': discord_name,
-                        'history': []
-                    }
-
-                history_entry = {
-                    'timestamp': game_timestamp,
-                    'source_file': game.get('source_file'),
-                    'map': game['details'].get('Map Name', 'Unknown'),
-                    'gametype': game['details'].get('Variant Name', 'Unknown'),
-                    'playlist': playlist,
-                    'xp_change': xp_change,
-                    'xp_total': new_xp,
-                    'rank_before': rank_before,
-                    'rank_after': new_rank,
-                    'result': game_result
-                }
-                rankhistory[user_id]['history'].append(history_entry)
+                entry = make_rankhistory_entry(game, game_timestamp, result_record)
+                add_rankhistory_entry(rankhistory, rankstats, user_id, player_name, entry)
 
             print(f"    {player_name}: {result} | XP: {old_xp} -> {new_xp} | Rank: {rank_before} -> {new_rank}")
 
@@ -1719,7 +2549,7 @@ def main():
                 playlist_losses += player_playlist_losses[player_name].get(playlist, 0)
                 playlist_games += player_playlist_games[player_name].get(playlist, 0)
 
-            playlist_rank = calculate_rank(playlist_xp, rank_thresholds)
+            playlist_rank = rank_table.rank(playlist_xp)
 
             playlists_data[playlist] = {
                 'xp': playlist_xp,
@@ -1748,7 +2578,7 @@ def main():
         # For legacy compatibility: use primary playlist's XP/rank as the main one
         if primary_playlist:
             rankstats[user_id]['xp'] = primary_xp
-            rankstats[user_id]['rank'] = calculate_rank(primary_xp, rank_thresholds)
+            rankstats[user_id]['rank'] = rank_table.rank(primary_xp)
         else:
             # No ranked games played
             rankstats[user_id]['xp'] = 0
@@ -1806,14 +2636,12 @@ def main():
                 'games': pl_data.get('games', 0)
             }
 
-    with open(RANKS_FILE, 'w') as f:
-        json.dump(ranks_data, f, indent=2)
-    print(f"  Saved {RANKS_FILE} ({len(ranks_data)} players)")
-
-    # Save per-playlist matches and stats
+    # Save per-playlist stats (match entries go to the stats store and are exported below)
     print("\n  Saving per-playlist files...")
     all_playlists = [PLAYLIST_MLG_4V4, PLAYLIST_TEAM_HARDCORE, PLAYLIST_DOUBLE_TEAM, PLAYLIST_HEAD_TO_HEAD]
+    store_games = []  # (source_file, playlist, match entry, player_games rows) for StatsStore.sync_games
     playlist_files_saved = []
+    playlist_files_removed = []  # Output of the other --match-output mode, unstaged from git below
 
     # Helper function to get display name (discord_name instead of in-game name)
     def get_display_name(player_name):
@@ -1828,7 +2656,6 @@ def main():
             continue
 
         # Build matches for this playlist
-        matches_data = {'playlist': playlist_name, 'matches': []}
         for game in playlist_games:
             winners, losers = determine_winners_losers(game)
             red_team = [get_display_name(p['name']) for p in game['players'] if p.get('team') == 'Red']
@@ -1946,11 +2773,8 @@ def main():
                 del match_entry['red_team']
                 del match_entry['blue_team']
 
-            matches_data['matches'].append(match_entry)
-
-        save_playlist_matches(playlist_name, matches_data)
-        playlist_files_saved.append(get_playlist_files(playlist_name)['matches'])
-        print(f"    Saved {get_playlist_files(playlist_name)['matches']} ({len(playlist_games)} matches)")
+            store_games.append((match_entry['source_file'], playlist_name, match_entry,
+                                get_player_game_rows(game, winners, losers, player_to_id)))
 
         # Build stats for this playlist
         stats_data = {'playlist': playlist_name, 'players': {}}
@@ -1981,7 +2805,6 @@ def main():
 
     # Save unranked games to customgames.json
     if untagged_games:
-        custom_data = {'matches': []}
         for game in untagged_games:
             winners, losers = determine_winners_losers(game)
             red_team = [get_display_name(p['name']) for p in game['players'] if p.get('team') == 'Red']
@@ -2086,11 +2909,8 @@ def main():
                 'versus': versus_data,
                 'source_file': game.get('source_file', '')
             }
-            custom_data['matches'].append(match_entry)
-
-        save_custom_games(custom_data)
-        playlist_files_saved.append(CUSTOMGAMES_FILE)
-        print(f"    Saved {CUSTOMGAMES_FILE} ({len(untagged_games)} custom games)")
+            store_games.append((match_entry['source_file'], None, match_entry,
+                                get_player_game_rows(game, winners, losers, player_to_id)))
 
     # Extract and save player emblems (most recent emblem for each player)
     # Maps discord_id to their emblem_url
@@ -2114,11 +2934,6 @@ def main():
         json.dump(emblems, f, indent=2)
     print(f"  Saved {EMBLEMS_FILE} ({len(emblems)} player emblems)")
 
-    # Save rank history (for pre-game rank lookups on the website)
-    with open(RANKHISTORY_FILE, 'w') as f:
-        json.dump(rankhistory, f, indent=2)
-    print(f"  Saved {RANKHISTORY_FILE} ({len(rankhistory)} players with history)")
-
     # Detect and save series data (for manual playlists)
     print("\n  Detecting series from ranked games...")
     all_series = []
@@ -2129,41 +2944,24 @@ def main():
         if not playlist_games:
             continue
 
-        # Detect series for this playlist
-        playlist_series = detect_series(playlist_games, get_display_name)
+        # Detect series for this playlist (carrying each team's Discord IDs)
+        playlist_series = detect_series(playlist_games, get_display_name, player_to_id.get)
         print(f"    {playlist_name}: {len(playlist_series)} series detected")
 
         for series in playlist_series:
+            team_ids = series.pop('_player_ids')
             all_series.append(series)
 
             # Track series wins/losses for players
+            # IDs are sets per team, so two aliases of one player are only credited once
             winning_team = series['winner']
             if winning_team in ['Red', 'Blue']:
-                # Get player discord IDs for each team
-                for player_name in series['red_team']:
-                    # Find discord ID from in-game name
-                    for ingame_name, discord_id in player_to_id.items():
-                        display = get_display_name(ingame_name)
-                        if display == player_name:
-                            if discord_id not in series_player_stats:
-                                series_player_stats[discord_id] = {'series_wins': 0, 'series_losses': 0}
-                            if winning_team == 'Red':
-                                series_player_stats[discord_id]['series_wins'] += 1
-                            else:
-                                series_player_stats[discord_id]['series_losses'] += 1
-                            break
-
-                for player_name in series['blue_team']:
-                    for ingame_name, discord_id in player_to_id.items():
-                        display = get_display_name(ingame_name)
-                        if display == player_name:
-                            if discord_id not in series_player_stats:
-                                series_player_stats[discord_id] = {'series_wins': 0, 'series_losses': 0}
-                            if winning_team == 'Blue':
-                                series_player_stats[discord_id]['series_wins'] += 1
-                            else:
-                                series_player_stats[discord_id]['series_losses'] += 1
-                            break
+                for team, discord_ids in team_ids.items():
+                    result_key = 'series_wins' if team == winning_team else 'series_losses'
+                    for discord_id in discord_ids:
+                        if discord_id not in series_player_stats:
+                            series_player_stats[discord_id] = {'series_wins': 0, 'series_losses': 0}
+                        series_player_stats[discord_id][result_key] += 1
 
     # Update rankstats with series wins/losses
     for discord_id, stats in series_player_stats.items():
@@ -2171,7 +2969,81 @@ def main():
             rankstats[discord_id]['series_wins'] = stats['series_wins']
             rankstats[discord_id]['series_losses'] = stats['series_losses']
 
-    # Save series data for bot
+    # Add series stats to ranks.json
+    for user_id in ranks_data:
+        if user_id in series_player_stats:
+            ranks_data[user_id]['series_wins'] = series_player_stats[user_id]['series_wins']
+            ranks_data[user_id]['series_losses'] = series_player_stats[user_id]['series_losses']
+
+    # Record the run's results in the stats store in one transaction (only rows
+    # that changed are written), then write the JSON files from the same data
+    new_processed_state = {
+        "games": {game['source_file']: game.get('playlist') for game in all_games},
+        "manual_playlists_hash": get_manual_playlists_hash(manual_playlists),
+        "session_files": session_files
+    }
+    with store.transaction():
+        # Highest rank changes for the bot (compared with the previous run's records),
+        # only for real Discord accounts - placeholder IDs have no member to update.
+        # Changes an earlier run couldn't deliver are sent again with them.
+        rank_changes = merge_pending_rank_changes(store.get_meta('pending_rank_changes', {}), {
+            user_id: change for user_id, change in store.highest_rank_changes(ranks_data).items()
+            if user_id not in temp_ids and (user_id in players or user_id in rankstats)
+        })
+        rank_changes_version = store.get_meta('rank_changes_version', 0) + 1
+        store.set_meta('rank_changes_version', rank_changes_version)
+        store.set_meta('pending_rank_changes', rank_changes)
+        players_written, players_removed = store.sync_players(ranks_data)
+        games_written, games_removed = store.sync_games(store_games)
+        history_written, history_removed = store.sync_rank_history(rankhistory)
+        series_written, series_removed = store.sync_series(all_series)
+        store.set_meta('series_player_stats', series_player_stats)
+        store.set_meta('processed_state', new_processed_state)
+    print(f"\n  Stats store {STATS_DB_FILE}: {games_written} game(s), {players_written} player(s), "
+          f"{history_written} rank histories, {series_written} series written "
+          f"({games_removed + players_removed + history_removed + series_removed} removed)")
+
+    with open(RANKS_FILE, 'w') as f:
+        json.dump(ranks_data, f, indent=2)
+    print(f"  Saved {RANKS_FILE} ({len(ranks_data)} players)")
+
+    manifest_files = {playlist_name: None for playlist_name in all_playlists}
+    for playlist_name in all_playlists:
+        if not games_by_playlist.get(playlist_name):
+            continue
+        matches = [match for _, playlist, match, _ in store_games if playlist == playlist_name]
+        matches_file = get_playlist_files(playlist_name)['matches']
+        shard_dir = get_shard_dir(MATCH_SHARDS_DIR, playlist_name)
+        if args.match_output == 'shards':
+            written, removed = write_match_shards(shard_dir, playlist_name, matches)
+            manifest_files[playlist_name] = f"{shard_dir}/{MANIFEST_NAME}".replace(os.sep, '/')
+            playlist_files_saved.append(shard_dir)
+            playlist_files_removed.extend(removed)
+            # The single file would go stale - the site reads the manifest first anyway
+            if os.path.exists(matches_file):
+                os.remove(matches_file)
+                playlist_files_removed.append(matches_file)
+            print(f"  Saved {shard_dir}/ ({len(matches)} matches, "
+                  f"{len(written)} shard(s) written, {len(removed)} removed)")
+        else:
+            save_playlist_matches(playlist_name, {'playlist': playlist_name, 'matches': matches})
+            playlist_files_saved.append(matches_file)
+            playlist_files_removed.extend(remove_match_shards(shard_dir))
+            print(f"  Saved {matches_file} ({len(matches)} matches)")
+    if set_playlist_manifest_files(manifest_files):
+        print(f"  Updated manifest files in {PLAYLISTS_FILE}")
+
+    if untagged_games:
+        save_custom_games({'matches': [match for _, playlist, match, _ in store_games if playlist is None]})
+        playlist_files_saved.append(CUSTOMGAMES_FILE)
+        print(f"  Saved {CUSTOMGAMES_FILE} ({len(untagged_games)} custom games)")
+
+    # Rank history (for pre-game rank lookups on the website)
+    with open(RANKHISTORY_FILE, 'w') as f:
+        json.dump(rankhistory, f, indent=2)
+    print(f"  Saved {RANKHISTORY_FILE} ({len(rankhistory)} players with history)")
+
+    # Series data for bot
     series_data = {
         'series': all_series,
         'player_series_stats': series_player_stats,
@@ -2181,14 +3053,17 @@ def main():
         json.dump(series_data, f, indent=2)
     print(f"  Saved {SERIES_FILE} ({len(all_series)} series, {len(series_player_stats)} players)")
 
-    # Re-save ranks.json with series data
-    for user_id in ranks_data:
-        if user_id in series_player_stats:
-            ranks_data[user_id]['series_wins'] = series_player_stats[user_id]['series_wins']
-            ranks_data[user_id]['series_losses'] = series_player_stats[user_id]['series_losses']
-    with open(RANKS_FILE, 'w') as f:
-        json.dump(ranks_data, f, indent=2)
-    print(f"  Updated {RANKS_FILE} with series stats")
+    save_processed_state(new_processed_state)
+    print(f"  Saved {PROCESSED_STATE_FILE} ({len(all_games)} games)")
+
+    save_rank_changes(rank_changes_version, rank_changes)
+    print(f"  Saved {RANK_CHANGES_FILE} ({len(rank_changes)} highest rank change(s))")
+
+    if games_table.NUMPY_AVAILABLE:
+        table, added, removed = games_table.update_games_table(GAMES_TABLE_FILE, store_games)
+        print(f"  Saved {GAMES_TABLE_FILE} ({len(table)} rows, {added} game(s) added, {removed} removed)")
+    else:
+        print(f"  Skipping {GAMES_TABLE_FILE} (numpy not installed)")
 
     # Print summary
     print("\n" + "=" * 50)
@@ -2198,6 +3073,8 @@ def main():
     print(f"  Total games (stats tracked): {len(all_games)}")
     print(f"  Ranked games (XP/rank counts): {len(ranked_games)}")
     print(f"  Unranked games (stats only): {len(untagged_games)}")
+    print(f"  Parsed game cache: {game_cache.hits} hits, {game_cache.misses} misses")
+    print(f"  Quarantined files (failed to parse): {len(quarantined)}")
 
     # Count ranked games by playlist
     print(f"\nRanked Games by Playlist:")
@@ -2234,49 +3111,27 @@ def main():
     # Note: Website now loads data via fetch() from JSON files
     # No need to embed data in HTML anymore
 
-    # Save processed state for incremental updates
-    print("\n  Saving processed state for future incremental updates...")
-    new_player_state = {}
-    for user_id, data in rankstats.items():
-        # Only save players with actual game data
-        if data.get('total_games', 0) > 0 or data.get('wins', 0) > 0 or data.get('losses', 0) > 0:
-            new_player_state[user_id] = {
-                'xp': data.get('xp', 0),
-                'rank': data.get('rank', 1),
-                'wins': data.get('wins', 0),
-                'losses': data.get('losses', 0),
-                'total_games': data.get('total_games', 0),
-                'kills': data.get('kills', 0),
-                'deaths': data.get('deaths', 0),
-                'assists': data.get('assists', 0),
-                'headshots': data.get('headshots', 0),
-                'highest_rank': data.get('highest_rank', 1),
-                'playlists': data.get('playlists', {})
-            }
-
-    new_processed_state = {
-        "games": {game['source_file']: game.get('playlist') for game in all_games},
-        "manual_playlists_hash": get_manual_playlists_hash(manual_playlists),
-        "player_state": new_player_state,
-        "player_name_to_id": player_to_id  # Save name->id mapping for incremental mode
-    }
-    save_processed_state(new_processed_state)
-    print(f"  Saved {PROCESSED_STATE_FILE} ({len(new_player_state)} players, {len(all_games)} games)")
+    # Save the XP journal so the next run can resume from a checkpoint
+    save_xp_journal({
+        'version': XP_JOURNAL_VERSION,
+        'config_hash': xp_config_hash,
+        'games': journal_games,
+        'checkpoints': checkpoints
+    })
+    print(f"  Saved {XP_JOURNAL_FILE} ({len(journal_games)} ranked games, {len(checkpoints)} checkpoints)")
 
     print("\nDone!")
 
-    # Trigger Discord bot to refresh ranks
-    print("\nTriggering Discord bot rank refresh...")
-    try:
-        response = requests.post(DISCORD_REFRESH_WEBHOOK, json={
-            "content": "!refresh_ranks_trigger"
-        })
-        if response.status_code == 204:
-            print("  Discord webhook sent successfully!")
-        else:
-            print(f"  Warning: Webhook returned status {response.status_code}")
-    except Exception as e:
-        print(f"  Error sending webhook: {e}")
+    # Trigger Discord bot to refresh the ranks that changed
+    changed_ids = list(rank_changes)
+    run_summary = {
+        'total_games': len(all_games),
+        'ranked_games': len(ranked_games),
+        'custom_games': len(untagged_games),
+        'quarantined': len(quarantined),
+        'rank_changes': len(changed_ids),
+    }
+    trigger_rank_refresh(store, rank_changes_version, changed_ids, run_summary)
 
     # Push JSON files to GitHub for website updates
     print("\nPushing stats to GitHub...")
@@ -2299,6 +3154,9 @@ def main():
         # Add all JSON files (filter out any that don't exist)
         existing_files = [f for f in json_files if os.path.exists(f)]
         subprocess.run(['git', 'add'] + existing_files, check=True)
+        if playlist_files_removed:
+            subprocess.run(['git', 'rm', '--cached', '--quiet', '--ignore-unmatch', '--'] + playlist_files_removed,
+                           check=True)
 
         # Check if there are changes to commit
         result = subprocess.run(['git', 'diff', '--cached', '--quiet'], capture_output=True)
@@ -2332,5 +3190,61 @@ def main():
         print(f"  Error pushing to GitHub: {e}")
 
 
+def get_watch_dirs(args):
+    """Directories --watch listens on: the game sources plus the identity and theater dirs."""
+    watch_dirs = list(args.source_dirs or STATS_SOURCE_DIRS) + [STATS_PRIVATE_DIR, STATS_THEATER_DIR]
+    return list(dict.fromkeys(watch_dirs))
+
+def watch(args):
+    """
+    Daemon mode (--watch): process everything once, then run again each time a
+    debounced batch of files lands in the stats directories.
+
+    Imports, the reader engine and the stats store connection stay loaded
+    between batches. Everything else is reloaded per batch (players.json,
+    rankstats.json and the playlist overrides are edited by the bot and
+    admins), and parsed games, identity files and XP checkpoints come from
+    their on-disk caches - so a batch parses only the new workbooks and
+    replays XP from the latest checkpoint. Each batch exports and pushes the
+    results like a normal run. --full / --replay-from only apply to the first pass.
+    """
+    watch_dirs = get_watch_dirs(args)
+    watcher = create_watcher(watch_dirs, args.poll_interval)
+    print(f"Watching ({watcher.kind}): {', '.join(watch_dirs)}")
+
+    batch_args = argparse.Namespace(**vars(args))
+    batch_args.full = False
+    batch_args.replay_from = None
+
+    store = StatsStore(STATS_DB_FILE)
+    try:
+        process_stats(args, store)
+        while True:
+            print("\nWaiting for new stats files...")
+            changed = wait_for_changes(watcher, args.debounce, WATCH_MAX_DELAY_SECONDS)
+            print(f"\n{len(changed)} file(s) changed:")
+            for path in sorted(changed)[:5]:
+                print(f"  - {path}")
+            if len(changed) > 5:
+                print(f"  ... and {len(changed) - 5} more")
+
+            started = datetime.now()
+            try:
+                process_stats(batch_args, store)
+            except Exception as e:
+                # Keep the daemon alive; the next change retries
+                print(f"  Error processing changes: {type(e).__name__}: {e}")
+            print(f"Batch processed in {(datetime.now() - started).total_seconds():.1f}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        store.close()
+        watcher.close()
+
+
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    if args.watch:
+        watch(args)
+    else:
+        main(args)
@@ -240,10 +240,7 @@ def log_individual_game(series, game_number: int, winner: str):
     # Push to GitHub
     try:
         import github_webhook
-        if series.test_mode:
-            github_webhook.update_testmatchhistory_on_github()
-        else:
-            github_webhook.update_matchhistory_on_github()
+        github_webhook.queue_github_push(history_file)
     except Exception as e:
         log_action(f"Failed to push game to GitHub: {e}")
 
@@ -273,10 +270,7 @@ async def end_series(series_view, channel: discord.TextChannel):
     # Push to GitHub - correct file based on test mode
     try:
         import github_webhook
-        if series.test_mode:
-            github_webhook.update_testmatchhistory_on_github()
-        else:
-            github_webhook.update_matchhistory_on_github()
+        github_webhook.queue_github_push('testmatchhistory.json' if series.test_mode else 'matchhistory.json')
     except Exception as e:
         log_action(f"Failed to push to GitHub: {e}")
     
@@ -0,0 +1,312 @@
+"""
+rank_sync.py - Bulk "Level N" rank role sync for the Discord bot
+
+Used by STATSRANKS (refresh_all_ranks, /verifystatsall, /silentverify) and
+commands.py (/silentrankrefresh). A sync is done in two steps:
+
+  plan_rank_sync()  - compares every member's current Level role with their
+                      target level (from the member cache - no per-member
+                      fetches) and lists only the members that need a change
+  apply_rank_sync() - applies those changes with a bounded number of
+                      concurrent requests, adding and removing only the
+                      Level roles of each member
+
+Current levels come from RankRoleCache, which the cog keeps up to date from
+member and role events.
+
+discord.py already queues requests per rate-limit bucket and waits out 429s;
+the worker limits how many changes are in flight so a resync doesn't flood the
+member role buckets, and retries a change that still comes back rate limited or
+with a server error. dry_run=True stops after the plan.
+"""
+
+import asyncio
+import time
+
+import discord
+
+LEVEL_ROLE_PREFIX = "Level "
+DEFAULT_CONCURRENCY = 5
+MAX_ATTEMPTS = 3
+# Seconds between progress callbacks
+PROGRESS_INTERVAL = 2.0
+
+
+def parse_level(role_name):
+    """'Level 12' -> 12 (None for other roles)"""
+    if role_name.startswith(LEVEL_ROLE_PREFIX):
+        try:
+            return int(role_name[len(LEVEL_ROLE_PREFIX):])
+        except ValueError:
+            pass
+    return None
+
+
+def get_level_roles(member):
+    """A member's Level roles as [(level, role)]"""
+    levels = []
+    for role in member.roles:
+        level = parse_level(role.name)
+        if level is not None:
+            levels.append((level, role))
+    return levels
+
+
+class RankRoleCache:
+    """
+    Level -> role object and member -> current Level(s) for one guild.
+
+    Seeded from the guild once, then kept current by the STATSRANKS cog's
+    member and role event listeners (needs the members intent), so checking
+    a member's level is a dict lookup instead of a scan of their roles and
+    of guild.roles.
+    """
+
+    def __init__(self, guild):
+        self.guild_id = guild.id
+        self.roles = {}          # {level: discord.Role}
+        self.member_levels = {}  # {member_id: tuple of levels} - () for no Level role
+        self.seed(guild)
+
+    def seed(self, guild):
+        self.roles = {}
+        for role in guild.roles:
+            level = parse_level(role.name)
+            if level is not None:
+                self.roles[level] = role
+        self.member_levels = {member.id: self.levels_from_roles(member) for member in guild.members}
+
+    @staticmethod
+    def levels_from_roles(member):
+        return tuple(sorted(level for level, _ in get_level_roles(member)))
+
+    def levels(self, member):
+        """A member's Level(s) (from the cache, or their roles if not cached yet)"""
+        levels = self.member_levels.get(member.id)
+        if levels is None:
+            levels = self.member_levels[member.id] = self.levels_from_roles(member)
+        return levels
+
+    def has_level(self, member_id, level):
+        """True if the member is known to hold exactly this Level role"""
+        return self.member_levels.get(member_id) == (level,)
+
+    def update_member(self, member):
+        self.member_levels[member.id] = self.levels_from_roles(member)
+
+    def set_member_level(self, member_id, level):
+        self.member_levels[member_id] = (level,)
+
+    def remove_member(self, member_id):
+        self.member_levels.pop(member_id, None)
+
+
+_role_caches = {}  # {guild_id: RankRoleCache}
+
+
+def get_role_cache(guild, reseed=False):
+    """RankRoleCache for a guild (seeded on first use)."""
+    cache = _role_caches.get(guild.id)
+    if cache is None:
+        cache = _role_caches[guild.id] = RankRoleCache(guild)
+    elif reseed:
+        cache.seed(guild)
+    return cache
+
+
+def member_updated(member):
+    """Member joined or their roles changed (event listener hook)."""
+    cache = _role_caches.get(member.guild.id)
+    if cache:
+        cache.update_member(member)
+
+
+def member_removed(member):
+    cache = _role_caches.get(member.guild.id)
+    if cache:
+        cache.remove_member(member.id)
+
+
+def role_changed(role, after=None):
+    """
+    A role was created, renamed or deleted. Level roles are rare to change,
+    so the guild's cache is just re-seeded (a deleted role disappears from
+    members without a member update event).
+    """
+    cache = _role_caches.get(role.guild.id)
+    if not cache:
+        return
+    names = [role.name] if after is None else [role.name, after.name]
+    if any(parse_level(name) is not None for name in names) or role in cache.roles.values():
+        cache.seed(role.guild)
+
+
+class RankChange:
+    """One member whose Level role has to change."""
+
+    __slots__ = ('member', 'old_level', 'new_level', 'new_role')
+
+    def __init__(self, member, old_level, new_level, new_role):
+        self.member = member
+        self.old_level = old_level
+        self.new_level = new_level
+        self.new_role = new_role
+
+
+class RankSyncPlan:
+    """Result of plan_rank_sync()."""
+
+    def __init__(self):
+        self.changes = []        # [RankChange]
+        self.unchanged = 0       # members already on the right level
+        self.not_found = []      # target user IDs that aren't in the guild
+        self.missing_roles = set()  # levels with no "Level N" role in the guild
+
+    def summary(self):
+        return (f"{len(self.changes)} to update, {self.unchanged} already correct, "
+                f"{len(self.not_found)} not in server")
+
+
+async def plan_rank_sync(guild, targets, default_level=None):
+    """
+    Work out which members need a different Level role.
+
+    Args:
+        guild: discord.Guild
+        targets: {user_id (int): target level}
+        default_level: Level for non-bot members without a target (None = leave them alone)
+
+    Returns:
+        RankSyncPlan
+    """
+    # One gateway request for the whole member list instead of a fetch_member per missing member
+    reseed = False
+    if not guild.chunked:
+        try:
+            await guild.chunk()
+            reseed = True
+        except Exception as e:
+            print(f"[RANK SYNC] Could not load the member list: {e}")
+    cache = get_role_cache(guild, reseed=reseed)
+
+    plan = RankSyncPlan()
+    members = {member.id: member for member in guild.members}
+    for user_id in targets:
+        if user_id not in members:
+            plan.not_found.append(user_id)
+
+    for user_id, member in members.items():
+        if user_id in targets:
+            new_level = targets[user_id]
+        elif default_level is not None and not member.bot:
+            new_level = default_level
+        else:
+            continue
+
+        levels = cache.levels(member)
+        if levels == (new_level,):
+            plan.unchanged += 1
+            continue
+        new_role = cache.roles.get(new_level)
+        if new_role is None:
+            plan.missing_roles.add(new_level)
+            continue
+        old_level = levels[0] if levels else None
+        plan.changes.append(RankChange(member, old_level, new_level, new_role))
+    return plan
+
+
+async def apply_rank_change(change, reason="Rank update"):
+    """
+    Give the member exactly one Level role.
+
+    Only Level roles are added or removed (add_roles/remove_roles), so roles
+    someone else gives or takes while the sync runs aren't overwritten.
+    """
+    member = change.member
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            # member.roles follows member update events - re-read it on every attempt
+            stale = [role for _, role in get_level_roles(member) if role.id != change.new_role.id]
+            if not any(role.id == change.new_role.id for role in member.roles):
+                await member.add_roles(change.new_role, reason=reason)
+            if stale:
+                await member.remove_roles(*stale, reason=reason)
+            # The member update event will confirm it; until then don't plan the change again
+            cache = _role_caches.get(member.guild.id)
+            if cache:
+                cache.set_member_level(member.id, change.new_level)
+            return
+        except discord.HTTPException as e:
+            # discord.py retries 429s itself; this covers what still gets through
+            if attempt == MAX_ATTEMPTS - 1 or not (e.status == 429 or e.status >= 500):
+                raise
+            await asyncio.sleep(getattr(e, 'retry_after', None) or 2 ** attempt)
+
+
+async def apply_rank_sync(plan, concurrency=DEFAULT_CONCURRENCY, on_change=None, progress=None,
+                          dry_run=False):
+    """
+    Apply a plan.
+
+    Args:
+        plan: RankSyncPlan from plan_rank_sync()
+        concurrency: Members being changed at once
+        on_change: Optional coroutine function(change), awaited after a change is applied (e.g. a DM)
+        progress: Optional coroutine function(done, total), awaited at most every PROGRESS_INTERVAL seconds
+        dry_run: Don't change anything, just report the plan
+
+    Returns:
+        {'planned', 'applied', 'failed', 'seconds'}
+    """
+    started = time.monotonic()
+    result = {'planned': len(plan.changes), 'applied': 0, 'failed': 0, 'seconds': 0.0}
+    if dry_run or not plan.changes:
+        return result
+
+    semaphore = asyncio.Semaphore(concurrency)
+    last_progress = time.monotonic()
+
+    async def worker(change):
+        nonlocal last_progress
+        async with semaphore:
+            try:
+                await apply_rank_change(change)
+            except Exception as e:
+                result['failed'] += 1
+                print(f"[RANK SYNC] ❌ {change.member.display_name}: {e}")
+                return
+            result['applied'] += 1
+            if on_change:
+                try:
+                    await on_change(change)
+                except Exception as e:
+                    print(f"[RANK SYNC] Notification for {change.member.display_name} failed: {e}")
+        if progress and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            try:
+                await progress(result['applied'] + result['failed'], len(plan.changes))
+            except Exception:
+                pass
+
+    await asyncio.gather(*(worker(change) for change in plan.changes))
+    result['seconds'] = round(time.monotonic() - started, 1)
+    return result
+
+
+async def sync_rank_roles(guild, targets, default_level=None, concurrency=DEFAULT_CONCURRENCY,
+                          on_change=None, progress=None, dry_run=False):
+    """
+    plan_rank_sync() + apply_rank_sync().
+
+    Returns:
+        (plan, result)
+    """
+    plan = await plan_rank_sync(guild, targets, default_level)
+    if plan.missing_roles:
+        print(f"[RANK SYNC] ⚠️ Roles not found in guild: {', '.join(f'Level {level}' for level in sorted(plan.missing_roles))}")
+    print(f"[RANK SYNC] Plan: {plan.summary()}{' (dry run)' if dry_run else ''}")
+    result = await apply_rank_sync(plan, concurrency, on_change, progress, dry_run)
+    if not dry_run:
+        print(f"[RANK SYNC] Applied {result['applied']}, failed {result['failed']} in {result['seconds']}s")
+    return plan, result
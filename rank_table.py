@@ -0,0 +1,102 @@
+"""
+rank_table.py - Compiled rank thresholds and XP factors from xp_config.json
+
+Shared by populate_stats.py and STATSRANKS. A RankTable keeps the threshold
+minimums in a sorted list so a rank is one bisect, and the win/loss factors in
+a per-rank list. get_rank_table() caches the table per config file and only
+re-reads the file when its mtime or size changes, so rank lookups in a loop
+don't touch the disk.
+"""
+
+import json
+import os
+from bisect import bisect_right
+
+MAX_RANK = 50
+
+# Outside the configured factor ranges: losses below LOSS_FACTOR_MAX_RANK and
+# wins above WIN_FACTOR_MIN_RANK are scaled, everything else is full XP
+LOSS_FACTOR_MAX_RANK = 29
+WIN_FACTOR_MIN_RANK = 41
+DEFAULT_LOSS_FACTOR = 1.0
+DEFAULT_WIN_FACTOR = 0.50
+
+
+class RankTable:
+    """Rank thresholds and win/loss factors from one xp_config."""
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Parsed xp_config.json ('rank_thresholds' of {"level": [min, max]},
+                    optional 'win_factors'/'loss_factors' of {"level": factor})
+        """
+        self.game_win = config.get('game_win', 50)
+        self.game_loss = config.get('game_loss', 10)
+
+        levels = sorted((tuple(bounds), int(level)) for level, bounds in config.get('rank_thresholds', {}).items())
+        self.thresholds = {level: bounds for bounds, level in levels}  # {level: (min_xp, max_xp)}
+        self._mins = [bounds[0] for bounds, _ in levels]
+        self._levels = [level for _, level in levels]
+
+        win_factors = config.get('win_factors', {})
+        loss_factors = config.get('loss_factors', {})
+        # Index = rank; ranks past MAX_RANK fall back to the defaults
+        self._win_factors = [1.0 if rank < WIN_FACTOR_MIN_RANK else win_factors.get(str(rank), DEFAULT_WIN_FACTOR)
+                             for rank in range(MAX_RANK + 1)]
+        self._loss_factors = [loss_factors.get(str(rank), DEFAULT_LOSS_FACTOR) if rank <= LOSS_FACTOR_MAX_RANK
+                              else 1.0 for rank in range(MAX_RANK + 1)]
+
+    def rank(self, xp):
+        """
+        Rank level for an XP total: the highest level whose minimum is <= xp (1 below every minimum).
+
+        XP past the top level's maximum stays at the top level, as the bot's
+        calculate_rank() always did. populate_stats.py's old calculate_rank()
+        only matched inside a [min, max] range and fell back to 1 there.
+        """
+        i = bisect_right(self._mins, xp)
+        return self._levels[i - 1] if i else 1
+
+    def progress(self, xp):
+        """
+        Returns:
+            (rank, XP into the rank, XP still needed for the next rank) - 0 needed at MAX_RANK
+        """
+        rank = self.rank(xp)
+        if rank >= MAX_RANK or rank + 1 not in self.thresholds:
+            return rank, xp, 0
+        return rank, xp - self.thresholds[rank][0], self.thresholds[rank + 1][0] - xp
+
+    def win_factor(self, rank):
+        """Share of the win XP a player at this rank gets. Higher ranks gain less."""
+        if 0 <= rank <= MAX_RANK:
+            return self._win_factors[rank]
+        return 1.0 if rank < WIN_FACTOR_MIN_RANK else DEFAULT_WIN_FACTOR
+
+    def loss_factor(self, rank):
+        """Share of the loss XP a player at this rank loses. Lower ranks lose less."""
+        if 0 <= rank <= MAX_RANK:
+            return self._loss_factors[rank]
+        return DEFAULT_LOSS_FACTOR
+
+
+_tables = {}  # {path: ((mtime_ns, size), RankTable)}
+
+
+def get_rank_table(path='xp_config.json'):
+    """
+    RankTable for a config file, rebuilt only when the file changes.
+
+    Raises:
+        OSError if the file doesn't exist, ValueError if it isn't valid JSON
+    """
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _tables.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'r') as f:
+        table = RankTable(json.load(f))
+    _tables[path] = (key, table)
+    return table
@@ -1519,6 +1519,109 @@ async function toggleCustomGames(show) {
     renderGamesList();
 }
 
+// Load a playlist's matches: the summary index in its manifest
+// (populate_stats.py --match-output shards), else the single matches_file.
+// Manifest entries only carry the summary (teams, scores, winner, each player's
+// K/D/A and pre-game rank) plus a detail_url for the full match - see
+// ensureGameDetails().
+// Returns null if neither is available.
+async function fetchPlaylistMatches(playlist) {
+    if (playlist.manifest_file) {
+        // The manifest changes every run, so always revalidate it
+        const manifestResponse = await fetch(playlist.manifest_file, { cache: 'no-cache' });
+        if (manifestResponse.ok) {
+            const manifest = await manifestResponse.json();
+            const shardBase = playlist.manifest_file.substring(0, playlist.manifest_file.lastIndexOf('/') + 1);
+            // ?v=<content hash>: a shard's URL only changes when its content does
+            return (manifest.matches || []).map(entry => ({
+                ...entry,
+                detail_url: `${shardBase}${entry.file}?v=${entry.hash}`
+            }));
+        }
+    }
+
+    const matchesResponse = await fetch(playlist.matches_file);
+    if (!matchesResponse.ok) {
+        return null;
+    }
+    const matchesData = await matchesResponse.json();
+    return matchesData.matches || [];
+}
+
+// Copy a full match document (shard) onto a game that was loaded from its summary
+function applyMatchDetails(game, match) {
+    game.players = convertMatchToPlayers(match, { is_team: !match.players });
+    game.red_score = match.red_score;
+    game.blue_score = match.blue_score;
+    game.detailed_stats = match.detailed_stats || [];
+    game.medals = match.medals || [];
+    game.weapons = match.weapons || [];
+    game.versus = match.versus || {};
+    game.detail_url = null;
+}
+
+// Fetch a game's detail document if it only has its summary so far.
+// Resolves to the game; concurrent calls share one request.
+function ensureGameDetails(game) {
+    if (!game.detail_url) {
+        return Promise.resolve(game);
+    }
+    if (!game.detailsPromise) {
+        game.detailsPromise = fetch(game.detail_url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`${game.detail_url}: HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(match => {
+                applyMatchDetails(game, match);
+                return game;
+            })
+            .catch(e => {
+                game.detailsPromise = null;  // Retry on next use
+                throw e;
+            });
+    }
+    return game.detailsPromise;
+}
+
+// Fetch the detail documents of the summary-only games among games, a few at
+// a time. Failures are logged; those games keep their summary.
+async function ensureGamesDetails(games, concurrency = 6) {
+    const pending = games.filter(game => game.detail_url);
+    if (pending.length === 0) {
+        return;
+    }
+    console.log(`[DEBUG] Loading details for ${pending.length} games...`);
+    let next = 0;
+    const workers = Array.from({ length: Math.min(concurrency, pending.length) }, async () => {
+        while (next < pending.length) {
+            const game = pending[next++];
+            try {
+                await ensureGameDetails(game);
+            } catch (e) {
+                console.warn('[WARN] Could not load game details:', e);
+            }
+        }
+    });
+    await Promise.all(workers);
+}
+
+// Call render() once games have their details: straight away if they all do,
+// else after fetching them, with a loading message in container meanwhile.
+// Views built from medals, weapons, detailed stats or versus go through here.
+function withGameDetails(games, container, render) {
+    if (!games.some(game => game.detail_url)) {
+        render();
+        return;
+    }
+    if (container) {
+        container.innerHTML = '<div class="loading-message">Loading game details...</div>';
+    }
+    ensureGamesDetails(games).then(render);
+}
+
 async function loadGamesData() {
     const loadingArea = document.getElementById('loadingArea');
     const statsArea = document.getElementById('statsArea');
@@ -1567,11 +1670,10 @@ async function loadGamesData() {
             console.log('[DEBUG] Loading per-playlist match files...');
             for (const playlist of playlistsConfig.playlists) {
                 try {
-                    const matchesResponse = await fetch(playlist.matches_file);
-                    if (matchesResponse.ok) {
-                        const matchesData = await matchesResponse.json();
-                        playlistMatches[playlist.name] = matchesData.matches || [];
-                        console.log(`[DEBUG] Loaded ${playlistMatches[playlist.name].length} matches from ${playlist.matches_file}`);
+                    const matches = await fetchPlaylistMatches(playlist);
+                    if (matches) {
+                        playlistMatches[playlist.name] = matches;
+                        console.log(`[DEBUG] Loaded ${playlistMatches[playlist.name].length} matches for ${playlist.name}`);
 
                         // Convert to gamesData format for compatibility
                         for (const match of playlistMatches[playlist.name]) {
@@ -1595,7 +1697,9 @@ async function loadGamesData() {
                                 detailed_stats: match.detailed_stats || [],
                                 medals: match.medals || [],
                                 weapons: match.weapons || [],
-                                versus: match.versus || {}
+                                versus: match.versus || {},
+                                // Set for summary-only matches from a manifest (see ensureGameDetails)
+                                detail_url: match.detail_url || null
                             });
                         }
                     }
@@ -2050,9 +2154,17 @@ function toggleGameDetails(gameNumber) {
             const gameIndex = parseInt(gameItem.getAttribute('data-game-index'));
             const game = gamesData[gameIndex];
             if (game) {
-                gameContent.innerHTML = renderGameContent(game);
-                // Load scoreboard emblems
-                loadScoreboardEmblems(gameContent);
+                if (game.detail_url) {
+                    gameContent.innerHTML = '<div class="loading-message">Loading game details...</div>';
+                }
+                ensureGameDetails(game).then(() => {
+                    gameContent.innerHTML = renderGameContent(game);
+                    // Load scoreboard emblems
+                    loadScoreboardEmblems(gameContent);
+                }).catch(e => {
+                    console.warn('[WARN] Could not load game details:', e);
+                    gameContent.innerHTML = '';
+                });
             }
         }
     }
@@ -3563,6 +3675,10 @@ function setupSearchBox(inputElement, resultsElement, boxNumber) {
                 });
             });
 
+            // Medal and weapon totals need every game's details - until those are
+            // loaded (opening the result loads them) matches are listed without one
+            const detailsLoaded = !gamesData.some(game => game.detail_url);
+
             // Search for medals
             const matchedMedals = new Set();
             Object.keys(medalIcons).forEach(medalKey => {
@@ -3584,11 +3700,11 @@ function setupSearchBox(inputElement, resultsElement, boxNumber) {
                         });
                     }
                 });
-                if (totalCount > 0) {
+                if (totalCount > 0 || !detailsLoaded) {
                     results.push({
                         type: 'medal',
                         name: medal,
-                        meta: `${totalCount} earned total`
+                        meta: detailsLoaded ? `${totalCount} earned total` : 'Medal'
                     });
                 }
             });
@@ -3616,11 +3732,11 @@ function setupSearchBox(inputElement, resultsElement, boxNumber) {
                         });
                     }
                 });
-                if (totalKills > 0) {
+                if (totalKills > 0 || !detailsLoaded) {
                     results.push({
                         type: 'weapon',
                         name: weapon,
-                        meta: `${totalKills} kills total`
+                        meta: detailsLoaded ? `${totalKills} kills total` : 'Weapon'
                     });
                 }
             });
@@ -3718,6 +3834,10 @@ function handleSearchResultClick(type, name, boxNumber) {
     }
 }
 
+// Bumped per openSearchResultsPage() call, so a page whose game details arrive
+// after another search was opened isn't rendered over it
+let searchResultsRequest = 0;
+
 function openSearchResultsPage(type, name) {
     const searchResultsPage = document.getElementById('searchResultsPage');
     const searchResultsTitle = document.getElementById('searchResultsTitle');
@@ -3731,29 +3851,50 @@ function openSearchResultsPage(type, name) {
     // Scroll to top
     window.scrollTo(0, 0);
     
+    // Games the page is built from (medal and weapon pages cover every game)
+    let games = gamesData;
+    if (type === 'player') {
+        games = gamesData.filter(game => game.players.some(p => p.name === name));
+    } else if (type === 'map') {
+        games = gamesData.filter(game => game.details['Map Name'] === name);
+    } else if (type === 'gametype') {
+        games = gamesData.filter(game => game.details['Variant Name'] === name);
+    }
+    const request = ++searchResultsRequest;
+
     if (type === 'player') {
         searchResultsTitle.innerHTML = `${getPlayerRankIcon(name, 'small')} ${getDisplayNameForProfile(name)}`;
-        searchResultsContent.innerHTML = renderPlayerSearchResults(name);
     } else if (type === 'map') {
         const mapImage = mapImages[name] || defaultMapImage;
         searchResultsTitle.innerHTML = `<img src="${mapImage}" class="title-map-icon" alt="${name}"> ${name}`;
-        searchResultsContent.innerHTML = renderMapSearchResults(name);
     } else if (type === 'gametype') {
         searchResultsTitle.innerHTML = `🎮 ${name}`;
-        searchResultsContent.innerHTML = renderGametypeSearchResults(name);
     } else if (type === 'medal') {
         const medalIcon = getMedalIcon(name);
         const iconHtml = medalIcon ? `<img src="${medalIcon}" class="title-medal-icon" alt="${name}">` : '';
         searchResultsTitle.innerHTML = `${iconHtml} ${formatMedalName(name)}`;
-        searchResultsContent.innerHTML = renderMedalSearchResults(name);
     } else if (type === 'weapon') {
         const weaponIcon = weaponIcons[name.toLowerCase()];
         const iconHtml = weaponIcon ? `<img src="${weaponIcon}" class="title-weapon-icon" alt="${name}">` : '';
         searchResultsTitle.innerHTML = `${iconHtml} ${formatWeaponName(name)}`;
-        searchResultsContent.innerHTML = renderWeaponSearchResults(name);
-        // Load emblems for weapon leaderboard
-        loadBreakdownEmblems();
     }
+
+    withGameDetails(games, searchResultsContent, () => {
+        if (request !== searchResultsRequest) return;
+        if (type === 'player') {
+            searchResultsContent.innerHTML = renderPlayerSearchResults(name);
+        } else if (type === 'map') {
+            searchResultsContent.innerHTML = renderMapSearchResults(name);
+        } else if (type === 'gametype') {
+            searchResultsContent.innerHTML = renderGametypeSearchResults(name);
+        } else if (type === 'medal') {
+            searchResultsContent.innerHTML = renderMedalSearchResults(name);
+        } else if (type === 'weapon') {
+            searchResultsContent.innerHTML = renderWeaponSearchResults(name);
+            // Load emblems for weapon leaderboard
+            loadBreakdownEmblems();
+        }
+    });
 }
 
 function closeSearchResults() {
@@ -4508,7 +4649,11 @@ function toggleSearchGameDetails(searchCardId, gameNumber) {
         const game = gamesData[gamesData.length - gameNumber];
         if (game) {
             gameItem.classList.add('expanded');
-            gameContent.innerHTML = renderGameContent(game);
+            ensureGameDetails(game).then(() => {
+                if (gameItem.classList.contains('expanded')) {
+                    gameContent.innerHTML = renderGameContent(game);
+                }
+            }).catch(e => console.warn('[WARN] Could not load game details:', e));
         }
     }
 }
@@ -4549,10 +4694,11 @@ function openPlayerModal(playerName) {
     
     modal.classList.add('active');
     
-    setTimeout(() => {
+    const playerGames = gamesData.filter(game => game.players.some(p => p.name === playerName));
+    setTimeout(() => withGameDetails(playerGames, null, () => {
         const stats = calculatePlayerStats(playerName);
         modalPlayerStats.innerHTML = renderPlayerModalStats(stats);
-    }, 100);
+    }), 100);
 }
 
 function calculatePlayerStats(playerName, includeCustomGames = false) {
@@ -4645,12 +4791,13 @@ function openComparisonModal(player1Name, player2Name) {
     
     modal.classList.add('active');
     
-    setTimeout(() => {
+    const playerGames = gamesData.filter(game => game.players.some(p => p.name === player1Name || p.name === player2Name));
+    setTimeout(() => withGameDetails(playerGames, null, () => {
         const stats1 = calculatePlayerStats(player1Name);
         const stats2 = calculatePlayerStats(player2Name);
         const h2h = calculateHeadToHead(player1Name, player2Name);
         modalPlayerStats.innerHTML = renderComparisonStats(player1Name, stats1, player2Name, stats2, h2h);
-    }, 100);
+    }), 100);
 }
 
 function calculateHeadToHead(player1, player2) {
@@ -6096,21 +6243,28 @@ function openPlayerProfile(playerName) {
     document.getElementById('profilePlayerName').textContent = displayName;
     document.getElementById('profileRankIcon').innerHTML = getPlayerRankIcon(playerName, 'large');
 
-    // Calculate overall stats
-    const stats = calculatePlayerOverallStats(playerName);
-    renderProfileStats(stats);
-
-    // Get player's games
-    currentProfileGames = getPlayerGames(playerName);
-
     // Render playlist ranks
     renderProfilePlaylistRanks(playerName);
 
-    // Populate filter dropdowns
-    populateProfileFilters();
+    // The profile's stats and breakdowns need the player's full game details
+    const playerGames = gamesData.filter(game => game.players.some(p => p.name === playerName));
+    document.getElementById('profileGamesList').innerHTML = '';
+    withGameDetails(playerGames, document.getElementById('profileOverallStats'), () => {
+        if (currentProfilePlayer !== playerName) return;
+
+        // Calculate overall stats
+        const stats = calculatePlayerOverallStats(playerName);
+        renderProfileStats(stats);
+
+        // Get player's games
+        currentProfileGames = getPlayerGames(playerName);
 
-    // Render games list
-    renderProfileGames(currentProfileGames);
+        // Populate filter dropdowns
+        populateProfileFilters();
+
+        // Render games list
+        renderProfileGames(currentProfileGames);
+    });
 }
 
 // Render playlist-specific ranks for the player profile
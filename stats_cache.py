@@ -0,0 +1,115 @@
+"""
+stats_cache.py - On-disk cache for data derived from stats files
+
+Entries are stored one JSON file per source file and keyed by the source file's
+fingerprint: filename, size, mtime and a SHA-1 of the contents. An entry is only
+invalidated when the file actually changes - a file that was merely touched
+(new mtime, same bytes) is re-hashed once and then served from the cache again.
+"""
+
+import hashlib
+import json
+import os
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path):
+    """Return the SHA-1 hex digest of a file's contents."""
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_file_fingerprint(file_path, stat_result=None):
+    """
+    Build the full fingerprint (size, mtime, sha1) for a file.
+
+    Args:
+        file_path: Path to the file
+        stat_result: Optional os.stat_result (or anything with st_size/st_mtime)
+                     when the caller already has one
+    """
+    if stat_result is None:
+        stat_result = os.stat(file_path)
+    return {
+        'size': stat_result.st_size,
+        'mtime': stat_result.st_mtime,
+        'sha1': hash_file(file_path)
+    }
+
+
+class FingerprintCache:
+    """
+    Directory-backed cache of JSON-serializable data keyed by source file fingerprint.
+
+    Tracks hits and misses so callers can report cache effectiveness.
+    """
+
+    def __init__(self, cache_dir, version=1):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, filename):
+        return os.path.join(self.cache_dir, f"{filename}.json")
+
+    def _read_entry(self, filename):
+        try:
+            with open(self._entry_path(filename), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_entry(self, filename, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(filename)
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
+
+    def get(self, file_path, stat_result=None):
+        """
+        Return cached data for file_path, or None if there is no valid entry.
+
+        Size and mtime are checked first; the content hash is only computed when
+        the size matches but the mtime does not.
+        """
+        filename = os.path.basename(file_path)
+        entry = self._read_entry(filename)
+        if not entry or entry.get('version') != self.version:
+            self.misses += 1
+            return None
+
+        if stat_result is None:
+            stat_result = os.stat(file_path)
+        fingerprint = entry.get('fingerprint', {})
+
+        if fingerprint.get('size') != stat_result.st_size:
+            self.misses += 1
+            return None
+
+        if fingerprint.get('mtime') != stat_result.st_mtime:
+            # Touched but possibly unchanged - compare contents before giving up
+            if hash_file(file_path) != fingerprint.get('sha1'):
+                self.misses += 1
+                return None
+            fingerprint['mtime'] = stat_result.st_mtime
+            self._write_entry(filename, entry)
+
+        self.hits += 1
+        return entry.get('data')
+
+    def put(self, file_path, data, stat_result=None):
+        """Store data for file_path under its current fingerprint."""
+        filename = os.path.basename(file_path)
+        entry = {
+            'version': self.version,
+            'fingerprint': get_file_fingerprint(file_path, stat_result),
+            'data': data
+        }
+        self._write_entry(filename, entry)
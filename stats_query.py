@@ -0,0 +1,159 @@
+"""
+stats_query.py - Aggregate queries over games_table.npz
+
+Small helpers on top of games_table.GamesTable: build a row mask, then group
+and sum columns with np.unique/np.bincount, so a query is a few passes over
+typed arrays however many games there are.
+
+    from stats_query import load_table, select, totals
+    table = load_table()
+    mask = select(table, playlist='MLG 4v4', gametype='Slayer')
+    for row in totals(table, mask, columns=('kills', 'deaths', 'medal_killing_spree'))[:10]:
+        print(row)
+
+Or from the command line:
+
+    python stats_query.py --playlist "MLG 4v4" --sort kd --limit 20
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from games_table import RESULT_LOSS, RESULT_WIN, GamesTable
+
+GAMES_TABLE_FILE = os.environ.get('STATS_GAMES_TABLE', 'games_table.npz')
+
+
+def load_table(path=GAMES_TABLE_FILE):
+    """Load the games table (empty if it hasn't been built yet)."""
+    return GamesTable.load(path)
+
+
+def select(table, playlist=None, user_id=None, player=None, map_name=None, gametype=None,
+           since=None, mask=None):
+    """
+    Boolean row mask for the given filters (None = any).
+
+    Args:
+        playlist: Playlist name ('' for custom games)
+        since: Only games whose source file sorts at/after this prefix (e.g. '20251201')
+        mask: Existing mask to narrow down
+    """
+    result = np.ones(len(table), dtype=bool) if mask is None else mask.copy()
+    for column, value in (('playlist', playlist), ('user_id', user_id), ('player', player),
+                          ('map', map_name), ('gametype', gametype)):
+        if value is not None:
+            result &= table[column] == value
+    if since is not None:
+        result &= table['source_file'] >= since
+    return result
+
+
+def group_sum(table, by, columns, mask=None):
+    """
+    Sum columns per distinct value of `by`.
+
+    Returns:
+        (keys, {column: sums}) - sums are aligned with keys
+    """
+    if mask is None:
+        mask = np.ones(len(table), dtype=bool)
+    keys, groups = np.unique(table[by][mask], return_inverse=True)
+    sums = {column: np.bincount(groups, weights=table[column][mask], minlength=len(keys))
+            for column in columns}
+    return keys, sums
+
+
+def totals(table, mask=None, by='user_id', columns=('kills', 'deaths', 'assists'), sort='kills'):
+    """
+    Per-player totals with games played, wins, losses, K/D and win rate.
+
+    Args:
+        by: 'user_id' (unresolved players are skipped) or 'player' (display name)
+        columns: Columns to sum (any int/float column, e.g. 'headshots', 'weapon_sniper_rifle_kills')
+        sort: Output column to sort by, descending
+
+    Returns:
+        List of dicts, one per player
+    """
+    if mask is None:
+        mask = np.ones(len(table), dtype=bool)
+    if by == 'user_id':
+        mask = mask & (table['user_id'] != '')
+    columns = [column for column in columns if column in table]
+    sum_columns = sorted(set(columns) | {'kills', 'deaths'})
+    keys, groups, games = np.unique(table[by][mask], return_inverse=True, return_counts=True)
+    sums = {column: np.bincount(groups, weights=table[column][mask], minlength=len(keys))
+            for column in sum_columns}
+    result = table['result'][mask]
+    wins = np.bincount(groups, weights=result == RESULT_WIN, minlength=len(keys))
+    losses = np.bincount(groups, weights=result == RESULT_LOSS, minlength=len(keys))
+    kd = sums['kills'] / np.maximum(sums['deaths'], 1)
+    win_rate = wins / np.maximum(games, 1)
+
+    # Display name: the last one in the table for the key
+    names = {}
+    if by != 'player':
+        for key, name in zip(table[by][mask].tolist(), table['player'][mask].tolist()):
+            names[key] = name
+
+    rows = []
+    for i, key in enumerate(keys.tolist()):
+        row = {by: key, 'player': names.get(key, key), 'games': int(games[i]),
+               'wins': int(wins[i]), 'losses': int(losses[i]),
+               'kd': round(float(kd[i]), 2), 'win_rate': round(float(win_rate[i]), 3)}
+        for column in sum_columns:
+            total = sums[column][i]
+            row[column] = int(total) if table[column].dtype.kind in 'iu' else round(float(total), 2)
+        rows.append(row)
+    rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+    return rows
+
+
+def column_totals(table, prefix, mask=None):
+    """
+    Sum of every column with a prefix ('medal_' or 'weapon_') over the selected rows.
+
+    Returns:
+        {column name without prefix: total}, largest first
+    """
+    if mask is None:
+        mask = np.ones(len(table), dtype=bool)
+    result = {name[len(prefix):]: int(table[name][mask].sum()) for name in table.column_names(prefix)}
+    return dict(sorted(result.items(), key=lambda item: item[1], reverse=True))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Query per-player totals from games_table.npz')
+    parser.add_argument('--table', default=GAMES_TABLE_FILE, help='Table file (default: %(default)s)')
+    parser.add_argument('--playlist', help="Playlist name ('' for custom games)")
+    parser.add_argument('--map', dest='map_name', help='Map name')
+    parser.add_argument('--gametype', help='Base gametype (e.g. CTF, Slayer)')
+    parser.add_argument('--since', help='Only games at/after this date (YYYYMMDD)')
+    parser.add_argument('--by', choices=('user_id', 'player'), default='user_id', help='Group by (default: %(default)s)')
+    parser.add_argument('--columns', default='kills,deaths,assists',
+                        help='Comma-separated columns to sum (default: %(default)s)')
+    parser.add_argument('--sort', default='kills', help='Sort by this output column (default: %(default)s)')
+    parser.add_argument('--limit', type=int, default=25, help='Rows to print (default: %(default)s)')
+    return parser.parse_args(argv)
+
+
+def main(args):
+    table = load_table(args.table)
+    if not len(table):
+        print(f"{args.table} is empty or missing - run populate_stats.py first")
+        return
+    mask = select(table, playlist=args.playlist, map_name=args.map_name, gametype=args.gametype, since=args.since)
+    columns = [column.strip() for column in args.columns.split(',') if column.strip()]
+    rows = totals(table, mask, by=args.by, columns=columns, sort=args.sort)
+    print(f"{int(mask.sum())} rows, {len(rows)} players")
+    headers = ['player', 'games', 'wins', 'losses', 'win_rate', 'kd'] + [c for c in columns if c in table]
+    print('  '.join(f"{h:>12}" for h in headers))
+    for row in rows[:args.limit]:
+        print('  '.join(f"{str(row.get(h, ''))[:12]:>12}" for h in headers))
+
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,68 @@
+"""
+stats_scanner.py - Find game workbooks across the stats source directories
+
+Each source directory is listed once with os.scandir. A filename that appears in
+more than one directory is taken from the first directory it shows up in, and
+the stat result from the scan is kept so later stages (fingerprint cache,
+quarantine checks) don't need to stat the file again.
+"""
+
+import os
+from collections import namedtuple
+
+
+class GameFile(namedtuple('GameFile', ['filename', 'source_dir', 'stat'])):
+    """A game workbook found by scan_game_files(), with the os.stat_result from the scan."""
+
+    __slots__ = ()
+
+    @property
+    def path(self):
+        return os.path.join(self.source_dir, self.filename)
+
+    @property
+    def size(self):
+        return self.stat.st_size
+
+    @property
+    def mtime(self):
+        return self.stat.st_mtime
+
+
+def is_game_file(filename):
+    """True for game workbooks (.xlsx that aren't _identity files)."""
+    return filename.endswith('.xlsx') and '_identity' not in filename
+
+
+def scan_game_files(source_dirs):
+    """
+    List game workbooks in source_dirs, in one pass per directory.
+
+    Args:
+        source_dirs: Directories in priority order (missing ones are skipped)
+
+    Returns:
+        List of GameFile sorted by filename (timestamp)
+    """
+    seen = set()
+    game_files = []
+    for source_dir in source_dirs:
+        try:
+            it = os.scandir(source_dir)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                filename = entry.name
+                if filename in seen or not is_game_file(filename):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    # Removed between listing and stat
+                    continue
+                seen.add(filename)
+                game_files.append(GameFile(filename, source_dir, st))
+
+    game_files.sort(key=lambda game_file: game_file.filename)
+    return game_files
@@ -0,0 +1,354 @@
+"""
+stats_store.py - SQLite record of everything populate_stats.py produces
+
+The store is a sink, not the source of a run: populate_stats.py still
+recomputes every player, game, rank history and series in memory from all
+games each run and writes ranks.json, rankhistory.json, series.json,
+processed_state.json and the match files from that. The store is kept in step
+so that:
+
+- the previous run's results are at hand for change detection (processed
+  state, highest rank changes for the bot)
+- one player's record, games or rank history is an index lookup instead of
+  loading a whole JSON file
+
+Each record is kept as its JSON document plus the indexed columns it is looked
+up by. sync_*() methods hash every record and only write rows whose document
+changed, inside one transaction per run, so a run that adds a game writes that
+game's rows and the players it changed - but the sync itself is still a pass
+over all the run's data. The bot's rankstats.json is not in the store; the bot
+owns that file and reads it directly.
+
+export_*() rebuild the JSON documents from the store for tools that want them
+without a populate_stats.py run.
+"""
+
+import hashlib
+import json
+import sqlite3
+from contextlib import contextmanager
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    user_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    discord_name TEXT,
+    rank INTEGER,
+    doc_hash TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_discord_name ON players (discord_name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS games (
+    source_file TEXT PRIMARY KEY,
+    playlist TEXT,
+    position INTEGER NOT NULL,
+    start_time TEXT,
+    doc_hash TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_playlist ON games (playlist, position);
+CREATE TABLE IF NOT EXISTS player_games (
+    source_file TEXT NOT NULL REFERENCES games (source_file) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    user_id TEXT,
+    playlist TEXT,
+    team TEXT,
+    kills INTEGER,
+    deaths INTEGER,
+    assists INTEGER,
+    result TEXT,
+    PRIMARY KEY (source_file, position)
+);
+CREATE INDEX IF NOT EXISTS player_games_user ON player_games (user_id, source_file);
+CREATE TABLE IF NOT EXISTS rank_history (
+    user_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    source_file TEXT,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (user_id, seq)
+);
+CREATE INDEX IF NOT EXISTS rank_history_game ON rank_history (source_file);
+CREATE TABLE IF NOT EXISTS rank_history_players (
+    user_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    doc_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    series_id TEXT PRIMARY KEY,
+    playlist TEXT,
+    position INTEGER NOT NULL,
+    doc_hash TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS series_playlist ON series (playlist, position);
+"""
+
+
+def encode_doc(doc):
+    """JSON document and its hash (used to skip unchanged rows)."""
+    text = json.dumps(doc, separators=(',', ':'))
+    return text, hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class StatsStore:
+    """SQLite-backed store for players, games, rank history and series."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # Everything in the store can be regenerated, so an old schema is dropped
+            self._drop_all()
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+
+    def _drop_all(self):
+        tables = [row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Commit everything in the block at once, or nothing if it raises."""
+        try:
+            yield self
+            self.conn.commit()
+        except:
+            self.conn.rollback()
+            raise
+
+    # -- meta --
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    # -- players --
+
+    def sync_players(self, players):
+        """
+        Make the players table match {user_id: record} (ranks.json format).
+
+        Returns:
+            (written, removed) row counts
+        """
+        existing = dict(self.conn.execute('SELECT user_id, doc_hash || position FROM players'))
+        written = 0
+        for position, (user_id, record) in enumerate(players.items()):
+            doc, doc_hash = encode_doc(record)
+            if existing.pop(user_id, None) == f"{doc_hash}{position}":
+                continue
+            self.conn.execute(
+                'INSERT OR REPLACE INTO players (user_id, position, discord_name, rank, doc_hash, doc) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (user_id, position, record.get('discord_name'), record.get('rank'), doc_hash, doc))
+            written += 1
+        self.conn.executemany('DELETE FROM players WHERE user_id = ?', [(user_id,) for user_id in existing])
+        return written, len(existing)
+
+    def highest_rank_changes(self, players):
+        """
+        Players whose highest_rank differs from the stored record, new players
+        included. Call before sync_players(); only records whose document
+        changed are decoded.
+
+        Returns:
+            {user_id: (old highest_rank or None, new highest_rank)}
+        """
+        existing = dict(self.conn.execute('SELECT user_id, doc_hash FROM players'))
+        changes = {}
+        for user_id, record in players.items():
+            new_rank = record.get('highest_rank', 1)
+            old_hash = existing.get(user_id)
+            if old_hash is None:
+                changes[user_id] = (None, new_rank)
+            elif encode_doc(record)[1] != old_hash:
+                old_rank = (self.get_player(user_id) or {}).get('highest_rank', 1)
+                if old_rank != new_rank:
+                    changes[user_id] = (old_rank, new_rank)
+        return changes
+
+    def get_player(self, user_id):
+        """One player's record, or None."""
+        row = self.conn.execute('SELECT doc FROM players WHERE user_id = ?', (str(user_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_player_id(self, discord_name):
+        """user_id for a discord_name (case-insensitive), or None."""
+        row = self.conn.execute('SELECT user_id FROM players WHERE discord_name = ? COLLATE NOCASE '
+                                'ORDER BY position LIMIT 1', (discord_name,)).fetchone()
+        return row[0] if row else None
+
+    def export_players(self):
+        """{user_id: record} in the order they were synced (ranks.json)."""
+        return {user_id: json.loads(doc) for user_id, doc in
+                self.conn.execute('SELECT user_id, doc FROM players ORDER BY position')}
+
+    # -- games --
+
+    def sync_games(self, games):
+        """
+        Make the games / player_games tables match a run's games.
+
+        Args:
+            games: List of (source_file, playlist or None, match entry, player rows) in
+                   output order. Player rows are dicts with player_name, user_id, team,
+                   kills, deaths, assists and result, in Post Game Report order (keyed
+                   by that position - two players can share a name).
+
+        Returns:
+            (written, removed) game counts
+        """
+        existing = dict(self.conn.execute('SELECT source_file, doc_hash || position || IFNULL(playlist, \'\') '
+                                          'FROM games'))
+        written = 0
+        for position, (source_file, playlist, match, player_rows) in enumerate(games):
+            doc, doc_hash = encode_doc(match)
+            if existing.pop(source_file, None) == f"{doc_hash}{position}{playlist or ''}":
+                continue
+            self.upsert_game(source_file, playlist, position, match, player_rows, doc=(doc, doc_hash))
+            written += 1
+        self.conn.executemany('DELETE FROM games WHERE source_file = ?', [(f,) for f in existing])
+        return written, len(existing)
+
+    def upsert_game(self, source_file, playlist, position, match, player_rows, doc=None):
+        """Insert or replace one game and its player rows."""
+        doc, doc_hash = doc or encode_doc(match)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO games (source_file, playlist, position, start_time, doc_hash, doc) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (source_file, playlist, position, match.get('timestamp'), doc_hash, doc))
+        self.conn.execute('DELETE FROM player_games WHERE source_file = ?', (source_file,))
+        self.conn.executemany(
+            'INSERT INTO player_games '
+            '(source_file, position, player_name, user_id, playlist, team, kills, deaths, assists, result) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(source_file, position, row['player_name'], row.get('user_id'), playlist, row.get('team'),
+              row.get('kills', 0), row.get('deaths', 0), row.get('assists', 0), row.get('result'))
+             for position, row in enumerate(player_rows)])
+
+    def get_game(self, source_file):
+        """One game's match entry, or None."""
+        row = self.conn.execute('SELECT doc FROM games WHERE source_file = ?', (source_file,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_player_games(self, user_id, playlist=None):
+        """A player's per-game rows (oldest first), optionally for one playlist."""
+        query = ('SELECT pg.source_file, pg.player_name, pg.playlist, pg.team, pg.kills, pg.deaths, '
+                 'pg.assists, pg.result FROM player_games pg JOIN games g USING (source_file) '
+                 'WHERE pg.user_id = ?')
+        params = [str(user_id)]
+        if playlist is not None:
+            query += ' AND pg.playlist = ?'
+            params.append(playlist)
+        columns = ('source_file', 'player_name', 'playlist', 'team', 'kills', 'deaths', 'assists', 'result')
+        return [dict(zip(columns, row)) for row in
+                self.conn.execute(query + ' ORDER BY g.source_file, pg.position', params)]
+
+    def export_games(self, playlist):
+        """Match entries of one playlist (None = custom games) in output order."""
+        if playlist is None:
+            rows = self.conn.execute('SELECT doc FROM games WHERE playlist IS NULL ORDER BY position')
+        else:
+            rows = self.conn.execute('SELECT doc FROM games WHERE playlist = ? ORDER BY position', (playlist,))
+        return [json.loads(doc) for doc, in rows]
+
+    # -- rank history --
+
+    def sync_rank_history(self, rankhistory):
+        """
+        Make rank_history match {user_id: {'discord_name', 'history': [entry, ...]}}
+        (rankhistory.json). A player's rows are only rewritten when their history changed.
+
+        Returns:
+            (written, removed) player counts
+        """
+        existing = dict(self.conn.execute('SELECT user_id, doc_hash || position FROM rank_history_players'))
+        written = 0
+        for position, (user_id, record) in enumerate(rankhistory.items()):
+            _, doc_hash = encode_doc(record)
+            if existing.pop(user_id, None) == f"{doc_hash}{position}":
+                continue
+            header = {k: v for k, v in record.items() if k != 'history'}
+            self.conn.execute('DELETE FROM rank_history WHERE user_id = ?', (user_id,))
+            # seq 0 holds the record minus its history list
+            rows = [(user_id, 0, None, json.dumps(header))]
+            rows += [(user_id, seq, entry.get('source_file'), json.dumps(entry))
+                     for seq, entry in enumerate(record.get('history', []), 1)]
+            self.conn.executemany('INSERT INTO rank_history (user_id, seq, source_file, doc) VALUES (?, ?, ?, ?)',
+                                  rows)
+            self.conn.execute('INSERT OR REPLACE INTO rank_history_players (user_id, position, doc_hash) '
+                              'VALUES (?, ?, ?)', (user_id, position, doc_hash))
+            written += 1
+        for user_id in existing:
+            self.conn.execute('DELETE FROM rank_history WHERE user_id = ?', (user_id,))
+            self.conn.execute('DELETE FROM rank_history_players WHERE user_id = ?', (user_id,))
+        return written, len(existing)
+
+    def get_rank_history(self, user_id):
+        """One player's rankhistory.json record, or None."""
+        rows = self.conn.execute('SELECT seq, doc FROM rank_history WHERE user_id = ? ORDER BY seq',
+                                 (str(user_id),)).fetchall()
+        if not rows:
+            return None
+        record = json.loads(rows[0][1])
+        record['history'] = [json.loads(doc) for _, doc in rows[1:]]
+        return record
+
+    def export_rank_history(self):
+        """{user_id: record} (rankhistory.json)."""
+        rankhistory = {}
+        for user_id, in self.conn.execute('SELECT user_id FROM rank_history_players ORDER BY position'):
+            rankhistory[user_id] = None
+        for user_id, seq, doc in self.conn.execute('SELECT user_id, seq, doc FROM rank_history '
+                                                   'ORDER BY user_id, seq'):
+            if seq == 0:
+                rankhistory[user_id] = json.loads(doc)
+                rankhistory[user_id]['history'] = []
+            else:
+                rankhistory[user_id]['history'].append(json.loads(doc))
+        return rankhistory
+
+    # -- series --
+
+    def sync_series(self, series_list):
+        """
+        Make the series table match a run's detected series.
+
+        Returns:
+            (written, removed) row counts
+        """
+        existing = dict(self.conn.execute('SELECT series_id, doc_hash || position FROM series'))
+        written = 0
+        for position, series in enumerate(series_list):
+            # series_id restarts per playlist, so key on both
+            key = f"{series.get('playlist')}/{series['series_id']}"
+            doc, doc_hash = encode_doc(series)
+            if existing.pop(key, None) == f"{doc_hash}{position}":
+                continue
+            self.conn.execute('INSERT OR REPLACE INTO series (series_id, playlist, position, doc_hash, doc) '
+                              'VALUES (?, ?, ?, ?, ?)', (key, series.get('playlist'), position, doc_hash, doc))
+            written += 1
+        self.conn.executemany('DELETE FROM series WHERE series_id = ?', [(key,) for key in existing])
+        return written, len(existing)
+
+    def export_series(self):
+        """Series in the order they were synced."""
+        return [json.loads(doc) for doc, in self.conn.execute('SELECT doc FROM series ORDER BY position')]
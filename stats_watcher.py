@@ -0,0 +1,136 @@
+"""
+stats_watcher.py - Watch the stats directories for new or changed files
+
+Used by populate_stats.py --watch. inotify (via the optional inotify_simple
+package) is used when it's installed, otherwise directories are polled with
+os.scandir. Either way wait_for_changes() debounces bursts of uploads into a
+single batch.
+"""
+
+import os
+import time
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+
+def is_relevant(filename):
+    """Ignore hidden and temporary files written during uploads."""
+    return not (filename.startswith('.') or filename.endswith(('.tmp', '.part', '~')))
+
+
+class PollingWatcher:
+    """Detects changes by comparing (size, mtime) snapshots of each directory."""
+
+    kind = 'polling'
+
+    def __init__(self, directories, interval=2.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not is_relevant(entry.name):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout=None):
+        """
+        Wait up to timeout seconds (None = forever) and return the set of
+        paths that were added, changed or removed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher (only directories that exist when it starts are watched)."""
+
+    kind = 'inotify'
+
+    def __init__(self, directories):
+        self.inotify = INotify()
+        mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+        self.watches = {}
+        for directory in directories:
+            if os.path.isdir(directory):
+                self.watches[self.inotify.add_watch(directory, mask)] = directory
+
+    def read(self, timeout=None):
+        """Same contract as PollingWatcher.read()."""
+        timeout_ms = None if timeout is None else int(timeout * 1000)
+        changed = set()
+        for event in self.inotify.read(timeout=timeout_ms):
+            directory = self.watches.get(event.wd)
+            if directory and event.name and is_relevant(event.name):
+                changed.add(os.path.join(directory, event.name))
+        return changed
+
+    def close(self):
+        self.inotify.close()
+
+
+def create_watcher(directories, poll_interval=2.0):
+    """inotify watcher when available, polling otherwise."""
+    if INOTIFY_AVAILABLE:
+        try:
+            return InotifyWatcher(directories)
+        except OSError as e:
+            # e.g. inotify watch limit reached
+            print(f"  Warning: inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(directories, poll_interval)
+
+
+def wait_for_changes(watcher, debounce=3.0, max_delay=30.0):
+    """
+    Block until something changes, then keep collecting changes until the
+    directories have been quiet for `debounce` seconds (or `max_delay` seconds
+    have passed since the first change, so a steady trickle can't stall it).
+
+    Returns:
+        Set of changed paths
+    """
+    changed = set()
+    while not changed:
+        changed = watcher.read()
+
+    first_change = time.monotonic()
+    while True:
+        remaining = max_delay - (time.monotonic() - first_change)
+        if remaining <= 0:
+            break
+        more = watcher.read(min(debounce, remaining))
+        if not more:
+            break
+        changed |= more
+    return changed
@@ -0,0 +1,26 @@
+"""
+Shared test setup: the modules live at the repo root, so it goes on sys.path.
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+# Not needed for a populate_stats.py run (images, generated state)
+RUN_COPY_IGNORE = shutil.ignore_patterns('.git', 'tests', '__pycache__', '.stats_cache', 'stats.db*', 'assets',
+                                         'emblems', 'mapimages', '*.png', '*.ico', 'processed_state.json')
+
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    """A copy of the repo's data files to run populate_stats.py in (cwd is set to it)."""
+    path = tmp_path / 'site'
+    shutil.copytree(REPO_DIR, path, ignore=RUN_COPY_IGNORE)
+    monkeypatch.chdir(path)
+    return path
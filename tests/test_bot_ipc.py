@@ -0,0 +1,103 @@
+"""
+Tests for bot_ipc: start_ipc_server with stub handlers, driven by send_command.
+"""
+
+import asyncio
+import json
+import socket
+
+import pytest
+
+from bot_ipc import BotIpcError, send_command, start_ipc_server
+
+
+async def refresh_ranks(ids=()):
+    return {'queued': len(ids)}
+
+
+async def fail():
+    raise RuntimeError('stats not loaded')
+
+
+HANDLERS = {'refresh-ranks': refresh_ranks, 'fail': fail}
+
+
+def send_raw(path, line):
+    """Send one raw request line and return the decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(path)
+        sock.sendall(line)
+        reply = b''
+        while not reply.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    return json.loads(reply)
+
+
+def with_server(path, client):
+    """Run client(path) in a thread against a server with HANDLERS and return its result."""
+    async def run():
+        server = await start_ipc_server(HANDLERS, path)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, client, path)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / 'bot_ipc.sock')
+
+
+def test_command_result(socket_path):
+    result = with_server(socket_path, lambda path: send_command('refresh-ranks', {'ids': ['1', '2']}, path=path))
+    assert result == {'queued': 2}
+
+
+def test_command_without_args(socket_path):
+    assert with_server(socket_path, lambda path: send_command('refresh-ranks', path=path)) == {'queued': 0}
+
+
+def test_unknown_command(socket_path):
+    with pytest.raises(BotIpcError, match='Unknown command: restart'):
+        with_server(socket_path, lambda path: send_command('restart', path=path))
+
+
+def test_invalid_json(socket_path):
+    assert with_server(socket_path, lambda path: send_raw(path, b'{"command": \n')) == \
+           {'ok': False, 'error': 'Invalid request'}
+    assert with_server(socket_path, lambda path: send_raw(path, b'{"args": {}}\n')) == \
+           {'ok': False, 'error': 'Invalid request'}
+
+
+def test_bad_args_fail_the_command(socket_path):
+    # TypeError from the handler call comes back as ok: false, not a dropped connection
+    reply = with_server(socket_path, lambda path: send_raw(
+        path, json.dumps({'command': 'refresh-ranks', 'args': {'user_ids': []}}).encode('utf-8') + b'\n'))
+    assert reply['ok'] is False
+    assert 'user_ids' in reply['error']
+
+    with pytest.raises(BotIpcError, match='user_ids'):
+        with_server(socket_path, lambda path: send_command('refresh-ranks', {'user_ids': []}, path=path))
+
+
+def test_handler_error(socket_path):
+    with pytest.raises(BotIpcError, match='stats not loaded'):
+        with_server(socket_path, lambda path: send_command('fail', path=path))
+
+
+def test_stale_socket_file_is_replaced(socket_path):
+    open(socket_path, 'w').close()
+    assert with_server(socket_path, lambda path: send_command('refresh-ranks', {'ids': ['1']}, path=path)) == \
+           {'queued': 1}
+
+
+def test_no_server_listening(socket_path):
+    with pytest.raises(BotIpcError, match='Bot not reachable'):
+        send_command('status', path=socket_path, timeout=1)
@@ -0,0 +1,205 @@
+"""
+Tests for github_webhook.GitHubPublisher against an in-process stand-in for the
+GitHub Git Data API (plugged in as the http_client transport).
+"""
+
+import hashlib
+import json
+import threading
+
+import pytest
+
+import http_client
+from github_webhook import GitHubPublisher, git_blob_sha
+
+API_URL = 'https://github.test'
+REPO = 'owner/site'
+PREFIX = f"{API_URL}/repos/{REPO}/"
+
+
+class Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = {}
+
+    def json(self):
+        return self.body
+
+
+def object_sha(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FakeGitHub:
+    """
+    Just enough of the Git Data API for GitHubPublisher: refs, commits and
+    trees with inline blob contents.
+
+    ref_conflicts: PATCHes to answer with 422 (someone else moved the branch first)
+    fail: {(method, path prefix): status} to answer with instead
+    """
+
+    def __init__(self, files=None):
+        self.trees = {}
+        self.commits = {}
+        self.requests = []
+        self.ref_conflicts = 0
+        self.fail = {}
+        self.on_request = None
+        self.head = self._add_commit(self._add_tree(dict(files or {})), [], 'initial')
+
+    def _add_tree(self, files):
+        sha = object_sha(files)
+        self.trees[sha] = files
+        return sha
+
+    def _add_commit(self, tree, parents, message):
+        sha = object_sha([tree, parents, message, len(self.commits)])
+        self.commits[sha] = {'tree': tree, 'parents': parents, 'message': message}
+        return sha
+
+    def files(self):
+        return self.trees[self.commits[self.head]['tree']]
+
+    def request(self, method, url, json=None, **kwargs):
+        assert url.startswith(PREFIX)
+        path = url[len(PREFIX):]
+        self.requests.append((method, path))
+        if self.on_request:
+            self.on_request(method, path)
+        for (fail_method, fail_path), status in self.fail.items():
+            if method == fail_method and path.startswith(fail_path):
+                return Response(status)
+
+        if method == 'GET' and path.startswith('git/ref/heads/'):
+            return Response(200, {'object': {'sha': self.head}})
+        if method == 'GET' and path.startswith('git/commits/'):
+            return Response(200, {'tree': {'sha': self.commits[path.split('/')[-1]]['tree']}})
+        if method == 'POST' and path == 'git/trees':
+            files = dict(self.trees[json['base_tree']])
+            files.update({entry['path']: entry['content'] for entry in json['tree']})
+            return Response(201, {'sha': self._add_tree(files)})
+        if method == 'POST' and path == 'git/commits':
+            return Response(201, {'sha': self._add_commit(json['tree'], json['parents'], json['message'])})
+        if method == 'PATCH' and path.startswith('git/refs/heads/'):
+            commit = self.commits[json['sha']]
+            if self.ref_conflicts or commit['parents'] != [self.head]:
+                if self.ref_conflicts:
+                    self.ref_conflicts -= 1
+                    # Someone else pushed in between
+                    self.head = self._add_commit(self.commits[self.head]['tree'], [self.head], 'other push')
+                return Response(422, {'message': 'Update is not a fast forward'})
+            self.head = json['sha']
+            return Response(200, {'object': {'sha': self.head}})
+        return Response(404)
+
+    def count(self, method, path):
+        return sum(1 for request in self.requests if request == (method, path))
+
+
+@pytest.fixture
+def github():
+    return FakeGitHub({'README.md': 'site'})
+
+
+@pytest.fixture
+def publisher(github, tmp_path):
+    client = http_client.HttpClient(transport=github, sleep=lambda seconds: None)
+    return GitHubPublisher(REPO, 'main', 'token', api_url=API_URL,
+                           cache_file=str(tmp_path / 'blob_cache.json'), client=client)
+
+
+def test_flush_commits_all_staged_files_at_once(publisher, github):
+    assert publisher.stage_content('ranks.json', '{"a": 1}')
+    assert publisher.stage_content('series.json', '{"b": 2}')
+    assert publisher.flush('Update stats')
+
+    assert github.files() == {'README.md': 'site', 'ranks.json': '{"a": 1}', 'series.json': '{"b": 2}'}
+    assert github.commits[github.head]['message'] == 'Update stats'
+    assert github.count('PATCH', 'git/refs/heads/main') == 1
+    assert publisher.pending == {}
+
+
+def test_blob_cache_skips_unchanged_content(publisher, github, tmp_path):
+    publisher.stage_content('ranks.json', '{"a": 1}')
+    assert publisher.flush()
+    requests = len(github.requests)
+
+    # Same content again - no request at all, even from a new publisher reading the cache file
+    assert not publisher.stage_content('ranks.json', '{"a": 1}')
+    assert publisher.flush()
+    reloaded = GitHubPublisher(REPO, 'main', 'token', api_url=API_URL, cache_file=str(tmp_path / 'blob_cache.json'),
+                               client=publisher.client)
+    assert reloaded.blob_cache['ranks.json'] == git_blob_sha(b'{"a": 1}')
+    assert not reloaded.stage_content('ranks.json', '{"a": 1}')
+    assert len(github.requests) == requests
+
+
+def test_unchanged_tree_makes_no_commit(publisher, github):
+    # Content already on the branch but not in the blob cache
+    publisher.stage_content('README.md', 'site')
+    head = github.head
+    assert publisher.flush()
+
+    assert github.head == head
+    assert github.count('POST', 'git/commits') == 0
+    assert github.count('PATCH', 'git/refs/heads/main') == 0
+    assert publisher.pending == {}
+    assert publisher.blob_cache['README.md'] == git_blob_sha(b'site')
+
+
+def test_moved_branch_is_retried_on_the_new_head(publisher, github):
+    github.ref_conflicts = 2
+    publisher.stage_content('ranks.json', '{"a": 1}')
+    assert publisher.flush()
+
+    assert github.count('PATCH', 'git/refs/heads/main') == 3
+    assert github.files()['ranks.json'] == '{"a": 1}'
+    # The final commit sits on top of the other pushes
+    assert github.commits[github.commits[github.head]['parents'][0]]['message'] == 'other push'
+
+
+def test_too_many_conflicts_fail_and_keep_pending(publisher, github):
+    github.ref_conflicts = GitHubPublisher.MAX_REF_RETRIES + 1
+    publisher.stage_content('ranks.json', '{"a": 1}')
+    assert not publisher.flush()
+    assert 'ranks.json' in publisher.pending
+
+
+def test_failed_flush_keeps_pending(publisher, github):
+    github.fail[('POST', 'git/commits')] = 403
+    publisher.stage_content('ranks.json', '{"a": 1}')
+    assert not publisher.flush()
+
+    assert publisher.pending == {'ranks.json': b'{"a": 1}'}
+    assert 'ranks.json' not in publisher.blob_cache
+    assert 'ranks.json' not in github.files()
+
+    # The next flush pushes it
+    github.fail.clear()
+    assert publisher.flush()
+    assert github.files()['ranks.json'] == '{"a": 1}'
+    assert publisher.pending == {}
+
+
+def test_staging_during_a_flush_does_not_wait_and_is_kept(publisher, github):
+    publisher.stage_content('ranks.json', '{"a": 1}')
+    staged = []
+
+    def stage_from_other_thread(method, path):
+        if method == 'POST' and path == 'git/trees' and not staged:
+            thread = threading.Thread(target=lambda: staged.append(publisher.stage_content('ranks.json', '{"a": 2}')))
+            thread.start()
+            thread.join(timeout=5)
+            assert not thread.is_alive(), "stage_content blocked on the flush"
+
+    github.on_request = stage_from_other_thread
+    assert publisher.flush()
+    assert staged == [True]
+    assert github.files()['ranks.json'] == '{"a": 1}'
+    # The newer content is left for the next flush
+    assert publisher.pending == {'ranks.json': b'{"a": 2}'}
+    github.on_request = None
+    assert publisher.flush()
+    assert github.files()['ranks.json'] == '{"a": 2}'
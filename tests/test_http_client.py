@@ -0,0 +1,126 @@
+"""
+Tests for http_client: rate limit parsing and HttpClient retries on a fake transport.
+"""
+
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from http_client import HttpClient, rate_limit_delay
+
+NOW = 1_700_000_000.0
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class Transport:
+    """Returns the queued responses in order (an exception instance is raised instead)."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_client(*responses, **kwargs):
+    sleeps = []
+    transport = Transport(*responses)
+    client = HttpClient(transport=transport, sleep=sleeps.append, **kwargs)
+    return client, transport, sleeps
+
+
+@pytest.mark.parametrize('status, headers, expected', [
+    (429, {'Retry-After': '7'}, 7.0),
+    (429, {'Retry-After': formatdate(NOW + 30, usegmt=True)}, 30.0),
+    (429, {'X-RateLimit-Reset-After': '2.5'}, 2.5),
+    (403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(NOW + 60))}, 60.0),
+    (429, {'Ratelimit-Reset': str(int(NOW + 5))}, 5.0),
+    (403, {'Retry-After': '3'}, 3.0),
+])
+def test_rate_limit_delay(status, headers, expected):
+    assert rate_limit_delay(Response(status, headers), now=NOW) == pytest.approx(expected)
+
+
+def test_rate_limit_delay_ignores_other_responses():
+    # A plain 403 is a permission error, not a rate limit
+    assert rate_limit_delay(Response(403, {'X-RateLimit-Remaining': '12'}), now=NOW) is None
+    assert rate_limit_delay(Response(403), now=NOW) is None
+    assert rate_limit_delay(Response(200, {'Retry-After': '5'}), now=NOW) is None
+    assert rate_limit_delay(Response(500), now=NOW) is None
+
+
+def test_rate_limit_delay_reset_in_the_past_is_zero():
+    assert rate_limit_delay(Response(429, {'X-RateLimit-Reset': str(int(NOW - 10))}), now=NOW) == 0.0
+
+
+def test_get_retries_server_errors():
+    client, transport, sleeps = make_client(Response(503), Response(502), Response(200))
+    assert client.get('https://example.test/a').status_code == 200
+    assert len(transport.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_post_not_retried_on_server_error_by_default():
+    client, transport, sleeps = make_client(Response(500), Response(200))
+    assert client.post('https://example.test/a', json={}).status_code == 500
+    assert len(transport.calls) == 1
+    assert sleeps == []
+
+
+def test_post_retried_with_retry_true():
+    client, transport, sleeps = make_client(Response(500), Response(200))
+    assert client.post('https://example.test/a', json={}, retry=True).status_code == 200
+    assert len(transport.calls) == 2
+
+
+def test_post_connection_error_raised_without_retry():
+    client, transport, sleeps = make_client(requests.ConnectionError('down'), Response(200))
+    with pytest.raises(requests.ConnectionError):
+        client.post('https://example.test/a')
+    assert len(transport.calls) == 1
+
+
+def test_connection_error_retried_for_get():
+    client, transport, sleeps = make_client(requests.Timeout('slow'), Response(200))
+    assert client.get('https://example.test/a').status_code == 200
+    assert len(sleeps) == 1
+
+
+def test_rate_limit_is_waited_out_even_for_post():
+    client, transport, sleeps = make_client(Response(429, {'Retry-After': '4'}), Response(204))
+    assert client.post('https://example.test/a').status_code == 204
+    assert len(transport.calls) == 2
+    assert 4.0 <= sleeps[0] <= 4.0 + client.backoff_base
+
+
+def test_rate_limit_longer_than_max_wait_returns_the_429():
+    client, transport, sleeps = make_client(Response(429, {'Retry-After': '600'}), Response(200),
+                                            max_rate_limit_wait=120)
+    response = client.get('https://example.test/a')
+    assert response.status_code == 429
+    assert len(transport.calls) == 1
+    assert sleeps == []
+
+
+def test_last_attempt_returns_the_last_response():
+    client, transport, sleeps = make_client(*[Response(503)] * 3, max_retries=2)
+    assert client.get('https://example.test/a').status_code == 503
+    assert len(transport.calls) == 3
+
+
+def test_default_timeout_is_passed_to_the_transport():
+    client, transport, sleeps = make_client(Response(200), Response(200), timeout=(1, 2))
+    client.get('https://example.test/a')
+    client.get('https://example.test/a', timeout=9)
+    assert [call[2]['timeout'] for call in transport.calls] == [(1, 2), 9]
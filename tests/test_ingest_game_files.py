@@ -0,0 +1,67 @@
+"""
+Tests for ingest_game_files(): the process pool, and quarantining workbooks that fail
+or kill their worker.
+"""
+
+import os
+import shutil
+
+import pytest
+
+from conftest import REPO_DIR
+
+import populate_stats
+from stats_cache import FingerprintCache
+from stats_scanner import scan_game_files
+
+GAME_NAMES = ['20251202_203858.xlsx', '20251202_204558.xlsx', '20251202_210205.xlsx']
+CRASH_NAME = '20251202_220000.xlsx'
+
+ingest_workbook = populate_stats.ingest_workbook
+
+
+def crashing_ingest_workbook(file_path, engine=None):
+    """Like ingest_workbook, but the worker process dies outright on CRASH_NAME."""
+    if os.path.basename(file_path) == CRASH_NAME:
+        os._exit(1)
+    return ingest_workbook(file_path, engine)
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    path = tmp_path / 'stats'
+    path.mkdir()
+    for name in GAME_NAMES:
+        shutil.copy(os.path.join(REPO_DIR, 'stats', name), path / name)
+    return path
+
+
+def ingest(source_dir, tmp_path, workers):
+    cache = FingerprintCache(str(tmp_path / 'cache'))
+    return populate_stats.ingest_game_files(scan_game_files([str(source_dir)]), cache, workers=workers)
+
+
+def test_pool_matches_serial(source_dir, tmp_path):
+    serial, serial_failures = ingest(source_dir, tmp_path / 'serial', workers=1)
+    pooled, pooled_failures = ingest(source_dir, tmp_path / 'pooled', workers=2)
+    assert [filename for filename, _, _ in pooled] == GAME_NAMES
+    assert pooled == serial
+    assert serial_failures == pooled_failures == {}
+
+
+def test_unreadable_workbook_is_quarantined(source_dir, tmp_path):
+    (source_dir / CRASH_NAME).write_bytes(b'not a workbook')
+    ingested, failures = ingest(source_dir, tmp_path, workers=2)
+    assert [filename for filename, _, _ in ingested] == GAME_NAMES
+    assert list(failures) == [CRASH_NAME]
+
+
+def test_worker_crash_quarantines_the_file_and_spares_the_run(source_dir, tmp_path, monkeypatch):
+    shutil.copy(source_dir / GAME_NAMES[0], source_dir / CRASH_NAME)
+    monkeypatch.setattr(populate_stats, 'ingest_workbook', crashing_ingest_workbook)
+
+    ingested, failures = ingest(source_dir, tmp_path, workers=2)
+    # The crashing file never runs in this process (it would have exited the test run)
+    assert [filename for filename, _, _ in ingested] == GAME_NAMES
+    assert list(failures) == [CRASH_NAME]
+    assert failures[CRASH_NAME]['error'].startswith('BrokenProcessPool')
@@ -0,0 +1,53 @@
+"""
+Tests for match_shards: shard writes, the manifest summary index and cleanup.
+"""
+
+import json
+import os
+
+from conftest import REPO_DIR
+
+from match_shards import MANIFEST_NAME, load_manifest, remove_match_shards, write_match_shards
+
+
+def load_matches():
+    with open(os.path.join(REPO_DIR, 'MLG 4v4_matches.json'), 'r') as f:
+        return json.load(f)['matches'][:3]
+
+
+def test_manifest_is_a_summary_index(tmp_path):
+    matches = load_matches()
+    written, removed = write_match_shards(str(tmp_path), 'MLG 4v4', matches)
+    assert len(written) == 3 and removed == []
+
+    manifest = load_manifest(str(tmp_path))
+    for entry, match in zip(manifest['matches'], matches):
+        with open(tmp_path / entry['file'], 'r') as f:
+            assert json.load(f) == match
+        # Enough for the games list and leaderboard, without the per-game detail
+        assert entry['winner'] == match['winner']
+        assert [player['name'] for player in entry['player_stats']] == \
+               [player['name'] for player in match['player_stats']]
+        assert set(entry['player_stats'][0]) <= {'name', 'team', 'kills', 'deaths', 'assists', 'score',
+                                                 'pre_game_rank'}
+        assert not {'medals', 'weapons', 'versus', 'detailed_stats'} & set(entry)
+
+
+def test_only_changed_shards_are_written(tmp_path):
+    matches = load_matches()
+    write_match_shards(str(tmp_path), 'MLG 4v4', matches)
+
+    assert write_match_shards(str(tmp_path), 'MLG 4v4', matches) == ([], [])
+
+    matches[1] = dict(matches[1], red_score=matches[1]['red_score'] + 1)
+    written, removed = write_match_shards(str(tmp_path), 'MLG 4v4', matches[1:])
+    assert [os.path.basename(path) for path in written] == [f"{os.path.splitext(matches[1]['source_file'])[0]}.json"]
+    assert len(removed) == 1 and not os.path.exists(removed[0])
+
+
+def test_remove_match_shards(tmp_path):
+    write_match_shards(str(tmp_path), 'MLG 4v4', load_matches())
+    removed = remove_match_shards(str(tmp_path))
+    assert len(removed) == 4
+    assert not (tmp_path / MANIFEST_NAME).exists()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,272 @@
+"""
+Regression tests for parse_excel_file() against the committed MLG 4v4_matches.json.
+
+The committed file was generated before some players' display names changed,
+so its entries are compared after mapping each parsed name to the name in the
+same Post Game Report position. Every stat must match exactly.
+"""
+
+import glob
+import json
+import os
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import REPO_DIR
+
+import http_client
+import populate_stats
+from populate_stats import WorkbookSnapshot, parse_excel_file
+from stats_store import StatsStore
+from xlsx_reader import Sheet
+
+COMMITTED_MATCHES_FILE = os.path.join(REPO_DIR, 'MLG 4v4_matches.json')
+GAME_FILES = sorted(path for path in glob.glob(os.path.join(REPO_DIR, 'stats', '*.xlsx'))
+                    if not path.endswith('_identity.xlsx'))
+
+# Post Game Report field -> player_stats field in the matches file
+PLAYER_FIELDS = {
+    'team': 'team', 'kills': 'kills', 'deaths': 'deaths', 'assists': 'assists', 'score': 'score',
+    'score_numeric': 'score_numeric', 'kda': 'kda', 'suicides': 'suicides', 'shots_fired': 'shots_fired',
+    'shots_hit': 'shots_hit', 'accuracy': 'accuracy', 'head_shots': 'headshots',
+}
+
+
+def load_committed_matches():
+    with open(COMMITTED_MATCHES_FILE, 'r') as f:
+        return {match['source_file']: match for match in json.load(f)['matches']}
+
+
+def to_json(value):
+    return json.dumps(value, indent=2)
+
+
+def assert_same_game(parsed_players, parsed, match, name_field='name'):
+    """Compare parse output with a matches-file entry, mapping names by Post Game Report order."""
+    names = dict(zip([player[name_field] for player in parsed_players],
+                     [player['name'] for player in match['player_stats']]))
+    rename = lambda name: names.get(name, name)
+
+    assert len(parsed_players) == len(match['player_stats'])
+    for player, expected in zip(parsed_players, match['player_stats']):
+        assert {out: player[field] for field, out in PLAYER_FIELDS.items()} == \
+               {out: expected[out] for out in PLAYER_FIELDS.values()}
+
+    assert to_json([dict(stats, player=rename(stats['player'])) for stats in parsed['detailed_stats']]) == \
+           to_json(match['detailed_stats'])
+    assert to_json([dict(medal, player=rename(medal['player'])) for medal in parsed['medals']]) == \
+           to_json(match['medals'])
+    assert to_json([dict(weapon, Player=rename(weapon['Player'])) for weapon in parsed['weapons']]) == \
+           to_json(match['weapons'])
+    assert to_json({rename(player): {rename(opponent): kills for opponent, kills in row.items()}
+                    for player, row in parsed['versus'].items()}) == to_json(match['versus'])
+
+
+@pytest.mark.parametrize('engine', sorted(populate_stats.READER_ENGINES))
+@pytest.mark.parametrize('game_file', GAME_FILES, ids=os.path.basename)
+def test_parse_matches_committed_file(game_file, engine):
+    match = load_committed_matches()[os.path.basename(game_file)]
+    game = parse_excel_file(WorkbookSnapshot.load(game_file, engine))
+
+    details = game['details']
+    assert (details['Start Time'], details['Map Name'], details['Variant Name'], details['Duration']) == \
+           (match['timestamp'], match['map'], match['variant_name'], match['duration'])
+    assert_same_game(game['players'], game, match)
+
+
+@pytest.mark.parametrize('game_file', GAME_FILES, ids=os.path.basename)
+def test_reader_engines_agree(game_file):
+    results = [to_json(parse_excel_file(WorkbookSnapshot.load(game_file, engine)))
+               for engine in sorted(populate_stats.READER_ENGINES)]
+    assert all(result == results[0] for result in results)
+
+
+def run_populate_stats(run_dir, monkeypatch, *args, webhook_status=204):
+    """
+    Run populate_stats.py in run_dir with the webhooks, git pushes and bot stubbed out.
+
+    Returns:
+        The messages posted to the Discord refresh webhook
+    """
+    posted = []
+
+    class Response:
+        status_code = webhook_status
+        headers = {}
+
+    class Transport:
+        def request(self, method, url, **kwargs):
+            if url == populate_stats.DISCORD_REFRESH_WEBHOOK:
+                posted.append(kwargs['json']['content'])
+            return Response()
+
+    # The GitHub push step chdirs to the script's directory, so start each run in run_dir
+    monkeypatch.chdir(run_dir)
+    monkeypatch.setattr(http_client, '_client', http_client.HttpClient(transport=Transport()))
+    monkeypatch.setattr(populate_stats.subprocess, 'run', lambda *a, **k: subprocess.CompletedProcess(a, 0))
+    monkeypatch.setattr(populate_stats, 'RANK_CHANGES_FILE', str(run_dir / 'rank_changes.json'))
+
+    def send_command(command, args=None, **kwargs):
+        raise populate_stats.bot_ipc.BotIpcError('Bot not running')
+
+    # The socket path default is read at import, so stub the call itself
+    monkeypatch.setattr(populate_stats.bot_ipc, 'send_command', send_command)
+    populate_stats.main(populate_stats.parse_args(['--workers', '1', *args]))
+    return posted
+
+
+def test_rebuild_matches_committed_file(run_dir, monkeypatch):
+    """A full populate_stats.py run over stats/ reproduces the committed entries for those games."""
+    run_populate_stats(run_dir, monkeypatch)
+
+    with open(run_dir / 'MLG 4v4_matches.json', 'r') as f:
+        rebuilt = json.load(f)['matches']
+    committed = load_committed_matches()
+    assert [match['source_file'] for match in rebuilt] == [os.path.basename(path) for path in GAME_FILES]
+    for match in rebuilt:
+        expected = committed[match['source_file']]
+        for field in ('timestamp', 'map', 'gametype', 'variant_name', 'duration', 'red_score', 'blue_score',
+                      'winner'):
+            assert match[field] == expected[field]
+        players = [dict(player, head_shots=player['headshots']) for player in match['player_stats']]
+        assert_same_game(players, match, expected)
+
+
+def test_rerun_reports_no_rank_changes(run_dir, monkeypatch):
+    """Unmatched players get the same placeholder ID every run, so a full rerun changes nothing."""
+    with open(run_dir / 'rankstats.json', 'r') as f:
+        known_ids = set(json.load(f))
+    run_populate_stats(run_dir, monkeypatch)
+    with open(run_dir / 'rank_changes.json', 'r') as f:
+        first = json.load(f)
+    # Only Discord accounts the bot knows, never placeholder IDs
+    assert set(first['changes']) <= known_ids
+
+    run_populate_stats(run_dir, monkeypatch, '--full')
+    with open(run_dir / 'rank_changes.json', 'r') as f:
+        second = json.load(f)
+    assert second['version'] > first['version']
+    assert second['changes'] == {}
+
+
+def store_meta(run_dir, key, *value):
+    """Read a stats store meta value, or set it if a value is given."""
+    store = StatsStore(str(run_dir / 'stats.db'))
+    try:
+        if not value:
+            return store.get_meta(key)
+        with store.transaction():
+            store.set_meta(key, value[0])
+    finally:
+        store.close()
+
+
+def test_undelivered_rank_changes_are_sent_again(run_dir, monkeypatch):
+    """Rank changes the bot didn't get stay in the store until a trigger goes through."""
+    def pending_rank_changes():
+        return store_meta(run_dir, 'pending_rank_changes')
+
+    # Not due for a full refresh, so only the changes are sent
+    store_meta(run_dir, 'last_full_rank_refresh', datetime.now().isoformat())
+    def rank_changes():
+        with open(run_dir / 'rank_changes.json', 'r') as f:
+            data = json.load(f)
+        return data['version'], list(data['changes'])
+
+    posted = run_populate_stats(run_dir, monkeypatch, webhook_status=500)
+    version, first = rank_changes()
+    assert first
+    assert posted == [populate_stats.build_refresh_trigger(version, first)]
+    assert list(pending_rank_changes()) == first
+
+    # Nothing new to process - the undelivered changes are retried on their own
+    posted = run_populate_stats(run_dir, monkeypatch, webhook_status=500)
+    assert posted == [populate_stats.build_refresh_trigger(version, first)]
+    assert list(pending_rank_changes()) == first
+
+    # A rerun finds no new changes but still sends the undelivered ones, then clears them
+    posted = run_populate_stats(run_dir, monkeypatch, '--full')
+    version, second = rank_changes()
+    assert second == first
+    assert posted == [populate_stats.build_refresh_trigger(version, second)]
+    assert pending_rank_changes() == {}
+
+    assert run_populate_stats(run_dir, monkeypatch, '--full') == []
+
+
+def test_full_rank_refresh_is_periodic(run_dir, monkeypatch):
+    """Everyone is refreshed on the first run and again once FULL_RANK_REFRESH_HOURS have passed."""
+    assert run_populate_stats(run_dir, monkeypatch) == [populate_stats.REFRESH_TRIGGER]
+    last_refresh = store_meta(run_dir, 'last_full_rank_refresh')
+    assert last_refresh is not None
+
+    assert run_populate_stats(run_dir, monkeypatch, '--full') == []
+    assert run_populate_stats(run_dir, monkeypatch) == []
+
+    overdue = datetime.now() - timedelta(hours=populate_stats.FULL_RANK_REFRESH_HOURS + 1)
+    store_meta(run_dir, 'last_full_rank_refresh', overdue.isoformat())
+    assert run_populate_stats(run_dir, monkeypatch) == [populate_stats.REFRESH_TRIGGER]
+    assert store_meta(run_dir, 'last_full_rank_refresh') > last_refresh
+
+
+def test_identity_file_change_triggers_a_run(run_dir, monkeypatch):
+    """An identity file that lands after its game gets the games re-resolved (e.g. in a --watch batch)."""
+    def rank_changes_version():
+        with open(run_dir / 'rank_changes.json', 'r') as f:
+            return json.load(f)['version']
+
+    run_populate_stats(run_dir, monkeypatch)
+    version = rank_changes_version()
+    run_populate_stats(run_dir, monkeypatch)
+    assert rank_changes_version() == version  # nothing to process
+
+    identity_file = run_dir / 'stats' / '20251202_204558_identity.xlsx'
+    st = os.stat(identity_file)
+    os.utime(identity_file, (st.st_atime, st.st_mtime + 60))
+    run_populate_stats(run_dir, monkeypatch)
+    assert rank_changes_version() == version + 1
+
+
+def test_manifest_files_follow_the_match_output_mode(run_dir, monkeypatch):
+    """playlists.json only points the site at shard manifests that were written."""
+    def manifest_files():
+        with open(run_dir / 'playlists.json', 'r') as f:
+            return {playlist['name']: playlist.get('manifest_file') for playlist in json.load(f)['playlists']}
+
+    run_populate_stats(run_dir, monkeypatch)
+    assert set(manifest_files().values()) == {None}
+
+    run_populate_stats(run_dir, monkeypatch, '--full', '--match-output', 'shards')
+    manifest_file = manifest_files()['MLG 4v4']
+    assert manifest_file == 'matches/mlg_4v4/manifest.json'
+    assert (run_dir / manifest_file).exists()
+    assert manifest_files()['Head to Head'] is None  # no games, no manifest
+
+    run_populate_stats(run_dir, monkeypatch, '--full')
+    assert set(manifest_files().values()) == {None}
+    assert not (run_dir / manifest_file).exists()
+
+
+def make_snapshot(post_game_rows, details_row=('CTF', 'MLG CTF', 'Midship', None, None, '10:00')):
+    """Minimal WorkbookSnapshot with the given Post Game Report rows (name, place, team, kills)."""
+    empty = Sheet(['Player'], [])
+    return WorkbookSnapshot('20250101_000000.xlsx', {
+        'Game Details': Sheet(['Game Type', 'Variant Name', 'Map Name', 'Start Time', 'End Time', 'Duration'],
+                              [details_row]),
+        'Post Game Report': Sheet(['name', 'place', 'team', 'kills'], post_game_rows),
+        'Versus': Sheet(['Player'], []),
+        'Game Statistics': empty,
+        'Medal Stats': Sheet(['player'], []),
+        'Weapon Statistics': empty,
+    })
+
+
+def test_blank_cells_read_as_nan():
+    """Blank cells come out as str(NaN), like the pandas-row parser this replaced."""
+    game = parse_excel_file(make_snapshot([('Rocky', None, 'Red', None), (None, '2nd', None, 5)]))
+    assert [(p['name'], p['place'], p['team'], p['kills']) for p in game['players']] == \
+           [('Rocky', 'nan', 'Red', 0), ('nan', '2nd', 'nan', 5)]
+    assert game['details']['Start Time'] == 'nan'
+    assert game['details']['Duration'] == '10:00'
@@ -0,0 +1,303 @@
+"""
+Tests for rank_sync: plans, applying them and the role cache, against fake guilds, members and roles.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip('discord')
+
+import rank_sync
+from rank_sync import RankChange, apply_rank_change, apply_rank_sync, plan_rank_sync
+
+
+class FakeRole:
+    def __init__(self, role_id, name, guild=None):
+        self.id = role_id
+        self.name = name
+        self.guild = guild
+
+    def is_default(self):
+        return self.name == '@everyone'
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self):
+        return self.id
+
+
+class FakeMember:
+    """Role changes apply to .roles right away, like the member update event would."""
+
+    def __init__(self, member_id, roles, guild, bot=False):
+        self.id = member_id
+        self.roles = list(roles)
+        self.guild = guild
+        self.bot = bot
+        self.display_name = f'member{member_id}'
+        self.failures = []  # HTTP statuses for the next role requests to fail with
+        self.requests = []  # ('add' | 'remove', [role names])
+
+    async def _request(self, kind, roles):
+        await asyncio.sleep(0)
+        if self.failures:
+            raise http_error(self.failures.pop(0))
+        self.requests.append((kind, [role.name for role in roles]))
+
+    async def add_roles(self, *roles, reason=None):
+        await self._request('add', roles)
+        self.roles.extend(role for role in roles if role not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self._request('remove', roles)
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class FakeGuild:
+    def __init__(self, levels=range(1, 11)):
+        self.id = 1
+        self.chunked = True
+        self.default_role = FakeRole(1, '@everyone', self)
+        self.roles = [self.default_role] + [FakeRole(100 + level, f'Level {level}', self) for level in levels]
+        self.members = []
+
+    def level_role(self, level):
+        return next(role for role in self.roles if role.name == f'Level {level}')
+
+    def add_member(self, member_id, *levels, extra_roles=(), bot=False):
+        roles = [self.default_role, *extra_roles] + [self.level_role(level) for level in levels]
+        member = FakeMember(member_id, roles, self, bot=bot)
+        self.members.append(member)
+        return member
+
+
+def http_error(status):
+    return discord.HTTPException(SimpleNamespace(status=status, reason='error'), 'error')
+
+
+def level_names(member):
+    return sorted(role.name for role in member.roles if role.name.startswith('Level '))
+
+
+@pytest.fixture(autouse=True)
+def role_caches(monkeypatch):
+    caches = {}
+    monkeypatch.setattr(rank_sync, '_role_caches', caches)
+    return caches
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Retry back-off delays, without waiting for them."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        if delay:
+            delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def test_plan_lists_only_members_that_need_a_change():
+    guild = FakeGuild()
+    correct = guild.add_member(10, 5)
+    rank_up = guild.add_member(11, 4)
+    no_role = guild.add_member(12)
+    two_roles = guild.add_member(13, 2, 7)
+    guild.add_member(14)
+    guild.add_member(15, bot=True)
+
+    plan = asyncio.run(plan_rank_sync(guild, {10: 5, 11: 6, 12: 3, 13: 7, 99: 4, 14: 42}))
+
+    assert {(change.member.id, change.old_level, change.new_level) for change in plan.changes} == \
+           {(rank_up.id, 4, 6), (no_role.id, None, 3), (two_roles.id, 2, 7)}
+    assert plan.unchanged == 1 and correct not in [change.member for change in plan.changes]
+    assert plan.not_found == [99]
+    assert plan.missing_roles == {42}
+
+
+def test_plan_default_level_skips_bots():
+    guild = FakeGuild()
+    guild.add_member(10, 3)
+    guild.add_member(11)
+    guild.add_member(12, bot=True)
+
+    plan = asyncio.run(plan_rank_sync(guild, {10: 3}, default_level=1))
+    assert [(change.member.id, change.new_level) for change in plan.changes] == [(11, 1)]
+
+
+def test_dry_run_changes_nothing():
+    guild = FakeGuild()
+    members = [guild.add_member(10 + i, 1) for i in range(3)]
+
+    async def run():
+        plan = await plan_rank_sync(guild, {member.id: 2 for member in members})
+        return await apply_rank_sync(plan, dry_run=True)
+
+    result = asyncio.run(run())
+    assert result['planned'] == 3 and result['applied'] == 0 and result['failed'] == 0
+    assert all(member.requests == [] and level_names(member) == ['Level 1'] for member in members)
+
+
+def test_change_keeps_other_roles():
+    guild = FakeGuild()
+    verified = FakeRole(50, 'Verified', guild)
+    guild.roles.append(verified)
+    member = guild.add_member(10, 2, 4, extra_roles=[verified])
+    booster = FakeRole(51, 'Booster', guild)
+
+    async def run():
+        plan = await plan_rank_sync(guild, {10: 6})
+        # Another bot hands out a role between the plan and the change
+        member.roles.append(booster)
+        await apply_rank_sync(plan)
+
+    asyncio.run(run())
+    assert level_names(member) == ['Level 6']
+    assert verified in member.roles and booster in member.roles and guild.default_role in member.roles
+    assert member.requests == [('add', ['Level 6']), ('remove', ['Level 2', 'Level 4'])]
+    assert rank_sync._role_caches[guild.id].has_level(10, 6)
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(sleeps, status):
+    guild = FakeGuild()
+    member = guild.add_member(10, 1)
+    member.failures = [status, status]
+
+    asyncio.run(apply_rank_change(RankChange(member, 1, 2, guild.level_role(2))))
+    assert level_names(member) == ['Level 2']
+    assert sleeps == [1, 2]
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    guild = FakeGuild()
+    member = guild.add_member(10, 1)
+    member.failures = [502] * rank_sync.MAX_ATTEMPTS
+
+    async def run():
+        plan = await plan_rank_sync(guild, {10: 2})
+        return await apply_rank_sync(plan)
+
+    result = asyncio.run(run())
+    assert result['applied'] == 0 and result['failed'] == 1
+    assert level_names(member) == ['Level 1']
+    assert len(sleeps) == rank_sync.MAX_ATTEMPTS - 1
+
+
+def test_client_errors_are_not_retried(sleeps):
+    guild = FakeGuild()
+    member = guild.add_member(10, 1)
+    member.failures = [403]
+
+    with pytest.raises(discord.HTTPException):
+        asyncio.run(apply_rank_change(RankChange(member, 1, 2, guild.level_role(2))))
+    assert sleeps == []
+
+
+def test_changes_in_flight_are_bounded():
+    guild = FakeGuild()
+    for i in range(20):
+        guild.add_member(10 + i, 1)
+    in_flight = 0
+    peak = 0
+
+    async def add_roles(member, *roles, reason=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        member.roles.extend(roles)
+        in_flight -= 1
+
+    for member in guild.members:
+        member.add_roles = add_roles.__get__(member)
+
+    notified = []
+
+    async def on_change(change):
+        notified.append(change.member.id)
+
+    async def run():
+        plan = await plan_rank_sync(guild, {member.id: 3 for member in guild.members})
+        return await apply_rank_sync(plan, concurrency=4, on_change=on_change)
+
+    result = asyncio.run(run())
+    assert result['applied'] == 20 and result['failed'] == 0
+    assert peak == 4
+    assert sorted(notified) == [member.id for member in guild.members]
+    assert all(level_names(member) == ['Level 3'] for member in guild.members)
+
+
+def test_member_events_update_the_cache():
+    guild = FakeGuild()
+    member = guild.add_member(10, 3)
+    cache = rank_sync.get_role_cache(guild)
+    assert cache.has_level(10, 3)
+
+    # A moderator swaps the role by hand
+    member.roles = [guild.default_role, guild.level_role(5)]
+    rank_sync.member_updated(member)
+    assert cache.has_level(10, 5)
+    plan = asyncio.run(plan_rank_sync(guild, {10: 5}))
+    assert plan.changes == [] and plan.unchanged == 1
+
+    joined = guild.add_member(11, 2)
+    rank_sync.member_updated(joined)
+    assert cache.has_level(11, 2)
+
+    guild.members.remove(member)
+    rank_sync.member_removed(member)
+    assert 10 not in cache.member_levels
+
+
+def test_role_events_reseed_the_cache():
+    guild = FakeGuild(levels=range(1, 4))
+    member = guild.add_member(10, 3)
+    cache = rank_sync.get_role_cache(guild)
+
+    created = FakeRole(200, 'Level 4', guild)
+    guild.roles.append(created)
+    rank_sync.role_changed(created)
+    assert cache.roles[4] is created
+
+    # Renamed away from a Level role
+    renamed = guild.level_role(2)
+    before = FakeRole(renamed.id, renamed.name, guild)
+    renamed.name = 'Veteran'
+    rank_sync.role_changed(before, renamed)
+    assert 2 not in cache.roles
+
+    # Deleting a role takes it off its members without a member update event
+    deleted = guild.level_role(3)
+    guild.roles.remove(deleted)
+    member.roles.remove(deleted)
+    rank_sync.role_changed(deleted)
+    assert 3 not in cache.roles
+    assert cache.levels(member) == ()
+
+
+def test_other_roles_and_unknown_guilds_are_ignored(monkeypatch):
+    guild = FakeGuild()
+    cache = rank_sync.get_role_cache(guild)
+    reseeds = []
+    monkeypatch.setattr(cache, 'seed', reseeds.append)
+
+    role = FakeRole(300, 'Verified', guild)
+    guild.roles.append(role)
+    rank_sync.role_changed(role)
+    rank_sync.role_changed(role, FakeRole(300, 'Trusted', guild))
+    assert reseeds == []
+
+    other = FakeGuild()
+    other.id = 2
+    rank_sync.member_updated(other.add_member(10, 1))
+    rank_sync.role_changed(other.level_role(1))
+    assert list(rank_sync._role_caches) == [guild.id]
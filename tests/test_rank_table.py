@@ -0,0 +1,34 @@
+"""
+Tests for rank_table.RankTable against the committed xp_config.json.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import REPO_DIR
+
+from rank_table import MAX_RANK, RankTable
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(os.path.join(REPO_DIR, 'xp_config.json'), 'r') as f:
+        return json.load(f)
+
+
+def test_rank_matches_threshold_ranges(config):
+    table = RankTable(config)
+    for level, (min_xp, max_xp) in config['rank_thresholds'].items():
+        assert table.rank(min_xp) == int(level)
+        assert table.rank(max_xp) == int(level)
+
+
+def test_rank_below_and_above_thresholds(config):
+    table = RankTable(config)
+    assert table.rank(-500) == 1
+    # Past the top threshold's maximum the rank stays at the top level (not 1)
+    top_max = config['rank_thresholds'][str(MAX_RANK)][1]
+    assert table.rank(top_max + 1) == MAX_RANK
+    assert table.progress(top_max + 1) == (MAX_RANK, top_max + 1, 0)
@@ -0,0 +1,65 @@
+"""
+Tests for stats_store.StatsStore: diffed syncs, player_games rows and rank changes.
+"""
+
+import pytest
+
+from stats_store import StatsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StatsStore(str(tmp_path / 'stats.db'))
+    yield store
+    store.close()
+
+
+def player_row(name, user_id=None, kills=0):
+    return {'player_name': name, 'user_id': user_id, 'team': 'Red', 'kills': kills, 'deaths': 1,
+            'assists': 0, 'result': 'win'}
+
+
+def test_players_sharing_a_name_in_one_game_are_both_kept(store):
+    rows = [player_row('Guest', kills=3), player_row('Guest', kills=7), player_row('Rocky', '42', kills=5)]
+    with store.transaction():
+        store.sync_games([('20250101_000000.xlsx', 'MLG 4v4', {'timestamp': 't'}, rows)])
+
+    stored = store.conn.execute('SELECT position, player_name, kills FROM player_games ORDER BY position').fetchall()
+    assert stored == [(0, 'Guest', 3), (1, 'Guest', 7), (2, 'Rocky', 5)]
+    assert [row['kills'] for row in store.get_player_games('42')] == [5]
+
+
+def test_sync_only_writes_changed_rows(store):
+    games = [('a.xlsx', 'MLG 4v4', {'n': 1}, [player_row('A')]), ('b.xlsx', None, {'n': 2}, [])]
+    players = {'1': {'discord_name': 'one', 'highest_rank': 3}, '2': {'discord_name': 'two', 'highest_rank': 5}}
+    with store.transaction():
+        assert store.sync_games(games) == (2, 0)
+        assert store.sync_players(players) == (2, 0)
+
+    with store.transaction():
+        assert store.sync_games(games) == (0, 0)
+        assert store.sync_players(players) == (0, 0)
+
+    games[1] = ('b.xlsx', None, {'n': 3}, [])
+    with store.transaction():
+        assert store.sync_games(games[1:]) == (1, 1)
+    assert store.export_games(None) == [{'n': 3}]
+    assert store.export_games('MLG 4v4') == []
+    assert store.export_players() == players
+
+
+def test_highest_rank_changes(store):
+    with store.transaction():
+        store.sync_players({'1': {'highest_rank': 3, 'xp': 10}, '2': {'highest_rank': 5}})
+
+    changes = store.highest_rank_changes({'1': {'highest_rank': 3, 'xp': 20}, '2': {'highest_rank': 6},
+                                          '3': {'highest_rank': 1}})
+    assert changes == {'2': (5, 6), '3': (None, 1)}
+
+
+def test_failed_transaction_writes_nothing(store):
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.sync_players({'1': {'highest_rank': 3}})
+            raise RuntimeError('crash mid-run')
+    assert store.export_players() == {}
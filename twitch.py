@@ -95,7 +95,7 @@ def save_players(players: Dict[str, Dict[str, str]]):
         # Push to GitHub
         try:
             import github_webhook
-            github_webhook.update_players_on_github()
+            github_webhook.queue_github_push(PLAYERS_FILE)
         except Exception as e:
             logger.warning(f"GitHub push failed for players.json: {e}")
     except Exception as e:
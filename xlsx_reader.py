@@ -0,0 +1,235 @@
+"""
+xlsx_reader.py - Pandas-free streaming reader for the stats workbooks
+
+Reads worksheet XML straight out of the .xlsx zip with iterparse and turns each
+sheet into a Sheet (header + row tuples). Only what the stats workbooks use is
+supported: shared, inline and formula strings, numbers and booleans. Number
+formats (dates etc.) are not applied - values come back as plain numbers.
+
+The results mirror what pd.read_excel() gives for these files: the first row is
+the header, fully blank rows are skipped, blank cells are None, and a column
+made up entirely of numeric text is converted to numbers.
+"""
+
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+INT_RE = re.compile(r'^[+-]?\d+$')
+CELL_REF_RE = re.compile(r'^([A-Z]+)')
+
+
+class Sheet:
+    """One worksheet: column names plus row tuples (None for blank cells)."""
+
+    __slots__ = ('columns', 'rows', '_index', '_column_values')
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows
+        self._column_values = None
+        self._index = {}
+        for i, col in enumerate(self.columns):
+            self._index.setdefault(col, i)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, column):
+        return column in self._index
+
+    def column(self, name):
+        """All values in a column as a tuple, top to bottom. Raises KeyError if the column is missing."""
+        i = self._index[name]
+        if self._column_values is None:
+            # Transpose once; later column lookups are free
+            self._column_values = list(zip(*self.rows)) if self.rows else [()] * len(self.columns)
+        return self._column_values[i]
+
+    def records(self):
+        """Rows as dicts of column -> value."""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+def _local(tag):
+    """Strip the namespace from an element tag."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(cell_ref):
+    """'A1' -> 0, 'AB12' -> 27"""
+    match = CELL_REF_RE.match(cell_ref)
+    if not match:
+        return None
+    index = 0
+    for ch in match.group(1):
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _to_number(text):
+    """Numeric cell text -> int or float (same rule openpyxl uses)."""
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+def _read_shared_strings(zf):
+    """Load xl/sharedStrings.xml (missing in files that only use inline strings)."""
+    try:
+        f = zf.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    with f:
+        for _, elem in ET.iterparse(f):
+            if _local(elem.tag) == 'si':
+                strings.append(''.join(t.text or '' for t in elem.iter() if _local(t.tag) == 't'))
+                elem.clear()
+    return strings
+
+
+def _sheet_paths(zf):
+    """Return [(sheet name, zip path)] in workbook order."""
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+
+    targets = {}
+    for rel in rels.iter(f'{{{PKG_REL_NS}}}Relationship'):
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            path = target.lstrip('/')
+        else:
+            path = posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = path
+
+    sheets = []
+    for elem in workbook.iter():
+        if _local(elem.tag) == 'sheet':
+            rel_id = elem.get(f'{{{REL_NS}}}id')
+            if rel_id in targets:
+                sheets.append((elem.get('name'), targets[rel_id]))
+    return sheets
+
+
+def _cell_value(cell, cell_type, shared_strings):
+    """Decode one <c> element."""
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter() if _local(t.tag) == 't')
+
+    text = None
+    for child in cell:
+        if _local(child.tag) == 'v':
+            text = child.text
+            break
+    if text is None:
+        return None
+
+    if cell_type == 's':
+        return shared_strings[int(text)]
+    if cell_type in ('str', 'inlineStr'):
+        return text
+    if cell_type == 'b':
+        return text == '1'
+    if cell_type == 'e':
+        return None
+    return _to_number(text)
+
+
+def _iter_rows(f, shared_strings):
+    """Stream rows of a worksheet as lists of cell values."""
+    for _, elem in ET.iterparse(f):
+        if _local(elem.tag) != 'row':
+            continue
+        values = []
+        for cell in elem:
+            if _local(cell.tag) != 'c':
+                continue
+            ref = cell.get('r')
+            index = _column_index(ref) if ref else None
+            if index is not None and index > len(values):
+                values.extend([None] * (index - len(values)))
+            value = _cell_value(cell, cell.get('t'), shared_strings)
+            # Empty strings are blanks, as with pandas
+            values.append(None if value == '' else value)
+        elem.clear()
+        yield values
+
+
+def _header_names(header):
+    """Name blank header cells and de-duplicate repeats the way pandas does."""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _infer_column(values):
+    """Convert a column whose non-blank values are all numeric text into numbers."""
+    present = [v for v in values if v is not None]
+    if not present or not any(isinstance(v, str) for v in present):
+        return values
+    if all(isinstance(v, int) and not isinstance(v, bool) or isinstance(v, str) and INT_RE.match(v.strip())
+           for v in present):
+        return [None if v is None else int(v) for v in values]
+    try:
+        return [None if v is None else float(v) for v in values]
+    except (TypeError, ValueError):
+        return values
+
+
+def _build_sheet(raw_rows):
+    """Header + typed row tuples from raw streamed rows."""
+    raw_rows = [row for row in raw_rows if any(v is not None for v in row)]
+    if not raw_rows:
+        return Sheet([], [])
+
+    width = max(len(row) for row in raw_rows)
+    header = raw_rows[0] + [None] * (width - len(raw_rows[0]))
+    body = [row + [None] * (width - len(row)) for row in raw_rows[1:]]
+
+    columns = [_infer_column(list(col)) for col in zip(*body)] if body else []
+    rows = list(zip(*columns)) if columns else []
+    return Sheet(_header_names(header), rows)
+
+
+def read_workbook(file_path, sheet_names=None):
+    """
+    Read a workbook into {sheet name: Sheet}.
+
+    Args:
+        file_path: Path to the .xlsx file
+        sheet_names: Optional list of sheet names to read (default: all sheets)
+    """
+    sheets = {}
+    with zipfile.ZipFile(file_path) as zf:
+        shared_strings = _read_shared_strings(zf)
+        for name, path in _sheet_paths(zf):
+            if sheet_names is not None and name not in sheet_names:
+                continue
+            with zf.open(path) as f:
+                sheets[name] = _build_sheet(_iter_rows(f, shared_strings))
+    return sheets
+
+
+def read_first_sheet(file_path):
+    """Read only the first sheet in workbook order (like pd.read_excel with no sheet_name)."""
+    with zipfile.ZipFile(file_path) as zf:
+        shared_strings = _read_shared_strings(zf)
+        paths = _sheet_paths(zf)
+        if not paths:
+            return Sheet([], [])
+        with zf.open(paths[0][1]) as f:
+            return _build_sheet(_iter_rows(f, shared_strings))